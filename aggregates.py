@@ -0,0 +1,195 @@
+from datetime import date
+from heapq import nlargest
+
+# Type codes, as in store.TYPE_CODES
+CREDIT, DEBIT, TRANSFER = 0, 1, 2
+
+
+class PeriodKeys(dict):
+    """Date ordinal -> (year, quarter), computed once per distinct date."""
+
+    def __missing__(self, ordinal):
+        day = date.fromordinal(ordinal)
+        key = self[ordinal] = (day.year, (day.month - 1) // 3 + 1)  # Q1: Jan-Mar, Q2: Apr-Jun, etc.
+        return key
+
+
+class RunningTotals:
+    """
+    Transaction counts and absolute amounts per type, per (year, quarter) and per customer.
+
+    Kept in step with the store row by row (each change subtracts the row's old
+    values and adds the new ones), so summaries are read off the totals instead
+    of scanning every transaction. Amounts are the store's whole cents, so the
+    totals stay exact however many changes are applied.
+
+    Attributes:
+        counts (list): Rows per type code.
+        cents (list): Absolute amount in cents per type code.
+        periods (dict): (year, quarter) -> [counts per type code..., cents per type code...].
+        customers (dict): customer_id -> [rows, absolute amount in cents].
+    """
+
+    def __init__(self):
+        self.counts = [0, 0, 0]
+        self.cents = [0, 0, 0]
+        self.periods = {}
+        self.customers = {}
+        self._period_keys = PeriodKeys()
+
+    @classmethod
+    def build(cls, dates, types, cents, customer_ids, skip=None):
+        """
+        Total every row.
+
+        Args:
+            dates, types, cents, customer_ids: The store's columns (amounts in signed cents).
+            skip: Optional bytes-like with a true byte for each row to leave out.
+
+        Returns:
+            RunningTotals: The totals.
+        """
+        totals = cls()
+        rows = zip(dates, types, map(abs, cents), customer_ids)
+        if skip is not None:
+            rows = (row for row, skipped in zip(rows, skip) if not skipped)
+        # Sum per (date, type) and per customer first: far fewer keys than rows
+        by_day = {}
+        customers = totals.customers
+        for ordinal, type_code, amount, customer_id in rows:
+            key = (ordinal, type_code)
+            day = by_day.get(key)
+            if day is None:
+                by_day[key] = [1, amount]
+            else:
+                day[0] += 1
+                day[1] += amount
+            customer = customers.get(customer_id)
+            if customer is None:
+                customers[customer_id] = [1, amount]
+            else:
+                customer[0] += 1
+                customer[1] += amount
+        period_keys = totals._period_keys
+        for (ordinal, type_code), (count, cents) in by_day.items():
+            totals.counts[type_code] += count
+            totals.cents[type_code] += cents
+            key = period_keys[ordinal]
+            period = totals.periods.get(key)
+            if period is None:
+                period = totals.periods[key] = [0] * 6
+            period[type_code] += count
+            period[3 + type_code] += cents
+        return totals
+
+    @classmethod
+    def from_cube(cls, cube):
+        """
+        Total the cells of a rollup cube (see rollup.py) instead of the rows.
+
+        Args:
+            cube (RollupCube): Counts and amounts per month, type and customer.
+
+        Returns:
+            RunningTotals: The same totals build() returns for the rows.
+        """
+        totals = cls()
+        customers = totals.customers
+        for (year, month), partition in cube.partitions.items():
+            key = (year, (month - 1) // 3 + 1)
+            period = totals.periods.get(key)
+            if period is None:
+                period = totals.periods[key] = [0] * 6
+            for (type_code, customer_id), (count, cents) in partition.items():
+                totals.counts[type_code] += count
+                totals.cents[type_code] += cents
+                period[type_code] += count
+                period[3 + type_code] += cents
+                customer = customers.get(customer_id)
+                if customer is None:
+                    customers[customer_id] = [count, cents]
+                else:
+                    customer[0] += count
+                    customer[1] += cents
+        return totals
+
+    def add(self, ordinal, type_code, cents, customer_id, sign=1):
+        """Add a row (amount in signed cents) to the totals, or with `sign` -1, take it out."""
+        cents = sign * abs(cents)
+        self.counts[type_code] += sign
+        self.cents[type_code] += cents
+        key = self._period_keys[ordinal]
+        period = self.periods.get(key)
+        if period is None:
+            period = self.periods[key] = [0] * 6
+        period[type_code] += sign
+        period[3 + type_code] += cents
+        if not any(period):
+            del self.periods[key]
+        customer = self.customers.get(customer_id)
+        if customer is None:
+            customer = self.customers[customer_id] = [0, 0]
+        customer[0] += sign
+        customer[1] += cents
+        if not customer[0]:
+            del self.customers[customer_id]
+
+    def discard(self, ordinal, type_code, cents, customer_id):
+        """Take a row out of the totals."""
+        self.add(ordinal, type_code, cents, customer_id, -1)
+
+    def total(self, type_code):
+        """Return the absolute amount of one type, in dollars."""
+        return self.cents[type_code] / 100
+
+    def years(self):
+        """
+        Return the totals per year, with their quarters.
+
+        Returns:
+            dict: year -> {'credits', 'debits', 'transfers' (dollars), 'count',
+            'quarters': {quarter: the same keys}}, for years with transactions,
+            in year order; quarters without transactions have a count of 0.
+        """
+        years = {}
+        for (year, quarter), period in sorted(self.periods.items()):
+            data = years.get(year)
+            if data is None:
+                data = years[year] = dict(_empty_period(), quarters={q: _empty_period() for q in range(1, 5)})
+            for target in (data, data['quarters'][quarter]):
+                target['credits'] += period[3 + CREDIT]
+                target['debits'] += period[3 + DEBIT]
+                target['transfers'] += period[3 + TRANSFER]
+                target['count'] += period[CREDIT] + period[DEBIT] + period[TRANSFER]
+        for data in years.values():
+            for target in (data, *data['quarters'].values()):
+                for key in ('credits', 'debits', 'transfers'):
+                    target[key] /= 100
+        return years
+
+    def top_customers(self, count):
+        """Return up to `count` (customer_id, absolute amount in dollars), largest amount first."""
+        return [(customer_id, cents / 100)
+                for customer_id, (_, cents) in nlargest(count, self.customers.items(), key=lambda item: item[1][1])]
+
+    def differences(self, other):
+        """
+        Compare with other totals, e.g. ones rebuilt from scratch.
+
+        Returns:
+            list: A description of each total that differs; empty if they all match.
+        """
+        differences = []
+        for name in ('counts', 'cents', 'periods', 'customers'):
+            mine, theirs = getattr(self, name), getattr(other, name)
+            if isinstance(mine, dict):
+                keys = sorted(set(mine) | set(theirs), key=repr)
+                differences.extend(f"{name}[{key!r}]: {mine.get(key)} != {theirs.get(key)}"
+                                   for key in keys if mine.get(key) != theirs.get(key))
+            elif mine != theirs:
+                differences.append(f"{name}: {mine} != {theirs}")
+        return differences
+
+
+def _empty_period():
+    return {'credits': 0, 'debits': 0, 'transfers': 0, 'count': 0}
@@ -0,0 +1,252 @@
+from itertools import compress
+from math import ceil, log
+
+# Scales a median absolute deviation to the standard deviation of normal data
+MAD_SCALE = 0.6745
+
+# Relative accuracy of the quantile sketch behind the median/MAD detector
+SKETCH_ACCURACY = 0.005
+
+
+class Moments:
+    """
+    Count, mean and sum of squared deviations from the mean of a stream of values.
+
+    Updated value by value with Welford's method and merged with Chan's pairwise
+    update, so batches and shards combine without keeping their values and
+    without the cancellation of a sum of squares.
+    """
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value):
+        """Add one value (Welford)."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        """Fold in the moments of other values (Chan et al.)."""
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+
+    @property
+    def std_dev(self):
+        """float: Population standard deviation."""
+        return (self.m2 / self.count) ** 0.5 if self.count else 0.0
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile estimates of non-negative values in constant memory.
+
+    Values are counted in logarithmic buckets, so any quantile is returned
+    within SKETCH_ACCURACY of its true value, relative to it, whatever the
+    number of values; amounts from a cent to a billion take about 2,500 buckets.
+    """
+
+    def __init__(self, accuracy=SKETCH_ACCURACY):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = log(self.gamma)
+        self.buckets = {}  # Bucket index -> values; bucket i holds (gamma^(i-1), gamma^i]
+        self.zeros = 0
+        self.count = 0
+
+    def extend(self, values):
+        """Count non-negative values."""
+        buckets = self.buckets
+        log_gamma = self._log_gamma
+        for value in values:
+            if value > 0:
+                index = ceil(log(value) / log_gamma)
+                buckets[index] = buckets.get(index, 0) + 1
+            else:
+                self.zeros += 1
+            self.count += 1
+
+    def merge(self, other):
+        """Fold in the counts of another sketch of the same accuracy."""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q):
+        """Return the estimated `q` quantile (0 to 1), or None if no values were counted."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * self.gamma ** index / (self.gamma + 1)  # Midpoint, relative to the bucket's bounds
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class ZScoreDetector:
+    """
+    Flags absolute amounts more than `threshold` standard deviations above their mean.
+
+    The mean and deviation are taken over all rows, or with `by` set to 'type'
+    or 'customer', over the rows of the same type or customer, so a large
+    payment stands out against its own customer's history. Only the moments of
+    each group are kept.
+    """
+
+    deviation_pass = False  # Rows can be flagged batch by batch as soon as every row is fitted
+
+    def __init__(self, threshold=3.0, by=None):
+        if by not in (None, 'type', 'customer'):
+            raise ValueError(f"Unknown anomaly grouping '{by}'")
+        self.threshold = threshold
+        self.by = by
+        self.groups = {}  # Group key (None, type code or customer ID) -> Moments
+
+    def describe(self):
+        """Return the rule, as shown in the report."""
+        scope = {None: 'mean amount', 'type': 'mean amount of its type', 'customer': 'mean amount of its customer'}
+        return f"> {self.threshold:g} std dev from {scope[self.by]}"
+
+    def fit(self, types, amounts, customer_ids):
+        """Add a batch of rows to the moments."""
+        if self.by is None:
+            # Two passes over the batch, then one merge: far cheaper than a Welford update per row
+            count = len(amounts)
+            if count:
+                mean = sum(map(abs, amounts)) / count
+                m2 = sum((magnitude - mean) ** 2 for magnitude in map(abs, amounts))
+                self.groups.setdefault(None, Moments()).merge(Moments(count, mean, m2))
+            return
+        keys = types if self.by == 'type' else customer_ids
+        groups = self.groups
+        for key, amount in zip(keys, amounts):
+            moments = groups.get(key)
+            if moments is None:
+                moments = groups[key] = Moments()
+            moments.add(abs(amount))
+
+    def merge(self, other):
+        """Fold in a detector fitted on other rows."""
+        for key, moments in other.groups.items():
+            mine = self.groups.get(key)
+            if mine is None:
+                self.groups[key] = Moments(moments.count, moments.mean, moments.m2)
+            else:
+                mine.merge(moments)
+
+    def flag(self, types, amounts, customer_ids):
+        """Return the positions of the anomalous rows among those fitted, in order."""
+        limits = {key: moments.mean + self.threshold * moments.std_dev for key, moments in self.groups.items()}
+        if self.by is None:
+            if not limits:
+                return []
+            return list(compress(range(len(amounts)), map(limits[None].__lt__, map(abs, amounts))))
+        keys = types if self.by == 'type' else customer_ids
+        return [slot for slot, (key, amount) in enumerate(zip(keys, amounts)) if abs(amount) > limits[key]]
+
+
+class MADDetector:
+    """
+    Flags absolute amounts whose modified z-score, 0.6745 * (amount - median) / MAD,
+    exceeds `threshold`.
+
+    The median and the median absolute deviation (MAD) resist the outliers they
+    look for, unlike a mean and standard deviation. Both come from quantile
+    sketches, so memory stays constant; the MAD needs the median, so flagging
+    takes one extra pass. Nothing is flagged when more than half the amounts
+    are equal (a MAD of 0).
+
+    flag() takes the deviations of the rows it is given. To flag rows batch by
+    batch (e.g. while streaming a file), pass every row to fit_deviations()
+    first, so the MAD is that of all of them.
+    """
+
+    deviation_pass = True
+
+    def __init__(self, threshold=3.5):
+        self.threshold = threshold
+        self.sketch = QuantileSketch()
+        self.deviations = QuantileSketch()  # Filled by fit_deviations(), for flagging in batches
+
+    def describe(self):
+        """Return the rule, as shown in the report."""
+        return f"modified z-score > {self.threshold:g}, from the median amount"
+
+    def fit(self, types, amounts, customer_ids):
+        """Add a batch of rows to the median sketch."""
+        self.sketch.extend(map(abs, amounts))
+
+    def merge(self, other):
+        """Fold in a detector fitted on other rows."""
+        self.sketch.merge(other.sketch)
+
+    def fit_deviations(self, types, amounts, customer_ids):
+        """Add a batch of fitted rows to the sketch of deviations from the median."""
+        median = self.sketch.quantile(0.5)
+        if median is not None:
+            self.deviations.extend(abs(abs(amount) - median) for amount in amounts)
+
+    def flag(self, types, amounts, customer_ids):
+        """Return the positions of the anomalous rows among those fitted, in order."""
+        median = self.sketch.quantile(0.5)
+        if median is None:
+            return []
+        deviations = self.deviations
+        if not deviations.count:
+            deviations = QuantileSketch()
+            deviations.extend(abs(abs(amount) - median) for amount in amounts)
+        mad = deviations.quantile(0.5)
+        if not mad:
+            return []
+        limit = median + self.threshold * mad / MAD_SCALE
+        return list(compress(range(len(amounts)), map(limit.__lt__, map(abs, amounts))))
+
+
+# Detector name -> (class, keyword arguments)
+DETECTORS = {
+    'zscore': (ZScoreDetector, {}),
+    'type': (ZScoreDetector, {'by': 'type'}),
+    'customer': (ZScoreDetector, {'by': 'customer'}),
+    'mad': (MADDetector, {}),
+}
+
+
+def make_detector(name='zscore', threshold=None):
+    """
+    Create an anomaly detector by name.
+
+    Args:
+        name (str): 'zscore' (all rows), 'type' or 'customer' (z-score within the
+            row's type or customer) or 'mad' (median/MAD).
+        threshold (float): Score above which a row is flagged, or None for the
+            detector's default (3 standard deviations, or 3.5 for 'mad').
+
+    Returns:
+        The detector.
+
+    Raises:
+        ValueError: If the name is unknown or the threshold is not positive.
+    """
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown anomaly detector '{name}'; choose from {', '.join(DETECTORS)}")
+    cls, kwargs = DETECTORS[name]
+    if threshold is not None:
+        if threshold <= 0:
+            raise ValueError(f"Anomaly threshold must be positive, got {threshold}")
+        kwargs = dict(kwargs, threshold=threshold)
+    return cls(**kwargs)
@@ -0,0 +1,176 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from compression import is_compressed
+from store import TransactionStore
+
+# Binary snapshot layout (little-endian, every section 8-byte aligned):
+#   header       magic, version, row count, description count, size and mtime of
+#                the CSV it was saved with, then the offset of each section below
+#   columns      transaction_ids (int64), dates (int32 ordinals), customer_ids (int64),
+#                amounts (int64 cents), types (uint8), description_codes (uint32)
+#   descriptions uint64 end offset of each description, then the UTF-8 text
+MAGIC = b'SFATXN01'
+VERSION = 2  # 2: amounts in integer cents instead of float64 dollars
+BINARY_SUFFIX = '.bin'
+
+_HEADER = struct.Struct('<8sIIQQQq8Q')
+_COLUMN_CODES = ('q', 'i', 'q', 'q', 'B', 'I')
+_COLUMN_WIDTHS = (8, 4, 8, 8, 1, 4)
+
+
+def binary_path(csv_path):
+    """Return the path of the binary snapshot saved next to `csv_path`."""
+    if is_compressed(csv_path):
+        return csv_path + BINARY_SUFFIX  # 'data.csv.gz' must not share 'data.csv''s snapshot
+    return os.path.splitext(csv_path)[0] + BINARY_SUFFIX
+
+
+def is_binary(filename):
+    """True if `filename` starts with the binary snapshot magic bytes."""
+    try:
+        with open(filename, 'rb') as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _source_stat(source):
+    """Size and mtime (ns) identifying the CSV a snapshot was written from."""
+    stat = os.stat(source)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def is_current(filename, source):
+    """
+    Check whether a binary snapshot still matches the CSV it was saved with.
+
+    Args:
+        filename (str): Path to the binary snapshot.
+        source (str): Path to the CSV.
+
+    Returns:
+        bool: True if both exist and the CSV's size and mtime are unchanged.
+    """
+    try:
+        with open(filename, 'rb') as file:
+            header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return False
+        magic, version, _, _, _, source_size, source_mtime, *_ = _HEADER.unpack(header)
+        return magic == MAGIC and version == VERSION and (source_size, source_mtime) == _source_stat(source)
+    except OSError:
+        return False
+
+
+# Helper function to pad a file to the next 8-byte boundary.
+def _align(file):
+    position = file.tell()
+    padding = -position % 8
+    if padding:
+        file.write(b'\0' * padding)
+    return position + padding
+
+
+def write_binary(store, filename, source=None):
+    """
+    Write a TransactionStore as a binary snapshot.
+
+    The file is written to a temporary name and moved into place, so a reader
+    never sees a half-written snapshot.
+
+    Args:
+        store (TransactionStore): Transactions to write.
+        filename (str): Destination path.
+        source (str): CSV holding the same transactions; its size and mtime are
+            recorded so load_transactions can tell whether the snapshot is current.
+    """
+    store.compact()  # Removed rows are not written
+    source_size, source_mtime = _source_stat(source) if source else (0, 0)
+    encoded = [description.encode('utf-8') for description in store.description_table]
+    ends = array('Q')
+    total = 0
+    for text in encoded:
+        total += len(text)
+        ends.append(total)
+
+    offsets = []
+    partial = f"{filename}.{os.getpid()}.part"
+    try:
+        with open(partial, 'wb') as file:
+            file.write(b'\0' * _HEADER.size)
+            for column in store._columns() + (ends,):
+                offsets.append(_align(file))
+                if sys.byteorder == 'big':
+                    column = array(column.format if isinstance(column, memoryview) else column.typecode, column)
+                    column.byteswap()
+                file.write(column)
+            offsets.append(_align(file))
+            for text in encoded:
+                file.write(text)
+            file.seek(0)
+            file.write(_HEADER.pack(MAGIC, VERSION, 0, len(store), len(encoded),
+                                    source_size, source_mtime, *offsets))
+        os.replace(partial, filename)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def read_binary(filename):
+    """
+    Open a binary snapshot as a TransactionStore without parsing rows.
+
+    The file is memory-mapped and the store's columns are views into the
+    mapping, so setup cost does not grow with the number of rows. Only the
+    description table is decoded. The columns are copied into arrays the first
+    time the store is modified.
+
+    Args:
+        filename (str): Path to the binary snapshot.
+
+    Returns:
+        TransactionStore: The transactions.
+
+    Raises:
+        ValueError: If the file is not a valid snapshot.
+    """
+    with open(filename, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size < _HEADER.size:
+            raise ValueError(f"'{filename}' is not a transaction snapshot")
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, _, rows, description_count, _, _, *offsets = _HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"'{filename}' is not a transaction snapshot")
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version} in '{filename}'")
+    lengths = [rows * width for width in _COLUMN_WIDTHS] + [description_count * 8]
+    if any(offset + length > size for offset, length in zip(offsets, lengths)):
+        raise ValueError(f"Snapshot '{filename}' is truncated")
+
+    view = memoryview(buffer)
+    columns = []
+    for code, offset, length in zip(_COLUMN_CODES, offsets, lengths):
+        column = view[offset:offset + length].cast(code)
+        if sys.byteorder == 'big':
+            column = array(code, column.tobytes())
+            column.byteswap()
+        columns.append(column)
+
+    ends = array('Q', view[offsets[6]:offsets[6] + lengths[6]].tobytes())
+    if sys.byteorder == 'big':
+        ends.byteswap()
+    text = buffer[offsets[7]:offsets[7] + (ends[-1] if ends else 0)]
+    if len(text) < (ends[-1] if ends else 0):
+        raise ValueError(f"Snapshot '{filename}' is truncated")
+    description_table = []
+    start = 0
+    for end in ends:
+        description_table.append(text[start:end].decode('utf-8'))
+        start = end
+
+    return TransactionStore.from_buffers(tuple(columns), description_table, buffer)
@@ -0,0 +1,113 @@
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import date
+
+
+class CustomerRegistry:
+    """
+    Distinct customer IDs with the date of each customer's latest transaction.
+
+    Kept in step with the store row by row, so the customer suggestions shown
+    by add and update cost O(k) instead of sorting every transaction. Each
+    customer's transaction dates are counted, so the latest date falls back
+    correctly when the row holding it is updated or removed. Only positive
+    customer IDs are registered.
+    """
+
+    def __init__(self):
+        self._dates = {}  # customer_id -> {date ordinal: rows}
+        self._latest = {}  # customer_id -> latest date ordinal
+        self._recent = []  # (-latest ordinal, customer_id), sorted: most recent first
+        self._ids = []  # Sorted customer IDs
+
+    @classmethod
+    def build(cls, customer_ids, dates, skip=None):
+        """
+        Register every row.
+
+        Args:
+            customer_ids: Customer ID column.
+            dates: Date ordinal column.
+            skip: Optional bytes-like with a true byte for each row to leave out.
+
+        Returns:
+            CustomerRegistry: The registry.
+        """
+        registry = cls()
+        pairs = zip(customer_ids, dates)
+        if skip is not None:
+            pairs = (pair for pair, skipped in zip(pairs, skip) if not skipped)
+        customers = registry._dates
+        for (customer_id, ordinal), count in Counter(pairs).items():
+            ordinals = customers.get(customer_id)
+            if ordinals is None:
+                if customer_id <= 0:
+                    continue
+                ordinals = customers[customer_id] = {}
+            ordinals[ordinal] = count
+        registry._latest = {customer_id: max(ordinals) for customer_id, ordinals in registry._dates.items()}
+        registry._recent = sorted((-ordinal, customer_id) for customer_id, ordinal in registry._latest.items())
+        registry._ids = sorted(registry._latest)
+        return registry
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, customer_id):
+        return customer_id in self._latest
+
+    def add(self, customer_id, ordinal):
+        """Register a row of `customer_id` dated `ordinal`."""
+        if customer_id <= 0:
+            return
+        ordinals = self._dates.get(customer_id)
+        if ordinals is None:
+            self._dates[customer_id] = {ordinal: 1}
+            self._latest[customer_id] = ordinal
+            insort(self._ids, customer_id)
+            insort(self._recent, (-ordinal, customer_id))
+            return
+        ordinals[ordinal] = ordinals.get(ordinal, 0) + 1
+        if ordinal > self._latest[customer_id]:
+            self._move(customer_id, ordinal)
+
+    def discard(self, customer_id, ordinal):
+        """Unregister a row of `customer_id` dated `ordinal`."""
+        ordinals = self._dates.get(customer_id)
+        count = None if ordinals is None else ordinals.get(ordinal)
+        if count is None:
+            return
+        if count > 1:
+            ordinals[ordinal] = count - 1
+            return
+        del ordinals[ordinal]
+        if not ordinals:
+            del self._dates[customer_id]
+            self._remove_recent(customer_id)
+            del self._latest[customer_id]
+            del self._ids[bisect_left(self._ids, customer_id)]
+        elif ordinal == self._latest[customer_id]:
+            self._move(customer_id, max(ordinals))
+
+    def recent(self, count):
+        """Return up to `count` customer IDs, most recent latest transaction first (ties by ID)."""
+        return [customer_id for _, customer_id in self._recent[:count]]
+
+    def sorted_ids(self, count=None):
+        """Return the customer IDs in ascending order, or the first `count` of them."""
+        return self._ids[:count] if count is not None else list(self._ids)
+
+    def latest(self, customer_id):
+        """Return the date of the customer's latest transaction, or None."""
+        ordinal = self._latest.get(customer_id)
+        return None if ordinal is None else date.fromordinal(ordinal)
+
+    # Helper method to change a customer's latest date.
+    def _move(self, customer_id, ordinal):
+        self._remove_recent(customer_id)
+        self._latest[customer_id] = ordinal
+        insort(self._recent, (-ordinal, customer_id))
+
+    # Helper method to remove a customer from the recency order.
+    def _remove_recent(self, customer_id):
+        del self._recent[bisect_left(self._recent, (-self._latest[customer_id], customer_id))]
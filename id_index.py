@@ -0,0 +1,201 @@
+from array import array
+
+# Fibonacci hashing of the ID's 64-bit pattern. Deterministic, so tables saved to
+# disk (see row_index.py) stay valid across runs.
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+def table_size(count):
+    """Smallest power-of-two table size keeping `count` entries at most half full (minimum 8)."""
+    size = 8
+    while size < 2 * count:
+        size *= 2
+    return size
+
+
+class IdIndex:
+    """
+    Hash index from transaction_id to slot, for O(1) lookups, inserts and removals.
+
+    An open-addressing table with linear probing: each entry is 1 + a slot in
+    `keys` (the ID column it indexes), 0 meaning empty, so the table is a
+    compact uint64 array (16 bytes per ID at most half full) instead of a dict
+    of Python ints. Removal shifts the following entries back instead of
+    leaving markers, so lookups never slow down after many deletions. Only the
+    first slot holding an ID is indexed; add() reports later duplicates.
+
+    Args:
+        keys: Sequence of IDs by slot (an array or memoryview), read on every probe.
+        table: Existing table to use (e.g. memory-mapped), or None for an empty one.
+        size (int): Number of slots for a new table; rounded by table_size().
+    """
+
+    def __init__(self, keys, table=None, size=0):
+        self.keys = keys
+        self.table = array('Q', bytes(8 * table_size(size))) if table is None else table
+        self._mask = len(self.table) - 1
+        self._shift = 64 - (len(self.table).bit_length() - 1)
+        self._count = 0 if table is None else None  # Counted on first use for an existing table
+
+    @classmethod
+    def build(cls, keys, skip=None):
+        """
+        Index every slot of `keys`.
+
+        Args:
+            keys: Sequence of IDs by slot.
+            skip: Optional bytes-like with a true byte for each slot to leave out.
+
+        Returns:
+            IdIndex: The index.
+        """
+        index = cls(keys, size=len(keys))
+        add = index.add
+        if skip is None:
+            for slot, key in enumerate(keys):
+                add(key, slot)
+        else:
+            for slot, key in enumerate(keys):
+                if not skip[slot]:
+                    add(key, slot)
+        return index
+
+    def __len__(self):
+        if self._count is None:
+            self._count = sum(1 for entry in self.table if entry)
+        return self._count
+
+    def find(self, key):
+        """Return the slot indexed for `key`, or None."""
+        table = self.table
+        keys = self.keys
+        try:
+            position = ((key * _HASH_MULTIPLIER) & _MASK_64) >> self._shift
+        except (TypeError, OverflowError):
+            return None  # Not an integer
+        while True:
+            entry = table[position]
+            if not entry:
+                return None
+            if keys[entry - 1] == key:
+                return entry - 1
+            position = (position + 1) & self._mask
+
+    def add(self, key, slot):
+        """
+        Index `slot` (whose ID in `keys` is `key`).
+
+        Returns:
+            bool: False if `key` is already indexed at another slot, which is kept.
+        """
+        if 2 * (len(self) + 1) > len(self.table):
+            self._resize(2 * len(self.table))
+        table = self.table
+        keys = self.keys
+        position = ((key * _HASH_MULTIPLIER) & _MASK_64) >> self._shift
+        while True:
+            entry = table[position]
+            if not entry:
+                table[position] = slot + 1
+                self._count += 1
+                return True
+            if keys[entry - 1] == key:
+                return entry - 1 == slot
+            position = (position + 1) & self._mask
+
+    def discard(self, key, slot):
+        """Remove `key` if it is indexed at `slot`; return True if it was."""
+        table = self.table
+        keys = self.keys
+        mask = self._mask
+        position = ((key * _HASH_MULTIPLIER) & _MASK_64) >> self._shift
+        while True:
+            entry = table[position]
+            if not entry:
+                return False
+            if keys[entry - 1] == key:
+                break
+            position = (position + 1) & mask
+        if entry - 1 != slot:
+            return False
+
+        # Shift later entries of the probe run back into the gap
+        gap = position
+        while True:
+            position = (position + 1) & mask
+            entry = table[position]
+            if not entry:
+                break
+            home = ((keys[entry - 1] * _HASH_MULTIPLIER) & _MASK_64) >> self._shift
+            # The entry may move into the gap unless its home lies cyclically in (gap, position]
+            if (gap < position and not gap < home <= position) or (gap > position and position < home <= gap):
+                table[gap] = entry
+                gap = position
+        table[gap] = 0
+        if self._count is not None:
+            self._count -= 1
+        return True
+
+    def reserve(self, count):
+        """Grow the table once, so `count` more entries can be added without resizing."""
+        size = table_size(len(self) + count)
+        if size > len(self.table):
+            self._resize(size)
+
+    def _resize(self, size):
+        entries = [entry for entry in self.table if entry]
+        table = self.table = array('Q', bytes(8 * size))
+        mask = self._mask = size - 1
+        shift = self._shift = 64 - (size.bit_length() - 1)
+        keys = self.keys
+        # Entries are distinct, so each goes in the first free position without comparing IDs
+        for entry in entries:
+            position = ((keys[entry - 1] * _HASH_MULTIPLIER) & _MASK_64) >> shift
+            while table[position]:
+                position = (position + 1) & mask
+            table[position] = entry
+        self._count = len(entries)
+
+
+class IdAllocator:
+    """
+    Hands out new transaction IDs above every ID seen so far.
+
+    Seeded once with the largest existing ID, then told of every ID added
+    later (loaded, merged or edited), so allocation never scans the rows and
+    never returns an ID in use. IDs are not reused after a removal, and IDs
+    reserved but left unused are skipped.
+
+    Args:
+        highest (int): Largest ID in use (0 for none).
+    """
+
+    def __init__(self, highest=0):
+        self.highest = max(highest, 0)
+
+    def observe(self, transaction_id):
+        """Note an ID added to the store."""
+        if transaction_id > self.highest:
+            self.highest = transaction_id
+
+    def allocate(self):
+        """Return a new ID."""
+        self.highest += 1
+        return self.highest
+
+    def reserve(self, count):
+        """
+        Reserve a block of new IDs, for bulk inserts.
+
+        Args:
+            count (int): Number of IDs.
+
+        Returns:
+            range: `count` consecutive unused IDs.
+        """
+        if count < 0:
+            raise ValueError("Cannot reserve a negative number of IDs")
+        start = self.highest + 1
+        self.highest += count
+        return range(start, start + count)
@@ -1,5 +1,10 @@
+import os
+from datetime import datetime
 from utils import FinanceUtils
 
+# Rows rejected by the last load, kept for fixing and reloading
+QUARANTINE_FILE = os.path.join('logs', 'rejected_rows.csv')
+
 def main():
     """Main program for Smart Finance Analyzer."""
     finance = FinanceUtils()
@@ -25,7 +30,21 @@ def main():
         choice = input("Select an option: ")
 
         if choice == '1':
-            if finance.load_transactions():
+            if finance.transactions:
+                mode = input("Enter 'new' to load only appended rows, 'follow' to keep loading them, 'merge' to add another file, or press Enter for a full reload: ").strip().lower()
+            else:
+                mode = input("Enter 'lazy' to read rows only when shown, or press Enter to load all rows: ").strip().lower()
+            if mode == 'merge':
+                merge_file = input("Enter the CSV file to merge: ").strip()
+                on_conflict = input("For IDs already loaded, enter 'overwrite', 'reassign', or press Enter to skip them: ").strip().lower() or 'skip'
+                if finance.merge_transactions(merge_file, on_conflict, quarantine=QUARANTINE_FILE):
+                    print(f"{green}Transactions merged. Save to persist changes.{reset}")
+                else:
+                    print(f"{red}Failed to merge transactions.{reset}")
+            elif mode == 'follow':
+                if not finance.follow_transactions(quarantine=QUARANTINE_FILE):
+                    print(f"{red}Failed to load transactions.{reset}")
+            elif finance.load_transactions(incremental=mode == 'new', quarantine=QUARANTINE_FILE, lazy=mode == 'lazy'):
                 print(f"{green}Transactions loaded successfully.{reset}")
             else:
                 print(f"{red}Failed to load transactions.{reset}")
@@ -35,14 +54,17 @@ def main():
             else:
                 print(f"Transaction not added.")
         elif choice == '3':
-            if finance.transactions:
+            if finance.transactions or finance.is_lazy:
                 filter_type = input("Enter type to filter (credit/debit/transfer, or press Enter for all): ").strip()
                 if not filter_type:
                     filter_type = None
                 filter_year = input("Enter year to filter (e.g., 2020, or press Enter for all): ").strip()
                 if not filter_year:
                     filter_year = None
-                if not finance.view_transactions(filter_type, filter_year):
+                filter_customer = input("Enter customer ID to filter (or press Enter for all): ").strip()
+                if not filter_customer:
+                    filter_customer = None
+                if not finance.view_transactions(filter_type, filter_year, filter_customer):
                     print("No transactions displayed.")
             else:
                 print("No transactions loaded. Please load transactions first.")
@@ -57,17 +79,45 @@ def main():
             else:
                 print("Transaction not deleted.")
         elif choice == '6':
-            if finance.analyze_transactions():
+            source = None
+            if not finance.transactions and not finance.is_lazy:
+                source = input("No transactions loaded. Enter a CSV file to analyze without loading it (or press Enter to cancel): ").strip()
+                if not source:
+                    continue
+            period = input("Enter a date range as YYYY-MM-DD YYYY-MM-DD (or press Enter for all transactions): ").split()
+            try:
+                start, end = (datetime.strptime(day, '%Y-%m-%d').date() for day in period) if period else (None, None)
+            except ValueError:
+                print(f"{red}Invalid date range '{' '.join(period)}'. Using all transactions.{reset}")
+                start, end = None, None
+            if finance.analyze_transactions(start, end, windows=(30, 90), source=source):
                 print(f"{green}Analysis complete.{reset}")
             else:
                 print(f"{red}Analysis failed.{reset}")
         elif choice == '7':
-            if finance.save_transactions():
+            if finance.save_transactions(binary=True):
                 print(f"{green}Transactions saved successfully.{reset}")
             else:
                 print(f"{red}Failed to save transactions.{reset}")
         elif choice == '8':
-            if finance.generate_report():
+            source = None
+            if not finance.transactions and not finance.is_lazy:
+                source = input("No transactions loaded. Enter a CSV file to report on without loading it (or press Enter to cancel): ").strip()
+                if not source:
+                    continue
+            detector = input("Enter anomaly detector ('type' or 'customer' for z-scores within each, 'mad' for median/MAD), or press Enter for z-scores over all rows: ").strip().lower() or 'zscore'
+            threshold = input("Enter anomaly threshold (or press Enter for the default): ").strip()
+            try:
+                threshold = float(threshold) if threshold else None
+            except ValueError:
+                print(f"{red}Invalid threshold '{threshold}'. Using the default.{reset}")
+                threshold = None
+            top = input("Enter number of top customers to rank (or press Enter for 5): ").strip()
+            if not top.isdigit():
+                if top:
+                    print(f"{red}Invalid number '{top}'. Using 5.{reset}")
+                top = '5'
+            if finance.generate_report(anomaly_detector=detector, anomaly_threshold=threshold, top_customers=int(top), source=source):
                 print(f"{green}Report generated successfully.{reset}")
             else:
                 print(f"{red}Failed to generate report.{reset}")
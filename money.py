@@ -0,0 +1,84 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+
+# Amounts are kept as whole cents in 64-bit integers
+CENTS_MAX = 2 ** 63 - 1
+
+_CENT = Decimal('0.01')
+
+
+def parse_cents(text):
+    """
+    Parse a decimal amount exactly into whole cents.
+
+    Plain amounts ('12', '12.5', '.75', '-3.10') are converted with integer
+    arithmetic only. Anything else that is a finite decimal number ('1e3',
+    '2.675') goes through Decimal and is rounded half to even to the cent,
+    so no amount passes through a binary float.
+
+    Args:
+        text (str): The amount, in dollars.
+
+    Returns:
+        int: The amount in cents.
+
+    Raises:
+        ValueError: If `text` is not a finite number or does not fit in 64 bits as cents.
+    """
+    negative, cents = split_cents(text)
+    return -cents if negative else cents
+
+
+def split_cents(text):
+    """
+    Parse a decimal amount as parse_cents() does, keeping its sign apart.
+
+    The sign is taken from the exact value, before rounding, so an amount
+    such as '-0.001' is still negative although it rounds to zero cents.
+
+    Returns:
+        tuple: (negative, cents): whether the amount is below zero, and its
+        magnitude in whole cents.
+
+    Raises:
+        ValueError: If `text` is not a finite number or does not fit in 64 bits as cents.
+    """
+    text = text.strip()
+    negative = text[:1] == '-'
+    digits = text[1:] if text[:1] in ('-', '+') else text
+    whole, point, fraction = digits.partition('.')
+    if ((whole.isdigit() or (point and not whole)) and len(fraction) <= 2
+            and (fraction.isdigit() or not fraction) and (whole or fraction)):
+        cents = int(whole or 0) * 100 + int(fraction.ljust(2, '0') or 0)
+        negative = negative and cents > 0
+    else:
+        if digits[:1].isspace():
+            raise ValueError(f"Invalid amount '{text}'")  # '- 5': Decimal would skip the space, float() never did
+        try:
+            value = Decimal(digits)
+        except InvalidOperation:
+            raise ValueError(f"Invalid amount '{text}'") from None
+        if not value.is_finite() or text[:1] in ('-', '+') and digits[:1] in ('-', '+'):
+            raise ValueError(f"Invalid amount '{text}'")
+        cents = int(value.quantize(_CENT, rounding=ROUND_HALF_EVEN) * 100)
+        negative = negative and value != 0
+    if cents > CENTS_MAX:
+        raise ValueError(f"Amount '{text}' is too large")
+    return negative, cents
+
+
+def format_cents(cents):
+    """Format cents as a plain decimal amount in dollars, e.g. -1050 -> '-10.50'."""
+    whole, fraction = divmod(abs(cents), 100)
+    return f"{'-' if cents < 0 else ''}{whole}.{fraction:02d}"
+
+
+def to_cents(amount):
+    """Return a dollar amount given as a number (e.g. a float from an edit) in whole cents."""
+    if isinstance(amount, int):
+        return amount * 100
+    return round(amount * 100)
+
+
+def to_dollars(cents):
+    """Return cents as a float amount in dollars, for display and the row-level API."""
+    return cents / 100
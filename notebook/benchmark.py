@@ -0,0 +1,809 @@
+"""
+Benchmarks for FinanceUtils.
+
+Usage (from the project root):
+    python notebook/benchmark.py load --rows 1000000
+
+Each variant runs in its own subprocess so that peak RSS is measured per variant.
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+from itertools import compress
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DESCRIPTIONS = {
+    'debit': ['Grocery shopping for family meals', 'Electricity bill for the household', 'Gas for driving to town'],
+    'credit': ['Hospital paycheck for medical coding', 'Tax refund from previous year', 'Sold chicken eggs at local market'],
+    'transfer': ['Moved funds to household savings', 'Sent funds to investment account', 'Split cost of family dinner out']
+}
+
+
+def generate_csv(filename, rows, seed=42, first_id=1):
+    """Write `rows` random transactions with IDs from `first_id` to `filename` (no Faker dependency)."""
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    with open(filename, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['transaction_id', 'date', 'customer_id', 'amount', 'type', 'description'])
+        for i in range(first_id, first_id + rows):
+            transaction_type = rng.choice(['debit', 'credit', 'transfer'])
+            writer.writerow([
+                i,
+                (start + timedelta(days=rng.randrange(1827))).strftime('%Y-%m-%d'),
+                rng.randint(101, 999),
+                round(rng.uniform(5, 950), 2),
+                transaction_type,
+                rng.choice(DESCRIPTIONS[transaction_type])
+            ])
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+
+
+def legacy_load(filename):
+    """Reproduce the original three-read loader: count rows, parse, then read() for the backup."""
+    with open(filename, mode='r', encoding='utf-8') as file:
+        total_rows = sum(1 for _ in file) - 1
+    transactions = []
+    seen_ids = set()
+    with open(filename, mode='r', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            transaction_id = int(row['transaction_id'])
+            if transaction_id in seen_ids:
+                continue
+            seen_ids.add(transaction_id)
+            date_obj = datetime.strptime(row['date'].strip(), '%Y-%m-%d').date()
+            amount = float(row['amount'])
+            transaction_type = row['type'].strip().lower()
+            transactions.append({
+                'transaction_id': transaction_id,
+                'date': date_obj,
+                'customer_id': int(row['customer_id']),
+                'amount': -amount if transaction_type == 'debit' else amount,
+                'type': transaction_type,
+                'description': row['description'].strip()
+            })
+    os.makedirs('snapshots', exist_ok=True)
+    with open(filename, 'rb') as src_file, open(os.path.join('snapshots', 'backup_legacy.csv'), 'wb') as dst_file:
+        dst_file.write(src_file.read())
+    return total_rows, transactions
+
+
+def current_load(filename, workers=None):
+    """Load through FinanceUtils.load_transactions."""
+    from utils import FinanceUtils
+    finance = FinanceUtils()
+    with redirect_stdout(io.StringIO()):
+        finance.load_transactions(filename, workers=workers)
+    return finance.transactions
+
+
+def run_variant(variant, filename):
+    """Child process entry point: time one loader variant and report wall-clock and peak RSS."""
+    os.makedirs('logs', exist_ok=True)
+    start = time.perf_counter()
+    if variant == 'legacy':
+        legacy_load(filename)
+    elif variant.startswith('parallel'):
+        current_load(filename, workers=int(variant.split('-')[1]))
+    elif variant.startswith('report'):
+        from utils import FinanceUtils
+        finance = FinanceUtils()
+        with redirect_stdout(io.StringIO()):
+            if variant == 'report-streamed':
+                finance.generate_report(source=filename)
+            else:
+                finance.load_transactions(filename)
+                finance.generate_report()
+    else:
+        current_load(filename)
+    elapsed = time.perf_counter() - start
+    print(f"{variant}\t{elapsed:.3f}\t{peak_rss_mb():.1f}")
+
+
+def bench_load(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'bench_transactions.csv')
+        generate_csv(filename, args.rows)
+        size_mb = os.path.getsize(filename) / (1024 * 1024)
+        print(f"Loading {args.rows:,} rows ({size_mb:,.1f} MB)")
+        print(f"{'variant':<12}{'seconds':>10}{'peak RSS (MB)':>16}")
+        variants = ['legacy', 'current'] + [f'parallel-{workers}' for workers in args.workers]
+        for variant in variants:
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '_run', variant, filename],
+                cwd=workdir, capture_output=True, text=True, check=True
+            )
+            name, seconds, rss = result.stdout.strip().splitlines()[-1].split('\t')
+            print(f"{name:<12}{float(seconds):>10.3f}{float(rss):>16.1f}")
+
+
+def bench_store(args):
+    from itertools import compress
+    from money import to_cents
+    from store import TransactionStore, TYPE_CODES
+    rng = random.Random(42)
+    start = date(2020, 1, 1).toordinal()
+    types = ['credit', 'debit', 'transfer']
+    descriptions = [d for values in DESCRIPTIONS.values() for d in values]
+
+    tracemalloc.start()
+    rows = []
+    for i in range(1, args.rows + 1):
+        transaction_type = rng.choice(types)
+        amount = round(rng.uniform(5, 950), 2)
+        rows.append({
+            'transaction_id': i,
+            'date': date.fromordinal(start + rng.randrange(1827)),
+            'customer_id': rng.randint(101, 999),
+            'amount': -amount if transaction_type == 'debit' else amount,
+            'type': transaction_type,
+            # Copy so each row owns its string, as rows parsed from a CSV do
+            'description': ''.join(rng.choice(descriptions))
+        })
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    store = TransactionStore()
+    for row in rows:
+        store.append_values(row['transaction_id'], row['date'].toordinal(), row['customer_id'],
+                            to_cents(row['amount']), TYPE_CODES[row['type']], row['description'])
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    dict_total = sum(abs(t['amount']) for t in rows if t['type'] == 'debit')
+    dict_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    store_total = sum(map(abs, compress(store.cents, store.type_mask('debit'))))
+    store_seconds = time.perf_counter() - started
+    assert round(dict_total * 100) == store_total
+
+    print(f"{args.rows:,} transactions")
+    print(f"{'layout':<16}{'bytes/row':>12}{'debit scan (s)':>16}")
+    print(f"{'list of dicts':<16}{dict_bytes / args.rows:>12.1f}{dict_seconds:>16.4f}")
+    print(f"{'columnar store':<16}{store_bytes / args.rows:>12.1f}{store_seconds:>16.4f}")
+
+
+def bench_edits(args):
+    from store import TransactionStore
+    rng = random.Random(42)
+    start = date(2020, 1, 1).toordinal()
+
+    def build():
+        store = TransactionStore()
+        for i in range(1, args.rows + 1):
+            store.append_values(i, start + i % 1827, 101 + i % 899, i % 950 * 100, i % 3, 'Row')
+        return store
+
+    # Half updates, half deletes, of distinct random IDs
+    ids = rng.sample(range(1, args.rows + 1), args.edits)
+    store = build()
+    started = time.perf_counter()
+    store.find(0)  # Builds the index
+    index_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for n, transaction_id in enumerate(ids):
+        row = store.get(transaction_id)
+        if n % 2:
+            store.remove(row)
+        else:
+            row['amount'] = 1.0
+    edit_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    store.compact()
+    compact_seconds = time.perf_counter() - started
+    assert len(store) == args.rows - args.edits // 2
+
+    # The previous store: linear ID scan and a column shift per delete; timed on a sample
+    sample = ids[:args.legacy_edits]
+    store = build()
+    columns = store._columns()
+    started = time.perf_counter()
+    for n, transaction_id in enumerate(sample):
+        slot = columns[0].index(transaction_id)
+        if n % 2:
+            for column in columns:
+                del column[slot]
+        else:
+            columns[3][slot] = 100
+    legacy_seconds = (time.perf_counter() - started) * len(ids) / len(sample)
+
+    print(f"{args.rows:,} transactions, {args.edits:,} random edits (half updates, half deletes)")
+    print(f"{'store':<28}{'seconds':>10}{'us/edit':>10}")
+    print(f"{'linear scan (extrapolated)':<28}{legacy_seconds:>10.3f}{legacy_seconds / len(ids) * 1e6:>10.1f}")
+    print(f"{'build ID index (once)':<28}{index_seconds:>10.3f}")
+    print(f"{'ID index + tombstones':<28}{edit_seconds:>10.3f}{edit_seconds / len(ids) * 1e6:>10.1f}")
+    print(f"{'  then one compaction':<28}{compact_seconds:>10.3f}")
+
+
+def bench_filters(args):
+    from store import TransactionStore
+    rng = random.Random(42)
+    start = date(2020, 1, 1).toordinal()
+    store = TransactionStore()
+    chunk = 1000000
+    for first in range(0, args.rows, chunk):
+        count = min(chunk, args.rows - first)
+        store.extend_columns(range(first + 1, first + count + 1),
+                             array('i', (start + rng.randrange(1827) for _ in range(count))),
+                             array('q', (rng.randint(101, 999) for _ in range(count))),
+                             array('q', bytes(8 * count)),
+                             bytes(rng.randrange(3) for _ in range(count)),
+                             array('I', bytes(4 * count)))
+
+    def scan(year, customer_id):
+        # The previous view filter: type mask, then a date range check per row
+        first_day, last_day = date(year, 1, 1).toordinal(), date(year, 12, 31).toordinal()
+        dates, customers = store.dates, store.customer_ids
+        slots = compress(range(len(store)), store.type_mask('debit'))
+        return [slot for slot in slots if first_day <= dates[slot] <= last_day
+                and (customer_id is None or customers[slot] == customer_id)]
+
+    started = time.perf_counter()
+    store.select('debit')
+    build_seconds = time.perf_counter() - started
+
+    print(f"{args.rows:,} transactions; building the indexes took {build_seconds:.2f} s (once)")
+    print(f"{'filter':<32}{'matches':>10}{'scan (s)':>10}{'index (ms)':>12}{'last page (ms)':>16}")
+    for label, year, customer_id in [('debit, 2022', 2022, None), ('debit, 2022, customer 500', 2022, 500)]:
+        started = time.perf_counter()
+        expected = scan(year, customer_id)
+        scan_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        selection = store.select('debit', year, customer_id=customer_id)
+        page = [store.row(slot)['transaction_id'] for slot in selection[:10]]
+        index_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        last = selection[len(selection) - 10:]
+        last_ms = (time.perf_counter() - started) * 1000
+        assert len(selection) == len(expected) and last == expected[-10:]
+        assert page == [store.row(slot)['transaction_id'] for slot in expected[:10]]
+        print(f"{label:<32}{len(selection):>10,}{scan_seconds:>10.3f}{index_ms:>12.2f}{last_ms:>16.2f}")
+
+
+def bench_bulk(args):
+    from store import TransactionStore
+    rng = random.Random(42)
+    start = date(2020, 1, 1).toordinal()
+    store = TransactionStore()
+    chunk = 1000000
+    for first in range(0, args.rows, chunk):
+        count = min(chunk, args.rows - first)
+        store.extend_columns(range(first + 1, first + count + 1),
+                             array('i', (start + rng.randrange(1827) for _ in range(count))),
+                             array('q', (rng.randint(101, 999) for _ in range(count))),
+                             array('q', bytes(8 * count)),
+                             bytes(rng.randrange(3) for _ in range(count)),
+                             array('I', bytes(4 * count)))
+    print(f"{args.rows:,} transactions")
+    print(f"{'operation':<44}{'rows':>12}{'seconds':>10}")
+
+    started = time.perf_counter()
+    slots = store.match('debit', year=2021)
+    store.update_slots(slots, transaction_type='credit')
+    print(f"{'re-type debits of 2021':<44}{len(slots):>12,}{time.perf_counter() - started:>10.3f}")
+
+    started = time.perf_counter()
+    slots = store.match('transfer', end=date(2021, 6, 30))
+    removed = store.remove_slots(slots)
+    print(f"{'delete transfers before July 2021':<44}{removed:>12,}{time.perf_counter() - started:>10.3f}")
+
+
+def bench_customers(args):
+    from store import TransactionStore
+    rng = random.Random(42)
+    start = date(2020, 1, 1).toordinal()
+    store = TransactionStore()
+    store.extend_columns(range(1, args.rows + 1),
+                         array('i', (start + rng.randrange(1827) for _ in range(args.rows))),
+                         array('q', (rng.randint(1, args.customers) for _ in range(args.rows))),
+                         array('q', bytes(8 * args.rows)), bytes(args.rows), array('I', bytes(4 * args.rows)))
+
+    def scan():
+        # The previous suggestions: sort every row by date, then collect distinct IDs
+        recent_slots = sorted(range(len(store)), key=store.dates.__getitem__, reverse=True)
+        seen, recent = set(), []
+        for slot in recent_slots:
+            cid = store.customer_ids[slot]
+            if cid not in seen:
+                recent.append(cid)
+                seen.add(cid)
+                if len(recent) >= 10:
+                    break
+        return recent, sorted(set(store.customer_ids))[:10]
+
+    started = time.perf_counter()
+    scan()
+    scan_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    customers = store.customers()
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for i in range(args.edits):
+        store.append_values(args.rows + i + 1, start + rng.randrange(1900), rng.randint(1, args.customers), 100, 0, 0)
+        customers.recent(10)
+        customers.sorted_ids(10)
+    registry_ms = (time.perf_counter() - started) * 1000 / args.edits
+    print(f"{args.rows:,} transactions, {len(customers):,} customers")
+    print(f"sort-based suggestions: {scan_seconds:.3f} s per prompt")
+    print(f"registry: built in {build_seconds:.3f} s (once), then {registry_ms:.3f} ms per add and prompt")
+
+
+def strptime_validate(row):
+    """The original per-row validation on a csv.DictReader row, with strptime for the date."""
+    transaction_id = int(row['transaction_id'])
+    date_obj = datetime.strptime(row['date'].strip(), '%Y-%m-%d').date()
+    customer_id = int(row['customer_id'])
+    if customer_id <= 0:
+        return None
+    amount = float(row['amount'])
+    if amount < 0:
+        return None
+    transaction_type = row['type'].strip().lower()
+    if transaction_type not in {'credit', 'debit', 'transfer'}:
+        return None
+    description = str(row.get('description')).strip()
+    return transaction_id, date_obj, customer_id, amount, transaction_type, description
+
+
+def bench_validate(args):
+    from parsing import column_positions, compile_validator
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'bench_transactions.csv')
+        generate_csv(filename, args.rows)
+        with open(filename, encoding='utf-8', newline='') as file:
+            records = list(csv.reader(file))
+    header, records = records[0], records[1:]
+    rows = [dict(zip(header, fields)) for fields in records]
+
+    started = time.perf_counter()
+    for row in rows:
+        strptime_validate(row)
+    strptime_seconds = time.perf_counter() - started
+
+    positions, _ = column_positions(header)
+    validate = compile_validator(positions)
+    started = time.perf_counter()
+    for fields in records:
+        validate(fields)
+    fast_seconds = time.perf_counter() - started
+
+    print(f"Validating {args.rows:,} rows")
+    print(f"{'path':<20}{'rows/sec':>14}")
+    print(f"{'strptime (dict row)':<20}{args.rows / strptime_seconds:>14,.0f}")
+    print(f"{'compiled validator':<20}{args.rows / fast_seconds:>14,.0f}")
+
+
+def bench_snapshot(args):
+    from binary_store import binary_path, read_binary, write_binary
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'bench_transactions.csv')
+        generate_csv(filename, args.rows)
+        os.makedirs(os.path.join(workdir, 'logs'))
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            started = time.perf_counter()
+            store = current_load(filename)
+            csv_seconds = time.perf_counter() - started
+            snapshot = binary_path(filename)
+            write_binary(store, snapshot, source=filename)
+
+            started = time.perf_counter()
+            mapped = read_binary(snapshot)
+            open_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            total = sum(mapped.cents)
+            scan_seconds = time.perf_counter() - started
+            assert total == sum(store.cents)
+        finally:
+            os.chdir(cwd)
+
+        print(f"{args.rows:,} transactions ({os.path.getsize(snapshot) / (1024 * 1024):,.1f} MB snapshot)")
+        print(f"{'step':<24}{'seconds':>10}")
+        print(f"{'parse CSV':<24}{csv_seconds:>10.4f}")
+        print(f"{'open snapshot (mmap)':<24}{open_seconds:>10.4f}")
+        print(f"{'first scan of amounts':<24}{scan_seconds:>10.4f}")
+
+
+def bench_rejects(args):
+    from utils import FinanceUtils
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'bench_transactions.csv')
+        generate_csv(filename, args.rows)
+        # Make every other row invalid with a negative amount
+        with open(filename, encoding='utf-8') as file:
+            lines = file.readlines()
+        for i in range(1, len(lines), 2):
+            fields = lines[i].split(',')
+            fields[3] = '-' + fields[3]
+            lines[i] = ','.join(fields)
+        with open(filename, 'w', encoding='utf-8') as file:
+            file.writelines(lines)
+
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        os.makedirs('logs')
+        try:
+            print(f"Loading {args.rows:,} rows, {args.rows // 2:,} of them invalid")
+            print(f"{'reporting':<28}{'seconds':>10}{'errors.txt (MB)':>18}")
+            for label, options in [('every row logged', {'error_examples': None}),
+                                   ('examples + summary', {}),
+                                   ('examples + quarantine', {'quarantine': 'rejected.csv'})]:
+                finance = FinanceUtils()
+                open(os.path.join('logs', 'errors.txt'), 'w').close()
+                started = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    finance.load_transactions(filename, **options)
+                seconds = time.perf_counter() - started
+                size_mb = os.path.getsize(os.path.join('logs', 'errors.txt')) / (1024 * 1024)
+                print(f"{label:<28}{seconds:>10.3f}{size_mb:>18.2f}")
+                finance.logger.removeHandler(finance.error_handler)
+                finance.logger.removeHandler(finance.activity_handler)
+                finance.error_handler.close()
+                finance.activity_handler.close()
+        finally:
+            os.chdir(cwd)
+
+
+def bench_lazy(args):
+    from row_index import LazyTransactions, RowIndex
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'bench_transactions.csv')
+        generate_csv(filename, args.rows)
+        os.makedirs(os.path.join(workdir, 'logs'))
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            started = time.perf_counter()
+            current_load(filename)
+            load_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            RowIndex.open(filename)
+            build_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            lazy = LazyTransactions(RowIndex.open(filename))
+            open_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            page, _ = lazy.page_after(len(lazy) // 2, 10)
+            page_seconds = time.perf_counter() - started
+            ids = random.Random(7).sample(range(1, args.rows + 1), 1000)
+            started = time.perf_counter()
+            found = sum(1 for transaction_id in ids if lazy.get(transaction_id))
+            lookup_seconds = (time.perf_counter() - started) / len(ids)
+            assert len(page) == 10 and found == len(ids)
+        finally:
+            os.chdir(cwd)
+
+        print(f"{args.rows:,} transactions")
+        print(f"{'step':<28}{'seconds':>10}")
+        print(f"{'full load':<28}{load_seconds:>10.4f}")
+        print(f"{'build row index':<28}{build_seconds:>10.4f}")
+        print(f"{'reopen saved index (mmap)':<28}{open_seconds:>10.4f}")
+        print(f"{'page of 10 mid-file':<28}{page_seconds:>10.4f}")
+        print(f"{'lookup by ID (mean)':<28}{lookup_seconds:>10.6f}")
+
+
+def bench_merge(args):
+    from utils import FinanceUtils
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'bench_transactions.csv')
+        delta = os.path.join(workdir, 'bench_delta.csv')
+        generate_csv(filename, args.rows)
+        conflicts = args.delta // 10
+        generate_csv(delta, args.delta, seed=7, first_id=args.rows - conflicts + 1)
+        os.makedirs(os.path.join(workdir, 'logs'))
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            print(f"{args.rows:,} loaded transactions; delta of {args.delta:,} rows, {conflicts:,} with loaded IDs")
+            print(f"{'on_conflict':<14}{'seconds':>10}{'rows/s':>12}")
+            for on_conflict in ('skip', 'overwrite', 'reassign'):
+                finance = FinanceUtils()
+                with redirect_stdout(io.StringIO()):
+                    finance.load_transactions(filename)
+                    started = time.perf_counter()
+                    finance.merge_transactions(delta, on_conflict, workers=args.workers)
+                    seconds = time.perf_counter() - started
+                print(f"{on_conflict:<14}{seconds:>10.3f}{args.delta / seconds:>12,.0f}")
+        finally:
+            os.chdir(cwd)
+
+
+def bench_report(args):
+    from utils import FinanceUtils
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'bench_transactions.csv')
+        generate_csv(filename, args.rows)
+        os.makedirs(os.path.join(workdir, 'logs'))
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            finance = FinanceUtils()
+            with redirect_stdout(io.StringIO()):
+                finance.load_transactions(filename)
+            print(f"{args.rows:,} transactions, '{args.detector}' anomaly detector")
+            print(f"{'workers':<10}{'seconds':>10}{'rows/s':>12}")
+            for workers in sorted({1, *args.workers}):
+                with redirect_stdout(io.StringIO()):
+                    started = time.perf_counter()
+                    finance.generate_report(workers=workers, anomaly_detector=args.detector)
+                    seconds = time.perf_counter() - started
+                print(f"{workers:<10}{seconds:>10.3f}{args.rows / seconds:>12,.0f}")
+        finally:
+            os.chdir(cwd)
+
+
+def bench_rollup(args):
+    from report_stats import ReportStats
+    from rollup import RollupCube, rollup_path
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'bench_transactions.csv')
+        generate_csv(filename, args.rows)
+        os.makedirs(os.path.join(workdir, 'logs'))
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            store = current_load(filename)
+            columns = (store.dates, store.types, store.cents, store.customer_ids)
+            timings = []
+
+            def timed(step, func):
+                started = time.perf_counter()
+                result = func()
+                timings.append((step, time.perf_counter() - started))
+                return result
+
+            timed('report totals from rows', lambda: ReportStats().add(*columns))
+            timed('build cube', lambda: RollupCube.build(*columns))
+            cube = store.rollups()
+            path = rollup_path(filename)
+            source = {'size': 0, 'mtime': 0, 'offset': None, 'fingerprint': None, 'inode': (0, 0)}
+            timed('write cube', lambda: cube.write(path, source, len(store)))
+            timed('read cube', lambda: RollupCube.read(path))
+            timed('report totals from cube', lambda: ReportStats().add_cube(cube))
+            last = max(store.dates)
+            slots = [slot for slot, ordinal in enumerate(store.dates) if ordinal > last - 28][:args.edits]
+            timed(f'update {len(slots)} rows in cube', lambda: store.update_slots(slots, amount=1.0))
+        finally:
+            os.chdir(cwd)
+
+        print(f"{args.rows:,} transactions, {sum(map(len, cube.partitions.values())):,} cells in "
+              f"{len(cube.partitions)} months ({os.path.getsize(path) / (1024 * 1024):,.1f} MB cube)")
+        print(f"{'step':<28}{'seconds':>10}")
+        for step, seconds in timings:
+            print(f"{step:<28}{seconds:>10.4f}")
+
+
+def bench_ranges(args):
+    from store import TransactionStore
+    rng = random.Random(23)
+    store = TransactionStore()
+    first = date(2019, 1, 1).toordinal()
+    store.extend_columns(range(1, args.rows + 1), (first + rng.randrange(1826) for _ in range(args.rows)),
+                         (rng.randrange(1, 1000) for _ in range(args.rows)),
+                         (rng.randrange(100, 100001) for _ in range(args.rows)),  # Cents
+                         (rng.randrange(3) for _ in range(args.rows)), [0] * args.rows)
+    ranges = []
+    for _ in range(args.queries):
+        start = date.fromordinal(first + rng.randrange(1826))
+        ranges.append((start, start + timedelta(days=rng.choice((30, 90, 365)))))
+
+    started = time.perf_counter()
+    scanned = [sum(abs(store.cents[slot]) for slot in store.match(start=start, end=end)) for start, end in ranges[:10]]
+    scan_seconds = (time.perf_counter() - started) / 10
+    started = time.perf_counter()
+    index = store.time_index()
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for start, end in ranges:
+        index.summary(start, end)
+    query_seconds = (time.perf_counter() - started) / len(ranges)
+    for (start, end), total in zip(ranges, scanned):
+        summary = index.summary(start, end)
+        assert round((summary['credits'] + summary['debits'] + summary['transfers']) * 100) == total
+
+    print(f"{args.rows:,} transactions, {args.queries:,} random 30/90/365-day ranges")
+    print(f"{'step':<28}{'seconds':>12}")
+    print(f"{'scan one range':<28}{scan_seconds:>12.6f}")
+    print(f"{'build time index':<28}{build_seconds:>12.6f}")
+    print(f"{'one range from the index':<28}{query_seconds:>12.6f}")
+    print(f"{'ranges/s from the index':<28}{1 / query_seconds:>12,.0f}")
+
+
+def bench_topk(args):
+    from topk import make_ranking
+    rng = random.Random(42)
+    customer_ids = array('q', (rng.randint(1, args.customers) for _ in range(args.rows)))
+    amounts = array('d', (rng.uniform(1, 1000) for _ in range(args.rows)))
+    print(f"{args.rows:,} transactions, up to {args.customers:,} customers")
+    print(f"{'ranking':<24}{'seconds':>10}{'peak MB':>10}")
+    for capacity in (None, args.capacity):
+        tracemalloc.start()
+        started = time.perf_counter()
+        ranking = make_ranking(capacity)
+        ranking.add(customer_ids, amounts)
+        ranking.top(args.k, 'volume')
+        ranking.top(args.k, 'count')
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        label = 'exact' if capacity is None else f"space-saving ({capacity:,})"
+        print(f"{label:<24}{seconds:>10.3f}{peak:>10.1f}")
+
+
+def bench_compressed(args):
+    from compression import open_input
+    from utils import FinanceUtils
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'bench_transactions.csv')
+        generate_csv(filename, args.rows)
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        os.makedirs('logs')
+        try:
+            finance = FinanceUtils()
+            with redirect_stdout(io.StringIO()):
+                finance.load_transactions(filename)
+            print(f"{args.rows:,} transactions, {os.path.getsize(filename) / (1024 * 1024):,.1f} MB as CSV")
+            print(f"{'format':<8}{'MB':>8}{'save':>8}{'read':>8}{'threaded':>10}{'load':>8}")
+            for extension in ['', '.gz', '.bz2', '.xz']:
+                target = filename + extension
+                started = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    finance.save_transactions(target)
+                save_seconds = time.perf_counter() - started
+                read_seconds = []
+                for threaded in (False, True):
+                    started = time.perf_counter()
+                    with open_input(target, threaded) as file:
+                        for _ in csv.reader(line.decode('utf-8') for line in file):
+                            pass
+                    read_seconds.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    finance.load_transactions(target)
+                load_seconds = time.perf_counter() - started
+                print(f"{extension or 'csv':<8}{os.path.getsize(target) / (1024 * 1024):>8.1f}{save_seconds:>8.2f}"
+                      f"{read_seconds[0]:>8.2f}{read_seconds[1]:>10.2f}{load_seconds:>8.2f}")
+        finally:
+            os.chdir(cwd)
+
+
+
+def bench_stream(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'bench_transactions.csv')
+        generate_csv(filename, args.rows)
+        size_mb = os.path.getsize(filename) / (1024 * 1024)
+        print(f"Report of {args.rows:,} rows ({size_mb:,.1f} MB)")
+        print(f"{'variant':<18}{'seconds':>10}{'peak RSS (MB)':>16}")
+        for variant in ('report-loaded', 'report-streamed'):
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '_run', variant, filename],
+                cwd=workdir, capture_output=True, text=True, check=True
+            )
+            name, seconds, rss = result.stdout.strip().splitlines()[-1].split('\t')
+            print(f"{name:<18}{float(seconds):>10.3f}{float(rss):>16.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FinanceUtils benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    load_parser = subparsers.add_parser('load', help="Wall-clock and peak RSS of load_transactions")
+    load_parser.add_argument('--rows', type=int, default=200000)
+    load_parser.add_argument('--workers', type=int, nargs='*', default=[],
+                             help="Also time parallel loads with these worker counts")
+    load_parser.set_defaults(func=bench_load)
+
+    store_parser = subparsers.add_parser('store', help="Memory per row and aggregate scan speed of the store")
+    store_parser.add_argument('--rows', type=int, default=200000)
+    store_parser.set_defaults(func=bench_store)
+
+    edits_parser = subparsers.add_parser('edits', help="Random updates and deletes by transaction_id")
+    edits_parser.add_argument('--rows', type=int, default=1000000)
+    edits_parser.add_argument('--edits', type=int, default=10000)
+    edits_parser.add_argument('--legacy-edits', type=int, default=200,
+                              help="Edits timed (and extrapolated) for the linear-scan baseline")
+    edits_parser.set_defaults(func=bench_edits)
+
+    filters_parser = subparsers.add_parser('filters', help="View filters: row scan vs secondary indexes")
+    filters_parser.add_argument('--rows', type=int, default=10000000)
+    filters_parser.set_defaults(func=bench_filters)
+
+    bulk_parser = subparsers.add_parser('bulk', help="Predicate-based bulk update and delete")
+    bulk_parser.add_argument('--rows', type=int, default=10000000)
+    bulk_parser.set_defaults(func=bench_bulk)
+
+    customers_parser = subparsers.add_parser('customers', help="Customer ID suggestions: sorting rows vs the registry")
+    customers_parser.add_argument('--rows', type=int, default=1000000)
+    customers_parser.add_argument('--customers', type=int, default=50000)
+    customers_parser.add_argument('--edits', type=int, default=1000)
+    customers_parser.set_defaults(func=bench_customers)
+
+    validate_parser = subparsers.add_parser('validate', help="Rows/sec of row validation, strptime vs fast path")
+    validate_parser.add_argument('--rows', type=int, default=200000)
+    validate_parser.set_defaults(func=bench_validate)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help="CSV parse vs memory-mapped binary snapshot reload")
+    snapshot_parser.add_argument('--rows', type=int, default=200000)
+    snapshot_parser.set_defaults(func=bench_snapshot)
+
+    rejects_parser = subparsers.add_parser('rejects', help="Load time and log size with many invalid rows")
+    rejects_parser.add_argument('--rows', type=int, default=200000)
+    rejects_parser.set_defaults(func=bench_rejects)
+
+    lazy_parser = subparsers.add_parser('lazy', help="Full load vs row index build, reopen, page and lookup")
+    lazy_parser.add_argument('--rows', type=int, default=200000)
+    lazy_parser.set_defaults(func=bench_lazy)
+
+    merge_parser = subparsers.add_parser('merge', help="Rows/sec of merging a delta file into loaded transactions")
+    merge_parser.add_argument('--rows', type=int, default=1000000)
+    merge_parser.add_argument('--delta', type=int, default=500000)
+    merge_parser.add_argument('--workers', type=int, default=None)
+    merge_parser.set_defaults(func=bench_merge)
+
+    report_parser = subparsers.add_parser('report', help="generate_report time, serial vs worker processes")
+    report_parser.add_argument('--rows', type=int, default=1000000)
+    report_parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+    report_parser.add_argument('--detector', default='zscore', choices=['zscore', 'type', 'customer', 'mad'])
+    report_parser.set_defaults(func=bench_report)
+
+    rollup_parser = subparsers.add_parser('rollup', help="Report totals from rows vs the rollup cube, and cube upkeep")
+    rollup_parser.add_argument('--rows', type=int, default=1000000)
+    rollup_parser.add_argument('--edits', type=int, default=1000)
+    rollup_parser.set_defaults(func=bench_rollup)
+
+    ranges_parser = subparsers.add_parser('ranges', help="Date-range totals: row scan vs the prefix-sum time index")
+    ranges_parser.add_argument('--rows', type=int, default=1000000)
+    ranges_parser.add_argument('--queries', type=int, default=10000)
+    ranges_parser.set_defaults(func=bench_ranges)
+
+    topk_parser = subparsers.add_parser('topk', help="Top customers: exact totals vs Space-Saving counters")
+    topk_parser.add_argument('--rows', type=int, default=2000000)
+    topk_parser.add_argument('--customers', type=int, default=1000000)
+    topk_parser.add_argument('--capacity', type=int, default=10000)
+    topk_parser.add_argument('--k', type=int, default=5)
+    topk_parser.set_defaults(func=bench_topk)
+
+    compressed_parser = subparsers.add_parser('compressed', help="Size and save/read/load time of gzip, bz2 and xz files")
+    compressed_parser.add_argument('--rows', type=int, default=200000)
+    compressed_parser.set_defaults(func=bench_compressed)
+
+    stream_parser = subparsers.add_parser('stream', help="Report of a CSV: loaded first vs streamed in bounded memory")
+    stream_parser.add_argument('--rows', type=int, default=1000000)
+    stream_parser.set_defaults(func=bench_stream)
+
+    run_parser = subparsers.add_parser('_run')
+    run_parser.add_argument('variant')
+    run_parser.add_argument('filename')
+    run_parser.set_defaults(func=lambda args: run_variant(args.variant, args.filename))
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
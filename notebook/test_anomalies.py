@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import patch
+import io
+import glob
+import random
+from math import fsum
+from anomalies import MADDetector, Moments, QuantileSketch, SKETCH_ACCURACY, ZScoreDetector, make_detector
+from test_load_transactions import LoadTestCase
+
+
+class TestDetectors(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(20)
+        self.types = [rng.randrange(3) for _ in range(3000)]
+        # Transfers are ten times larger than credits and debits
+        self.amounts = [round(rng.uniform(10, 100) * (10 if t == 2 else 1), 2) * (-1 if t == 1 else 1)
+                        for t in self.types]
+        self.customer_ids = [rng.randrange(1, 30) for _ in range(3000)]
+
+    def fitted(self, detector, shards=(0, 1000, 2500, 3000)):
+        # Fit shard by shard and merge, as a parallel report does
+        for start, end in zip(shards, shards[1:]):
+            part = make_detector(*detector)
+            part.fit(self.types[start:end], self.amounts[start:end], self.customer_ids[start:end])
+            if start == 0:
+                merged = part
+            else:
+                merged.merge(part)
+        return merged
+
+    def test_moments_welford_and_merge(self):
+        """Test 20.1: Welford updates and Chan merges match a two-pass mean and variance, even far from zero."""
+        rng = random.Random(1)
+        values = [1e9 + rng.random() for _ in range(1000)]
+        mean = fsum(values) / len(values)
+        variance = fsum((x - mean) ** 2 for x in values) / len(values)
+        left, right = Moments(), Moments()
+        for value in values[:400]:
+            left.add(value)
+        for value in values[400:]:
+            right.add(value)
+        left.merge(right)
+        self.assertEqual(left.count, 1000)
+        self.assertAlmostEqual(left.mean, mean, delta=1e-5)
+        self.assertAlmostEqual(left.std_dev ** 2, variance, delta=variance * 1e-4)
+        # A sum of squares loses the variance to cancellation at this offset
+        naive = sum(x * x for x in values) / len(values) - mean * mean
+        self.assertGreater(abs(naive - variance), variance * 0.01)
+
+    def test_zscore_groups(self):
+        """Test 20.2: Per-type z-scores flag rows against their own type; merged shards flag the same rows."""
+        self.amounts[10] = 2000.0 if self.types[10] != 2 else 5000.0
+        self.types[20], self.amounts[20] = 0, 600.0  # Ordinary for a transfer, not for a credit
+        overall = self.fitted(('zscore', None)).flag(self.types, self.amounts, self.customer_ids)
+        per_type = self.fitted(('type', None)).flag(self.types, self.amounts, self.customer_ids)
+        self.assertIn(10, overall)
+        self.assertNotIn(20, overall)
+        self.assertIn(20, per_type)
+
+        serial = make_detector('customer', 2.5)
+        serial.fit(self.types, self.amounts, self.customer_ids)
+        self.assertEqual(self.fitted(('customer', 2.5)).flag(self.types, self.amounts, self.customer_ids),
+                         serial.flag(self.types, self.amounts, self.customer_ids))
+
+    def test_mad(self):
+        """Test 20.3: The sketch's median is within its accuracy, and MAD flags outliers that inflate a z-score."""
+        sketch = QuantileSketch()
+        sketch.extend(map(abs, self.amounts))
+        true_median = sorted(map(abs, self.amounts))[1499]
+        self.assertLessEqual(abs(sketch.quantile(0.5) - true_median), true_median * SKETCH_ACCURACY * 2)
+
+        amounts = [100.0 + i % 7 for i in range(1000)] + [100000.0] * 5 + [600.0]
+        types = [0] * len(amounts)
+        customers = [1] * len(amounts)
+        zscore, mad = ZScoreDetector(), MADDetector()
+        for detector in (zscore, mad):
+            detector.fit(types, amounts, customers)
+        self.assertNotIn(1005, zscore.flag(types, amounts, customers))
+        self.assertEqual(mad.flag(types, amounts, customers), [1000, 1001, 1002, 1003, 1004, 1005])
+
+    def test_make_detector(self):
+        """Test 20.4: Detectors are created by name, and unknown names or bad thresholds are rejected."""
+        self.assertEqual(make_detector().describe(), "> 3 std dev from mean amount")
+        self.assertEqual(make_detector('type', 2).describe(), "> 2 std dev from mean amount of its type")
+        self.assertEqual(make_detector('mad').threshold, 3.5)
+        for args in (('iqr', None), ('zscore', 0), ('mad', -1.0)):
+            with self.assertRaises(ValueError):
+                make_detector(*args)
+
+
+class TestReportDetectors(LoadTestCase):
+    def report(self, **kwargs):
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            result = self.finance.generate_report(**kwargs)
+        return result, mock_stdout.getvalue()
+
+    def test_report_detector_choice(self):
+        """Test 20.5: The report uses the chosen detector and rejects invalid settings."""
+        self.load()
+        result, _ = self.report(anomaly_detector='customer', anomaly_threshold=0.5)
+        self.assertTrue(result)
+        with open(glob.glob('reports/report_*.txt')[0], encoding='utf-8') as file:
+            report = file.read()
+        self.assertIn("Anomalous Transactions (> 0.5 std dev from mean amount of its customer):", report)
+        self.assertIn("ID 1: $6,478.39", report)  # Customer 926's larger transaction
+
+        result, output = self.report(anomaly_detector='iqr')
+        self.assertFalse(result)
+        self.assertIn("Unknown anomaly detector 'iqr'", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+from datetime import date
+from binary_store import binary_path, is_current, read_binary, write_binary
+from store import TransactionStore
+from test_load_transactions import LoadTestCase
+
+
+class TestBinarySnapshot(LoadTestCase):
+    def save_snapshot(self):
+        self.load()
+        with open(os.devnull, 'w') as devnull, patch('sys.stdout', devnull):
+            self.assertTrue(self.finance.save_transactions(self.test_csv, binary=True))
+        return [dict(t) for t in self.finance.transactions]
+
+    def test_round_trip(self):
+        """Test 5.1: A saved snapshot reloads the same rows without parsing the CSV."""
+        rows = self.save_snapshot()
+        snapshot = binary_path(self.test_csv)
+        self.assertTrue(is_current(snapshot, self.test_csv))
+
+        result, output = self.load()
+        self.assertTrue(result)
+        self.assertIn(f"from '{snapshot}'", output)
+        self.assertIsInstance(self.finance.transactions.cents, memoryview)
+        self.assertEqual([dict(t) for t in self.finance.transactions], rows)
+
+    def test_load_snapshot_directly(self):
+        """Test 5.2: The snapshot file itself can be passed to load_transactions."""
+        rows = self.save_snapshot()
+        result, _ = self.load(binary_path(self.test_csv))
+        self.assertTrue(result)
+        self.assertEqual([dict(t) for t in self.finance.transactions], rows)
+
+    def test_stale_snapshot_ignored(self):
+        """Test 5.3: A CSV changed after the snapshot was saved is parsed again."""
+        self.save_snapshot()
+        self.write_csv(self.test_csv, self.rows + [['6', '2022-02-01', '789', '1.00', 'credit', 'New row']])
+        self.assertFalse(is_current(binary_path(self.test_csv), self.test_csv))
+        result, output = self.load()
+        self.assertTrue(result)
+        self.assertIn(f"from '{self.test_csv}'", output)
+        self.assertEqual(len(self.finance.transactions), 6)
+
+    def test_corrupt_snapshot(self):
+        """Test 5.4: A truncated snapshot is reported instead of loaded."""
+        self.save_snapshot()
+        snapshot = binary_path(self.test_csv)
+        with open(snapshot, 'r+b') as file:
+            file.truncate(150)
+        result, output = self.load(snapshot)
+        self.assertFalse(result)
+        self.assertIn("truncated", output)
+
+
+class TestBufferBackedStore(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.snapshot = os.path.join(self.workdir, 'transactions.bin')
+        self.store = TransactionStore([
+            {'transaction_id': i, 'date': date(2021, 1, i), 'customer_id': 100 + i,
+             'amount': -i * 1.5 if i % 2 else i * 1.5, 'type': 'debit' if i % 2 else 'credit',
+             'description': 'Naïve café' if i % 3 else 'Rent'}
+            for i in range(1, 8)
+        ])
+        write_binary(self.store, self.snapshot)
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def test_writes_copy_columns(self):
+        """Test 5.5: Modifying a memory-mapped store copies it into arrays first."""
+        store = read_binary(self.snapshot)
+        self.assertEqual([dict(t) for t in store], [dict(t) for t in self.store])
+        self.assertEqual(store.get(6)['description'], 'Rent')
+
+        store.remove(store.get(3))
+        store.append({'transaction_id': 99, 'date': date(2022, 5, 5), 'customer_id': 5,
+                      'amount': 2.0, 'type': 'transfer', 'description': 'Rent'})
+        store[0]['description'] = 'Updated'
+        self.assertNotIsInstance(store.transaction_ids, memoryview)
+        self.assertEqual(list(store.transaction_ids), [1, 2, 4, 5, 6, 7, 99])
+        self.assertEqual(store.get(99)['description'], 'Rent')
+        self.assertEqual(len(store.description_table), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
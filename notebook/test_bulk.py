@@ -0,0 +1,130 @@
+import unittest
+from unittest.mock import patch
+import io
+import random
+from datetime import date
+from postings import FieldIndex
+from store import BULK_RATIO, TransactionStore
+from test_load_transactions import LoadTestCase
+
+
+class TestBulkChanges(LoadTestCase):
+    def bulk(self, method, *args, **kwargs):
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            result = getattr(self.finance, method)(*args, **kwargs)
+        return result, mock_stdout.getvalue()
+
+    def setUp(self):
+        super().setUp()
+        self.load()
+
+    def test_delete_by_filter(self):
+        """Test 16.1: Deleting by type and date range removes only the matching rows, logged once."""
+        result, output = self.bulk('delete_transactions', transaction_type='debit', end=date(2020, 12, 31))
+        self.assertEqual(result, 1)
+        self.assertIn("Deleted 1 transactions matching transaction_type=debit, end=2020-12-31", output)
+        self.assertEqual([t['transaction_id'] for t in self.finance.transactions], [1, 3, 4, 5])
+        with open('logs/activity.txt', encoding='utf-8') as file:
+            self.assertEqual(file.read().count("Bulk deleted"), 1)
+
+    def test_update_by_description(self):
+        """Test 16.2: Re-typing rows keeps debit amounts negative and other amounts positive."""
+        result, _ = self.bulk('update_transactions', {'type': 'credit'}, description='Streaming subscription')
+        self.assertEqual(result, 1)
+        row = self.finance.transactions.get(4)
+        self.assertEqual((row['type'], row['amount']), ('credit', 89.99))
+
+        result, _ = self.bulk('update_transactions', {'type': 'debit', 'amount': 10.0, 'customer_id': 55},
+                              where=lambda row: row['amount'] > 3000)
+        self.assertEqual(result, 2)
+        self.assertEqual([self.finance.transactions.get(i)['amount'] for i in (1, 5)], [-10.0, -10.0])
+        self.assertEqual(self.finance.transactions.customers().sorted_ids(), [55, 123, 466, 926])
+        self.assertEqual(len(self.finance.transactions.select('debit', customer_id=55)), 2)
+
+    def test_invalid_spec(self):
+        """Test 16.3: Missing filters and invalid changes are rejected without changing anything."""
+        with self.assertRaises(ValueError):
+            self.bulk('delete_transactions')
+        with self.assertRaises(ValueError):
+            self.bulk('delete_transactions', transaction_type='refund')
+        with self.assertRaises(ValueError):
+            self.bulk('update_transactions', {'transaction_id': 9}, year=2020)
+        with self.assertRaises(ValueError):
+            self.bulk('update_transactions', {'amount': -1}, year=2020)
+        self.assertEqual(len(self.finance.transactions), 5)
+
+    def test_store_bulk_matches_list(self):
+        """Test 16.4: Bulk matches, updates and removals agree with a list, on both the small and bulk paths."""
+        rng = random.Random(3)
+        store = TransactionStore()
+        for i in range(3000):
+            store.append_values(i, 737000 + rng.randrange(1000), rng.randint(1, 20), rng.randrange(100, 10001),
+                                rng.randrange(3), f"Row {i % 7}")
+        store.select('credit')  # Indexes built, so the small path must keep them up to date
+        expected = [dict(row) for row in store]
+        for step in range(8):
+            kwargs = {'customer_id': rng.randint(1, 20)} if step % 2 else {'transaction_type': 'debit', 'year': 2020}
+            kwargs['description'] = f"Row {step}"
+            matched = [row for row in expected
+                       if all(row[key if key != 'transaction_type' else 'type'] == value for key, value in kwargs.items()
+                              if key not in ('year', 'description'))
+                       and row['date'].year == kwargs.get('year', row['date'].year)
+                       and row['description'] == kwargs['description']]
+            slots = store.match(**kwargs)
+            self.assertEqual([store[slot]['transaction_id'] for slot in slots], [row['transaction_id'] for row in matched])
+            if step % 4 == 3:
+                store.remove_slots(range(0, len(store), 3))  # Bulk path
+                expected = expected[1::3] + expected[2::3]
+                expected.sort(key=lambda row: row['transaction_id'])
+            elif step % 2:
+                store.update_slots(slots, transaction_type='debit', date=date(2021, 1, 1))
+                for row in matched:
+                    row.update({'type': 'debit', 'amount': -abs(row['amount']), 'date': date(2021, 1, 1)})
+            else:
+                store.remove_slots(slots)
+                expected = [row for row in expected if row not in matched]
+            self.assertEqual([dict(row) for row in store], expected)
+            self.assertEqual(len(store.select('debit')), sum(row['type'] == 'debit' for row in expected))
+
+
+    def test_small_path_is_linear(self):
+        """Test 16.5: Below the bulk threshold each row costs one in-place posting change per field; above it, none."""
+        size = BULK_RATIO * 100
+        store = TransactionStore()
+        store.extend_columns(range(size), [737000 + i % 700 for i in range(size)], [i % 40 + 1 for i in range(size)],
+                             [100] * size, [i % 3 for i in range(size)], [0] * size)
+        store.description_table.append('Row')
+        calls = {'add': 0, 'discard': 0}
+
+        def counted(name):
+            method = getattr(FieldIndex, name)
+
+            def wrapper(index, *args):
+                calls[name] += 1
+                return method(index, *args)
+            return wrapper
+
+        with patch.object(FieldIndex, 'add', counted('add')), patch.object(FieldIndex, 'discard', counted('discard')):
+            for count in (100, 101):  # At, then just over, len(store) / BULK_RATIO
+                store.select('credit')
+                credits = store._secondary['type'].get(0)
+                calls.update(add=0, discard=0)
+                store.update_slots(range(0, 3 * count, 3), customer_id=41)  # Credits only
+                self.assertEqual(calls, {'add': 4 * count, 'discard': 4 * count} if count == 100 else {'add': 0, 'discard': 0})
+                if count == 100:
+                    self.assertIs(store._secondary['type'].get(0), credits)  # Updated in place, not copied
+                    calls.update(add=0, discard=0)
+                    store.update_slots(range(count), amount=2.5, description='Fee')
+                    self.assertEqual(calls, {'add': 0, 'discard': 0})  # No indexed field changed
+                selected = len(store.select(customer_id=41))  # Before the scan, which compacts and drops the indexes
+                self.assertEqual(selected, sum(1 for row in store if row['customer_id'] == 41))
+
+                calls.update(add=0, discard=0)
+                store.remove_slots(range(count, 2 * count))
+                self.assertEqual(calls['discard'], 4 * count if count == 100 else 0)
+                selected = len(store.select('credit'))
+                self.assertEqual(selected, sum(1 for row in store if row['type'] == 'credit'))
+
+
+if __name__ == '__main__':
+    unittest.main()
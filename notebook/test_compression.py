@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import patch
+import io
+import os
+import gzip
+import lzma
+from compression import BLOCK_SIZE, open_input
+from test_load_transactions import LoadTestCase
+
+
+class TestCompressedFiles(LoadTestCase):
+    def test_round_trip(self):
+        """Test 10.1: Saving to and loading from .gz, .bz2 and .xz keeps every row."""
+        self.load()
+        rows = [dict(t) for t in self.finance.transactions]
+        for extension, magic in [('.gz', b'\x1f\x8b'), ('.bz2', b'BZh'), ('.xz', b'\xfd7zXZ')]:
+            with self.subTest(extension=extension):
+                filename = self.test_csv + extension
+                with patch('sys.stdout', new_callable=io.StringIO):
+                    self.assertTrue(self.finance.save_transactions(filename))
+                with open(filename, 'rb') as file:
+                    self.assertEqual(file.read(len(magic)), magic)
+                result, output = self.load(filename, workers=2)
+                self.assertTrue(result)
+                self.assertIn(f"Loaded 5 transactions from '{filename}'", output)
+                self.assertEqual([dict(t) for t in self.finance.transactions], rows)
+
+    def test_reader_lines_match_file(self):
+        """Test 10.2: The threaded reader yields the same lines across block boundaries."""
+        lines = [f"{i},{'x' * (i % 97)}\r\n".encode() if i % 5 else f"{i}\n".encode() for i in range(60000)]
+        data = b''.join(lines) + b'last line without newline'
+        with gzip.open('lines.csv.gz', 'wb') as file:
+            file.write(data)
+        self.assertGreater(len(data), 2 * BLOCK_SIZE)
+        with open_input('lines.csv.gz') as file:
+            read = list(file)
+            self.assertEqual(file.position, os.path.getsize('lines.csv.gz'))
+        self.assertEqual(read, lines + [b'last line without newline'])
+
+    def test_damaged_file(self):
+        """Test 10.3: A truncated archive is reported and nothing is loaded."""
+        with open(self.test_csv, 'rb') as file:
+            data = lzma.compress(file.read())
+        with open('damaged.csv.xz', 'wb') as file:
+            file.write(data[:len(data) // 2])
+        result, output = self.load('damaged.csv.xz')
+        self.assertFalse(result)
+        self.assertIn("truncated or damaged", output)
+        self.assertEqual(len(self.finance.transactions), 0)
+
+    def test_incremental_reloads_changed_archive(self):
+        """Test 10.4: An incremental load of a changed compressed file reloads it in full."""
+        with open(self.test_csv, 'rb') as source, gzip.open('archive.csv.gz', 'wb') as file:
+            file.write(source.read())
+        self.assertTrue(self.load('archive.csv.gz')[0])
+        result, output = self.load('archive.csv.gz', incremental=True)
+        self.assertTrue(result)
+        self.assertIn("No new transactions", output)
+
+        with gzip.open('archive.csv.gz', 'ab') as file:
+            file.write(b"6,2022-02-01,789,1.00,credit,Appended\n")
+        result, output = self.load('archive.csv.gz', incremental=True)
+        self.assertTrue(result)
+        self.assertIn("reloading it in full", output)
+        self.assertEqual(len(self.finance.transactions), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
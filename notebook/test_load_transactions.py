@@ -0,0 +1,284 @@
+import unittest
+from unittest.mock import patch
+import io
+import os
+import csv
+import shutil
+import tempfile
+from datetime import datetime
+from utils import FinanceUtils
+
+
+FIELDNAMES = ['transaction_id', 'date', 'customer_id', 'amount', 'type', 'description']
+
+
+class LoadTestCase(unittest.TestCase):
+    """Run each test in a scratch directory with its own logs/ and snapshots/."""
+
+    rows = [
+        ['1', '2020-10-26', '926', '6478.39', 'credit', 'Online purchase - Electronics'],
+        ['2', '2020-10-27', '466', '100.50', 'debit', 'Grocery shopping'],
+        ['3', '2021-03-15', '123', '2500.00', 'transfer', 'Savings account transfer'],
+        ['4', '2021-06-20', '926', '89.99', 'debit', 'Streaming subscription'],
+        ['5', '2022-01-10', '789', '4500.00', 'credit', 'Freelance payment'],
+    ]
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.workdir = tempfile.mkdtemp()
+        os.chdir(self.workdir)
+        os.makedirs('logs')
+        self.finance = FinanceUtils()
+        self.test_csv = 'test_transactions.csv'
+        self.write_csv(self.test_csv, self.rows)
+
+    def tearDown(self):
+        del self.finance
+        os.chdir(self.cwd)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def write_csv(self, filename, rows, header=FIELDNAMES):
+        with open(filename, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            if header:
+                writer.writerow(header)
+            writer.writerows(rows)
+
+    def read_errors_txt(self):
+        with open(os.path.join('logs', 'errors.txt'), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def load(self, filename=None, **kwargs):
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            result = self.finance.load_transactions(filename or self.test_csv, **kwargs)
+        return result, mock_stdout.getvalue()
+
+
+class TestLoadTransactions(LoadTestCase):
+    def test_valid_file(self):
+        """Test 1.1: Load a valid file."""
+        result, output = self.load()
+        self.assertTrue(result)
+        self.assertEqual(len(self.finance.transactions), 5)
+        first = self.finance.transactions[0]
+        self.assertEqual(first['transaction_id'], 1)
+        self.assertEqual(first['date'], datetime(2020, 10, 26).date())
+        self.assertEqual(first['amount'], 6478.39)
+        self.assertEqual(self.finance.transactions[1]['amount'], -100.50)
+        self.assertIn("Loading: [", output)
+        self.assertIn("100%", output)
+        self.assertIn("Loaded 5 transactions", output)
+
+    def test_backup_matches_input(self):
+        """Test 1.2: The snapshot restores byte-identical to the input."""
+        result, _ = self.load()
+        self.assertTrue(result)
+        backups = self.finance.snapshots.list_snapshots()
+        self.assertEqual(len(backups), 1)
+        self.assertTrue(backups[0]['id'].startswith('backup_'))
+        with patch('sys.stdout', new_callable=io.StringIO):
+            self.assertTrue(self.finance.restore_snapshot(backups[0]['id'], 'restored.csv'))
+        with open(self.test_csv, 'rb') as src, open('restored.csv', 'rb') as dst:
+            self.assertEqual(src.read(), dst.read())
+
+    def test_invalid_rows_logged(self):
+        """Test 1.3: Invalid rows are skipped and logged with their row numbers."""
+        self.write_csv(self.test_csv, self.rows + [
+            ['1', '2020-10-26', '926', '1.00', 'credit', 'Duplicate'],
+            ['7', '2020-13-01', '926', '1.00', 'credit', 'Bad date'],
+            ['8', '2020-10-26', '926', '-1.00', 'credit', 'Negative'],
+            ['9', '2020-10-26', '926', '1.00', 'refund', 'Bad type'],
+        ])
+        result, _ = self.load()
+        self.assertTrue(result)
+        self.assertEqual(len(self.finance.transactions), 5)
+        errors = self.read_errors_txt()
+        self.assertIn("Row 7: Duplicate transaction_id '1'", errors)
+        self.assertIn("Invalid date format: '2020-13-01'", errors)
+        self.assertIn("Row 9: Negative amount '-1.0'", errors)
+        self.assertIn("Row 10: Invalid transaction type 'refund'", errors)
+
+    def test_header_only(self):
+        """Test 1.4: A file without rows fails and leaves no backup behind."""
+        self.write_csv(self.test_csv, [])
+        result, output = self.load()
+        self.assertFalse(result)
+        self.assertIn("Error: No valid transactions in CSV", output)
+        self.assertEqual(self.finance.snapshots.list_snapshots(), [])
+        self.assertEqual(os.listdir(os.path.join('snapshots', 'objects')), [])
+
+    def test_empty_file(self):
+        """Test 1.5: An empty file fails cleanly."""
+        open(self.test_csv, 'w').close()
+        result, output = self.load()
+        self.assertFalse(result)
+        self.assertIn("Error: No valid transactions in CSV", output)
+
+    def test_missing_columns(self):
+        """Test 1.6: Missing required columns."""
+        self.write_csv(self.test_csv, [['1', '2020-10-26']], header=['transaction_id', 'date'])
+        result, output = self.load()
+        self.assertFalse(result)
+        self.assertIn("Missing columns in CSV", output)
+        self.assertEqual(self.finance.snapshots.list_snapshots(), [])
+
+    def test_file_not_found(self):
+        """Test 1.7: Missing file."""
+        result, output = self.load('missing.csv')
+        self.assertFalse(result)
+        self.assertIn("File 'missing.csv' not found.", output)
+
+
+class TestParallelLoad(LoadTestCase):
+    def make_rows(self):
+        rows = [[str(i), f'2021-{i % 12 + 1:02d}-15', str(100 + i % 7), f'{i}.25',
+                 ('credit', 'debit', 'transfer')[i % 3], f'Row {i}'] for i in range(1, 400)]
+        rows[50] = ['7', '2021-01-01', '5', '5', 'credit', 'Duplicate of an earlier range']
+        rows[120] = ['abc', '2021-01-01', '5', '5', 'credit', 'Bad id']
+        rows[200] = ['900', '2021-02-30', '5', '5', 'credit', 'Bad date']
+        rows[300] = ['900', '2021-01-01', '5', '5', 'credit', 'Duplicate of an invalid row']
+        return rows
+
+    def test_matches_serial_load(self):
+        """Test 1.8: A parallel load gives the same rows and errors as a serial load."""
+        self.write_csv(self.test_csv, self.make_rows())
+        self.load()
+        serial_rows = [dict(t) for t in self.finance.transactions]
+        serial_errors = [line.split(' - ', 2)[2] for line in self.read_errors_txt().splitlines()]
+        open(os.path.join('logs', 'errors.txt'), 'w').close()
+
+        result, _ = self.load(workers=2)
+        self.assertTrue(result)
+        self.assertEqual([dict(t) for t in self.finance.transactions], serial_rows)
+        parallel_errors = [line.split(' - ', 2)[2] for line in self.read_errors_txt().splitlines()]
+        self.assertEqual(parallel_errors, serial_errors)
+        self.assertIn("Row 52: Duplicate transaction_id '7'", parallel_errors)
+        self.assertIn("Row 302: Duplicate transaction_id '900'", parallel_errors)
+        self.assertEqual(len(self.finance.snapshots.list_snapshots()), 1)
+
+    def test_multiline_fields_fall_back(self):
+        """Test 1.9: Line breaks inside quoted fields fall back to a serial load."""
+        rows = self.make_rows()
+        rows[10][5] = 'Line one\nline two'
+        self.write_csv(self.test_csv, rows)
+        result, _ = self.load(workers=2)
+        self.assertTrue(result)
+        self.assertEqual(self.finance._get_transaction_by_id(11)['description'], 'Line one\nline two')
+        self.assertEqual(len(self.finance.transactions), 395)
+
+
+class TestValidationReport(LoadTestCase):
+    def make_rows(self):
+        rows = [[str(i), '2021-03-01', '100', '5.00', 'credit', f'Row {i}'] for i in range(1, 301)]
+        for i in range(0, 300, 4):
+            rows[i][3] = '-5.00'
+        for i in range(1, 300, 10):
+            rows[i][1] = '2021-02-30'
+        rows[250][0] = '3'
+        return rows
+
+    def read_quarantine(self, filename='rejected.csv'):
+        with open(filename, encoding='utf-8', newline='') as f:
+            return list(csv.reader(f))
+
+    def test_examples_and_summary(self):
+        """Test 1.13: Only the first examples per reason are logged, then one summary."""
+        self.write_csv(self.test_csv, self.make_rows())
+        result, output = self.load(error_examples=3, quarantine='rejected.csv')
+        self.assertTrue(result)
+        errors = self.read_errors_txt().splitlines()
+        self.assertEqual(sum("Negative amount" in line for line in errors), 3)
+        self.assertEqual(sum("Invalid date format" in line for line in errors), 3)
+        self.assertIn("Rejected 106 rows (duplicate_id: 1, invalid_date: 30, negative_amount: 75); "
+                      "99 not logged individually", errors[-1])
+        self.assertIn("Rejected 106 rows", output)
+
+        quarantine = self.read_quarantine()
+        self.assertEqual(quarantine[0], ['source_row', 'rejection_reason'] + FIELDNAMES)
+        self.assertEqual(len(quarantine), 107)
+        self.assertEqual(quarantine[1], ['2', 'negative_amount', '1', '2021-03-01', '100', '-5.00', 'credit', 'Row 1'])
+        self.assertIn(['252', 'duplicate_id', '3', '2021-03-01', '100', '5.00', 'credit', 'Row 251'], quarantine)
+
+    def test_parallel_quarantine_matches_serial(self):
+        """Test 1.14: A parallel load quarantines the same rows, cross-range duplicates included."""
+        self.write_csv(self.test_csv, self.make_rows())
+        self.load(quarantine='serial.csv')
+        result, _ = self.load(workers=3, quarantine='parallel.csv')
+        self.assertTrue(result)
+        self.assertEqual(self.read_quarantine('parallel.csv'), self.read_quarantine('serial.csv'))
+
+    def test_unlimited_examples(self):
+        """Test 1.15: error_examples=None logs every rejected row."""
+        self.write_csv(self.test_csv, self.make_rows())
+        self.load(error_examples=None)
+        self.assertEqual(sum("Row " in line for line in self.read_errors_txt().splitlines()), 76)
+
+
+class TestIncrementalLoad(LoadTestCase):
+    def append_csv(self, rows, text=''):
+        with open(self.test_csv, 'a', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerows(rows)
+            f.write(text)
+
+    def test_appended_rows_only(self):
+        """Test 1.10: Only appended rows are parsed; row numbers and duplicate checks continue."""
+        self.load()
+        self.finance.transactions[0]['description'] = 'Edited in memory'
+        self.append_csv([
+            ['6', '2022-02-01', '789', '10.00', 'credit', 'New row'],
+            ['2', '2022-02-01', '789', '10.00', 'credit', 'Duplicate of a loaded row'],
+        ], text='7,2022-02-02,789,5.00,deb')
+        result, output = self.load(incremental=True)
+        self.assertTrue(result)
+        self.assertIn("Loaded 1 new transactions", output)
+        self.assertNotIn("Backup created", output)
+        self.assertEqual(len(self.finance.transactions), 6)
+        self.assertEqual(self.finance.transactions[0]['description'], 'Edited in memory')
+        self.assertIn("Row 8: Duplicate transaction_id '2'", self.read_errors_txt())
+
+        # The partial last line is completed by the writer and picked up next time
+        self.append_csv([], text='it,Finished later\n')
+        result, output = self.load(incremental=True)
+        self.assertTrue(result)
+        self.assertEqual(self.finance._get_transaction_by_id(7)['amount'], -5.0)
+
+        result, output = self.load(incremental=True)
+        self.assertIn("No new transactions", output)
+
+    def test_rewritten_file_reloads(self):
+        """Test 1.11: A truncated or rewritten file is reloaded in full."""
+        self.load()
+        self.write_csv(self.test_csv, self.rows[:2])
+        result, output = self.load(incremental=True)
+        self.assertTrue(result)
+        self.assertIn("reloading it in full", output)
+        self.assertEqual(len(self.finance.transactions), 2)
+
+        changed = [list(row) for row in self.rows[:2]]
+        changed[0][5] = 'Same length, new text!!!!!!!'[:len(changed[0][5])]
+        self.write_csv(self.test_csv, changed + [self.rows[2]])
+        result, output = self.load(incremental=True)
+        self.assertIn("reloading it in full", output)
+        self.assertEqual(self.finance.transactions[0]['description'], changed[0][5])
+
+    def test_follow(self):
+        """Test 1.12: Follow mode applies rows appended between polls."""
+        appended = iter([
+            [['6', '2022-02-01', '789', '10.00', 'credit', 'First poll']],
+            [],
+            [['7', '2022-02-02', '789', '20.00', 'debit', 'Third poll']],
+        ])
+
+        def fake_sleep(seconds):
+            rows = next(appended)
+            if rows:
+                self.append_csv(rows)
+
+        with patch('utils.time.sleep', fake_sleep), patch('sys.stdout', new_callable=io.StringIO) as output:
+            self.assertTrue(self.finance.follow_transactions(self.test_csv, interval=0, max_polls=3))
+        self.assertEqual(len(self.finance.transactions), 7)
+        self.assertEqual(output.getvalue().count("Loaded 1 new transactions"), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
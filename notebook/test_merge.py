@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import patch
+import io
+from test_load_transactions import LoadTestCase
+
+
+class TestMergeTransactions(LoadTestCase):
+    delta = [
+        ['6', '2022-02-01', '321', '10.00', 'credit', 'New row'],
+        ['2', '2022-02-02', '466', '55.00', 'debit', 'Corrected grocery shopping'],
+        ['x', '2022-02-03', '321', '1.00', 'credit', 'Bad ID'],
+        ['7', '2022-02-04', '654', '20.00', 'transfer', 'Another new row'],
+        ['6', '2022-02-05', '321', '30.00', 'credit', 'Repeated ID'],
+    ]
+
+    def merge(self, on_conflict='skip', filename='delta.csv', **kwargs):
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            result = self.finance.merge_transactions(filename, on_conflict, **kwargs)
+        return result, mock_stdout.getvalue()
+
+    def setUp(self):
+        super().setUp()
+        self.write_csv('delta.csv', self.delta)
+        self.load()
+
+    def test_skip(self):
+        """Test 15.1: Conflicting rows are skipped and invalid or repeated rows rejected."""
+        result, output = self.merge('skip', quarantine='rejected.csv')
+        self.assertTrue(result)
+        self.assertIn("2 added (0 with new IDs), 0 overwritten, 1 skipped", output)
+        self.assertIn("Rejected 2 rows (duplicate_id: 1, invalid_id: 1)", output)
+        self.assertEqual([t['transaction_id'] for t in self.finance.transactions], [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(self.finance.transactions.get(2)['amount'], -100.50)
+        self.assertEqual(self.finance.transactions.get(6)['description'], 'New row')
+        with open('rejected.csv', encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 3)  # Header and two rejected rows
+
+    def test_overwrite(self):
+        """Test 15.2: Conflicting rows replace the loaded rows in place, serially or in worker processes."""
+        for workers in (None, 2):
+            with self.subTest(workers=workers):
+                self.load()
+                result, output = self.merge('overwrite', workers=workers)
+                self.assertTrue(result)
+                self.assertIn("2 added (0 with new IDs), 1 overwritten, 0 skipped", output)
+                self.assertEqual([t['transaction_id'] for t in self.finance.transactions], [1, 2, 3, 4, 5, 6, 7])
+                row = self.finance.transactions[1]
+                self.assertEqual((row['amount'], row['description']), (-55.00, 'Corrected grocery shopping'))
+                self.assertEqual(self.finance.transactions.customers().latest(466).isoformat(), '2022-02-02')
+
+    def test_reassign(self):
+        """Test 15.3: Conflicting rows get new IDs above the loaded and merged ones."""
+        result, output = self.merge('reassign')
+        self.assertTrue(result)
+        self.assertIn("3 added (1 with new IDs)", output)
+        rows = self.finance.transactions
+        self.assertEqual([t['transaction_id'] for t in rows], [1, 2, 3, 4, 5, 6, 8, 7])
+        self.assertEqual(rows.get(8)['description'], 'Corrected grocery shopping')
+        self.assertEqual(rows.get(2)['amount'], -100.50)
+        self.assertEqual(rows.next_id(), 9)
+
+        # The merged IDs count as seen when rows are appended to the loaded file
+        with open(self.test_csv, 'a', encoding='utf-8', newline='') as file:
+            file.write("7,2022-03-01,1,1.00,credit,Appended\n")
+        result, output = self.load(incremental=True)
+        self.assertTrue(result)
+        self.assertIn("Loaded 0 new transactions", output)
+
+    def test_invalid_policy_and_missing_file(self):
+        """Test 15.4: An unknown policy or missing file leaves the loaded rows unchanged."""
+        self.assertFalse(self.merge('replace')[0])
+        result, output = self.merge(filename='missing.csv')
+        self.assertFalse(result)
+        self.assertIn("File 'missing.csv' not found", output)
+        self.assertEqual(len(self.finance.transactions), 5)
+
+    def test_overwrite_with_indexes(self):
+        """Test 15.5: Overwrites are written a column at a time and keep the indexes and totals consistent."""
+        rows = [[str(tid), f"2021-{tid % 12 + 1:02d}-01", str(tid % 7 + 1), '10.00', ('credit', 'debit')[tid % 2], 'Row']
+                for tid in range(1, 201)]
+        self.write_csv(self.test_csv, rows)
+        for overwritten in (2, 50):  # Indexes updated row by row, then dropped for a bulk batch
+            self.load()
+            store = self.finance.transactions
+            store.select('credit')
+            store.totals()
+            self.write_csv('delta.csv', [[str(tid), '2022-06-15', '99', '5.00', 'transfer', 'Overwritten']
+                                         for tid in range(1, overwritten + 1)])
+            with patch.object(type(store), 'set_values', side_effect=AssertionError("one row at a time")):
+                self.assertTrue(self.merge('overwrite')[0])
+            self.assertIs(self.finance.transactions, store)
+            self.assertEqual(len(store.select('transfer', year=2022, customer_id=99)), overwritten)
+            self.assertEqual(len(store.select('credit')), sum(1 for tid in range(overwritten + 1, 201) if tid % 2 == 0))
+            self.assertEqual(store.check_totals(), [])
+            self.assertEqual(store.totals().counts[2], overwritten)  # Transfers
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import patch
+import io
+from money import CENTS_MAX, format_cents, parse_cents, split_cents, to_cents
+from parsing import compile_validator
+from report_stats import ReportStats, partial_report
+from test_load_transactions import LoadTestCase
+
+
+class TestMoney(unittest.TestCase):
+    def test_parse_and_format_are_exact(self):
+        """Test 24.1: Amounts parse to exact cents, round half to even, and format back unchanged."""
+        cases = {'12': 1200, '12.5': 1250, '.75': 75, '-3.10': -310, '+0.01': 1, ' 7.00 ': 700,
+                 '1e3': 100000, '1_000': 100000, '2.675': 268, '0.125': 12, '0.135': 14}
+        for text, cents in cases.items():
+            self.assertEqual(parse_cents(text), cents, text)
+        for cents in (0, 5, 99, 100, 1050, -1050, 123456789012):
+            self.assertEqual(parse_cents(format_cents(cents)), cents)
+        self.assertEqual(format_cents(-1050), '-10.50')
+        self.assertEqual(format_cents(7), '0.07')
+        self.assertEqual(sum(parse_cents('0.10') for _ in range(10)), 100)  # 0.1 * 10 drifts as a float
+        self.assertEqual(to_cents(19.99), 1999)
+        self.assertEqual(to_cents(3), 300)
+
+    def test_parse_rejects_non_numbers(self):
+        """Test 24.2: Non-finite, malformed and out-of-range amounts are rejected."""
+        for text in ('', 'abc', 'nan', 'inf', '-Infinity', '--1', '+-1', '1.2.3', '$5'):
+            with self.assertRaises(ValueError, msg=text):
+                parse_cents(text)
+        with self.assertRaises(ValueError):
+            parse_cents(str(CENTS_MAX // 100 + 1))
+
+    def test_sharded_totals_match_serial(self):
+        """Test 24.3: Sums in cents are identical however the rows are split into shards."""
+        amounts = [(i * 7919) % 100000 + 1 for i in range(20000)]  # Cents
+        dates = [737000 + i % 900 for i in range(20000)]
+        types = [i % 3 for i in range(20000)]
+        customer_ids = [i % 97 + 1 for i in range(20000)]
+        serial = ReportStats()
+        serial.add(dates, types, amounts, customer_ids)
+        merged = ReportStats()
+        for start in range(0, 20000, 1234):
+            end = start + 1234
+            merged.merge(partial_report(dates[start:end], types[start:end], amounts[start:end], customer_ids[start:end]))
+        self.assertEqual(merged.type_cents, serial.type_cents)
+        self.assertEqual(merged.years, serial.years)
+        self.assertEqual(serial.type_cents[0], sum(amounts[0::3]))
+
+    def test_sign_is_checked_before_rounding(self):
+        """Test 24.5: Negative amounts that round to zero cents are still rejected as negative on load."""
+        cases = {'-0.001': (True, 0), '-0.005': (True, 0), '-0.006': (True, 1), '-0.00': (False, 0), '-0': (False, 0),
+                 '0.001': (False, 0), '-1e-9': (True, 0), '-3.10': (True, 310)}
+        for text, expected in cases.items():
+            self.assertEqual(split_cents(text), expected, text)
+        self.assertEqual(parse_cents('-0.001'), 0)
+
+        validate = compile_validator((0, 1, 2, 3, 4, 5))
+        for text in ('-0.001', '-0.005'):
+            transaction_id, values, error = validate(['1', '2021-01-01', '5', text, 'credit', 'Row'])
+            self.assertIsNone(values)
+            self.assertEqual(error[:2], ('negative_amount', f"Negative amount '{float(text)}'"))
+        self.assertEqual(validate(['1', '2021-01-01', '5', '-0.00', 'credit', 'Row'])[1][2], 0)  # As before: -0.0 is not below zero
+
+    def test_validator_matches_float_checks(self):
+        """Test 24.6: Amounts are valid, negative or invalid exactly when the float-based loader said so."""
+        validate = compile_validator((0, 1, 2, 3, 4, 5))
+        for text in ('5', ' 5 ', '-5', '+5', '- 5', '+ 5', '-  5.25', '+\t1e3', '-0.001', '1e3', ' -2.5 ', '1_000'):
+            try:
+                expected = 'negative_amount' if float(text) < 0 else None
+            except ValueError:
+                expected = 'invalid_amount'
+            error = validate(['1', '2021-01-01', '5', text, 'credit', 'Row'])[2]
+            self.assertEqual(error and error[0], expected, text)
+
+
+class TestCentsRoundTrip(LoadTestCase):
+    def test_spaced_signs_are_rejected(self):
+        """Test 24.7: A space between sign and digits rejects the row instead of aborting the load or stream."""
+        self.write_csv(self.test_csv, self.rows + [['6', '2022-02-01', '5', '- 5', 'credit', 'Spaced minus'],
+                                                   ['7', '2022-02-02', '5', '+ 5', 'credit', 'Spaced plus'],
+                                                   ['8', '2022-02-03', '5', '-2.50', 'credit', 'Negative']])
+        with patch('sys.stdout', new_callable=io.StringIO):
+            self.assertTrue(self.finance.analyze_transactions(source=self.test_csv))
+        self.assertTrue(self.load()[0])
+        self.assertEqual(len(self.finance.transactions), 5)
+        errors = self.read_errors_txt()
+        self.assertIn("Invalid amount '- 5'", errors)
+        self.assertIn("Invalid amount '+ 5'", errors)
+        self.assertIn("Negative amount '-2.5'", errors)
+
+    def test_load_save_keeps_cents_and_signs(self):
+        """Test 24.4: Loading and saving keeps every amount to the cent and debits negative."""
+        self.write_csv(self.test_csv, self.rows + [['6', '2022-02-01', '5', '0.10', 'debit', 'Fee'],
+                                                   ['7', '2022-02-02', '5', '2.675', 'credit', 'Rounded'],
+                                                   ['8', '2022-02-03', '5', 'nan', 'credit', 'Not a number']])
+        self.assertTrue(self.load()[0])
+        store = self.finance.transactions
+        self.assertEqual(list(store.cents), [647839, -10050, 250000, -8999, 450000, -10, 268])
+        self.assertEqual(store.get(2)['amount'], -100.5)
+        self.assertIn("Invalid amount 'nan'", self.read_errors_txt())
+
+        store.get(1)['amount'] = 0.3
+        with patch('sys.stdout', new_callable=io.StringIO):
+            self.assertTrue(self.finance.save_transactions('saved.csv'))
+        with open('saved.csv', encoding='utf-8') as file:
+            amounts = [line.split(',')[3] for line in file.read().splitlines()[1:]]
+        self.assertEqual(amounts, ['0.30', '100.50', '2500.00', '89.99', '4500.00', '0.10', '2.68'])
+        self.assertTrue(self.load('saved.csv')[0])
+        self.assertEqual(list(self.finance.transactions.cents), [30, -10050, 250000, -8999, 450000, -10, 268])
+
+
+if __name__ == '__main__':
+    unittest.main()
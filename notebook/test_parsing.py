@@ -0,0 +1,84 @@
+import unittest
+from datetime import datetime
+from parsing import column_positions, compile_validator, format_error, parse_iso_date
+
+
+HEADER = ['transaction_id', 'date', 'customer_id', 'amount', 'type', 'description']
+
+
+def strptime_ordinal(date_str):
+    """Reference parser: the strptime call load_transactions used originally."""
+    return datetime.strptime(date_str, '%Y-%m-%d').toordinal()
+
+
+class TestParseIsoDate(unittest.TestCase):
+    def test_matches_strptime(self):
+        """The fast date parser accepts and rejects exactly what strptime does."""
+        samples = [
+            '2020-10-26', '2024-02-29', '2023-02-29', '2020-13-01', '2020-00-10', '2020-01-00',
+            '0000-01-01', '0001-01-01', '9999-12-31', '2020-1-5', '2020-01-5', '2020-1-05',
+            '2020-01- 5', '20-01-01', '2020/01/01', '2020-01-01x', ' 2020-01-01', '',
+            '٢٠٢٠-٠١-٠١', '２０２０-０１-０１', '+020-01-01', '2020-+1-01', '2020-01-0²'
+        ]
+        for date_str in samples:
+            with self.subTest(date_str=date_str):
+                try:
+                    expected = strptime_ordinal(date_str)
+                except ValueError:
+                    expected = None
+                try:
+                    actual = parse_iso_date(date_str)
+                except ValueError:
+                    actual = None
+                self.assertEqual(actual, expected)
+                # A second call is served from the memo and must agree
+                try:
+                    self.assertEqual(parse_iso_date(date_str), expected)
+                except ValueError:
+                    self.assertIsNone(expected)
+
+
+class TestCompiledValidator(unittest.TestCase):
+    def setUp(self):
+        positions, _ = column_positions(HEADER)
+        self.validate = compile_validator(positions)
+
+    def test_valid_row(self):
+        """A valid debit row is encoded with a negative amount in cents."""
+        transaction_id, values, error = self.validate(['2', '2020-10-27', '466', '100.50', ' Debit ', ' Grocery '])
+        self.assertEqual(transaction_id, 2)
+        self.assertEqual(values, (datetime(2020, 10, 27).toordinal(), 466, -10050, 1, 'Grocery'))
+        self.assertIsNone(error)
+
+    def test_rejections(self):
+        """Each invalid field is reported with the original log message."""
+        cases = [
+            (['x', '2020-10-27', '466', '1', 'credit', 'd'], None, "Row 5: Invalid transaction_id 'x'"),
+            (['9' * 20, '2020-10-27', '466', '1', 'credit', 'd'], None, f"Row 5: Invalid transaction_id '{'9' * 20}'"),
+            (['1', '2020-02-30', '466', '1', 'credit', 'd'], 1, "Invalid date format: '2020-02-30'"),
+            (['1', '2020-10-27', 'abc', '1', 'credit', 'd'], 1, "Invalid customer_id: 'abc'"),
+            (['1', '2020-10-27', '0', '1', 'credit', 'd'], 1, "Non-positive customer_id: '0'"),
+            (['1', '2020-10-27', '466', 'ten', 'credit', 'd'], 1, "Row 5: Invalid amount 'ten'"),
+            (['1', '2020-10-27', '466', '-1', 'credit', 'd'], 1, "Row 5: Negative amount '-1.0'"),
+            (['1', '2020-10-27', '466', '1', 'refund', 'd'], 1, "Row 5: Invalid transaction type 'refund'"),
+            (['1', '2020-10-27', '466', '1', 'credit', '  '], 1, "Row 5: Empty description"),
+            (['1', '2020-10-27', '466', '1', 'credit'], 1, "Row 5: Empty description"),
+            (['1', '2020-10-27'], 1, "Row 5: Missing column 'customer_id'"),
+        ]
+        for fields, expected_id, message in cases:
+            with self.subTest(fields=fields):
+                transaction_id, values, error = self.validate(fields)
+                self.assertEqual(transaction_id, expected_id)
+                self.assertIsNone(values)
+                self.assertEqual(format_error(5, error), message)
+
+    def test_lenient_numbers_still_accepted(self):
+        """Inputs int() and float() accept stay valid, as before."""
+        transaction_id, values, error = self.validate([' +7 ', '2020-1-5', '1_000', '1e2', 'TRANSFER', 'x'])
+        self.assertIsNone(error)
+        self.assertEqual(transaction_id, 7)
+        self.assertEqual(values[1:4], (1000, 10000, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from unittest.mock import patch
+import io
+import glob
+import random
+from datetime import date
+from report_stats import ReportStats, partial_report
+from test_load_transactions import LoadTestCase
+
+
+class TestReportStats(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(18)
+        self.dates = [date(2019, 1, 1).toordinal() + rng.randrange(1200) for _ in range(5000)]
+        self.types = [rng.randrange(3) for _ in range(5000)]
+        self.amounts = [rng.randrange(100, 50001) * (-1 if t == 1 else 1) for t in self.types]  # Cents
+        self.amounts[1234] = 9000000  # Outliers
+        self.amounts[4321] = -7500000
+        self.customer_ids = [rng.randrange(1, 200) for _ in range(5000)]
+        self.stats = ReportStats()
+        self.stats.add(self.dates, self.types, self.amounts, self.customer_ids)
+
+    def test_sections_match_separate_passes(self):
+        """Test 18.1: Totals, counts, years and customers equal those of one loop per section."""
+        stats = self.stats
+        for code in range(3):
+            values = [a if code == 0 else abs(a) for a, t in zip(self.amounts, self.types) if t == code]
+            self.assertEqual(stats.type_totals[code], sum(values) / 100)
+            self.assertEqual(stats.type_counts[code], len(values))
+        self.assertEqual((stats.first_date, stats.last_date), (min(self.dates), max(self.dates)))
+
+        keys = ('credits', 'debits', 'transfers')
+        for year, data in stats.years.items():
+            for quarter, quarter_data in [(None, data)] + list(data['quarters'].items()):
+                rows = [(t, a) for d, t, a in zip(self.dates, self.types, self.amounts)
+                        if date.fromordinal(d).year == year
+                        and quarter in (None, (date.fromordinal(d).month - 1) // 3 + 1)]
+                self.assertEqual(quarter_data['count'], len(rows))
+                for code, key in enumerate(keys):
+                    self.assertEqual(quarter_data[key], sum(a if code == 0 else abs(a) for t, a in rows if t == code) / 100)
+
+        customers = {}
+        for cid, amount in zip(self.customer_ids, self.amounts):
+            customers[cid] = customers.get(cid, 0) + abs(amount)
+        expected = sorted(customers.items(), key=lambda x: x[1], reverse=True)[:5]
+        self.assertEqual(stats.top_customers(5), [(cid, total, 0) for cid, total in expected])
+
+    def test_anomalies_use_two_pass_threshold(self):
+        """Test 18.2: Anomalies are the amounts above the threshold from the mean's squared deviations."""
+        magnitudes = list(map(abs, self.amounts))
+        mean = sum(magnitudes) / len(magnitudes)
+        threshold = mean + 3 * (sum((x - mean) ** 2 for x in magnitudes) / len(magnitudes)) ** 0.5
+        expected = [slot for slot, x in enumerate(magnitudes) if x > threshold]
+        self.assertEqual(self.stats.anomalies(self.types, self.amounts, self.customer_ids), expected)
+        self.assertIn(1234, expected)
+        self.assertIn(4321, expected)
+        self.assertEqual(ReportStats().anomalies([], [], []), [])
+
+
+class TestParallelReport(LoadTestCase):
+    def setUp(self):
+        super().setUp()
+        # Quarter-dollar amounts add up exactly in any order, so serial and merged totals match
+        rng = random.Random(19)
+        types = ['credit', 'debit', 'transfer']
+        self.rows = [[str(tid), date.fromordinal(date(2018, 1, 1).toordinal() + rng.randrange(2000)).isoformat(),
+                      str(rng.randrange(1, 60)), f"{rng.randrange(4, 4000) / 4:.2f}", rng.choice(types), 'Row']
+                     for tid in range(1, 1001)]
+        self.rows[500][3] = '250000.00'  # Outlier
+        self.write_csv(self.test_csv, self.rows)
+        self.load()
+
+    def report(self, workers):
+        with patch('sys.stdout', new_callable=io.StringIO):
+            self.assertTrue(self.finance.generate_report(workers=workers))
+        with open(glob.glob('reports/report_*.txt')[0], encoding='utf-8') as file:
+            return file.read()
+
+    def test_merged_shards_match_serial(self):
+        """Test 19.1: Statistics merged from shards equal those of one serial pass."""
+        store = self.finance.transactions
+        columns = (store.dates, store.types, store.cents, store.customer_ids)
+        serial = ReportStats()
+        serial.add(*columns)
+        merged = ReportStats()
+        for start, end in ((0, 0), (0, 137), (137, 600), (600, 1000)):
+            merged.merge(partial_report(*(column[start:end] for column in columns)))
+        for name in ('count', 'first_date', 'last_date', 'type_totals', 'type_counts', 'years'):
+            self.assertEqual(getattr(merged, name), getattr(serial, name), name)
+        self.assertEqual(merged.top_customers(5), serial.top_customers(5))
+        self.assertEqual(merged.top_customers(5, 'count'), serial.top_customers(5, 'count'))
+        self.assertEqual(merged.anomalies(*columns[1:]), serial.anomalies(*columns[1:]))
+        self.assertEqual(merged.anomalies(*columns[1:]), [500])
+
+    def test_parallel_report_matches_serial(self):
+        """Test 19.2: A report gathered in worker processes is identical to the serial one."""
+        serial = self.report(None)
+        self.assertIn("ID 501: $", serial)
+        self.assertEqual(self.report(2), serial)
+
+
+if __name__ == '__main__':
+    unittest.main()
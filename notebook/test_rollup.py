@@ -0,0 +1,195 @@
+import unittest
+from unittest.mock import patch
+import io
+import os
+import random
+from datetime import date
+from aggregates import RunningTotals
+from report_stats import ReportStats
+from rollup import RollupCube, rollup_path
+from store import TransactionStore
+from test_load_transactions import LoadTestCase
+
+
+def make_store(count, seed=22):
+    rng = random.Random(seed)
+    store = TransactionStore()
+    start = date(2020, 1, 1).toordinal()
+    for i in range(1, count + 1):
+        type_code = rng.randrange(3)
+        amount = rng.randrange(1, 2000) * 25  # Cents
+        store.append_values(i, start + i * 900 // count, rng.randrange(1, 40),
+                            -amount if type_code == 1 else amount, type_code, 'Row')
+    return store
+
+
+def rebuilt(store):
+    return RollupCube.build(store.dates, store.types, store.cents, store.customer_ids)
+
+
+class TestRollupCube(unittest.TestCase):
+    def test_changes_match_rebuild(self):
+        """Test 22.1: After edits, the cube kept up to date row by row equals the cube rebuilt from every row."""
+        store = make_store(3000)
+        cube = store.rollups()
+        self.assertEqual(cube.partitions, rebuilt(store).partitions)
+        self.assertEqual(RunningTotals.from_cube(cube).differences(store.totals()), [])
+
+        with patch.object(RollupCube, 'build', side_effect=AssertionError("cube rebuilt")):
+            store.append_values(9001, date(2022, 9, 3).toordinal(), 7, 1250, 0, 'New')
+            store[10]['date'] = date(2020, 2, 29)
+            store[11]['amount'] = 99.75
+            store.remove(store[12])
+            store.update_slots(range(100, 200), customer_id=5)
+            store.remove_slots(range(300, 500))
+            store.remove_slots(range(len(store) - 30, len(store)))  # The last days, emptied
+            store.extend_columns([9002, 9003], [date(2023, 1, 1).toordinal()] * 2, [1, 2], [100, -200], [0, 1], [0, 0])
+            self.assertIs(store.rollups(), cube)
+        expected = rebuilt(store)
+        self.assertEqual(cube.partitions, expected.partitions)
+        self.assertEqual(cube.days, expected.days)
+        self.assertEqual(cube.date_range(), (min(store.dates), max(store.dates)))
+
+        del store[0:5]
+        self.assertEqual(store.rollups().partitions, rebuilt(store).partitions)
+
+    def test_sidecar_round_trip(self):
+        """Test 22.2: A saved cube reads back with its cells, days and source fingerprint."""
+        cube = make_store(500).rollups()
+        source = {'size': 1234, 'mtime': 5678, 'offset': 1234, 'fingerprint': 42, 'inode': (1, 2)}
+        cube.write('rollup_test.cube', source, 500)
+        try:
+            copy, saved = RollupCube.read('rollup_test.cube')
+            self.assertEqual(copy.partitions, cube.partitions)
+            self.assertEqual(copy.days, cube.days)
+            self.assertEqual(saved, dict(source, rows=500))
+            with open('rollup_test.cube', 'r+b') as file:
+                file.write(b'NOTACUBE')
+            with self.assertRaises(ValueError):
+                RollupCube.read('rollup_test.cube')
+        finally:
+            os.remove('rollup_test.cube')
+        self.assertEqual(rollup_path('data/transactions.csv'), os.path.join('data', 'transactions.cube'))
+        self.assertEqual(rollup_path('transactions.csv.gz'), 'transactions.csv.gz.cube')
+
+    def test_report_stats_from_cube(self):
+        """Test 22.3: Report statistics read off the cube equal those gathered from the rows."""
+        store = make_store(4000)
+        from_rows = ReportStats()
+        from_rows.add(store.dates, store.types, store.cents, store.customer_ids)
+        from_cube = ReportStats()
+        from_cube.add_cube(store.rollups(), store.customer_ids)
+        self.assertEqual(from_cube.count, from_rows.count)
+        self.assertEqual((from_cube.first_date, from_cube.last_date), (from_rows.first_date, from_rows.last_date))
+        self.assertEqual(from_cube.type_totals, from_rows.type_totals)
+        self.assertEqual(from_cube.type_counts, from_rows.type_counts)
+        self.assertEqual(from_cube.years, from_rows.years)
+        for by in ('volume', 'count'):
+            self.assertEqual(from_cube.top_customers(1000, by), from_rows.top_customers(1000, by))  # Ties included
+
+        # The cube lists customer 3 first (earlier month); the rows name customer 7 first
+        ties = TransactionStore()
+        ties.append_values(1, date(2021, 3, 1).toordinal(), 7, 500, 0, 'Row')
+        ties.append_values(2, date(2021, 1, 1).toordinal(), 3, 500, 0, 'Row')
+        from_cube = ReportStats()
+        from_cube.add_cube(ties.rollups(), ties.customer_ids)
+        self.assertEqual(from_cube.top_customers(2), [(7, 500, 0), (3, 500, 0)])
+
+
+class TestRollupSidecar(LoadTestCase):
+    def report(self):
+        with patch('sys.stdout', new_callable=io.StringIO):
+            self.assertTrue(self.finance.generate_report())
+
+    def test_report_reuses_and_extends_cube(self):
+        """Test 22.4: The first report saves the cube, later runs reuse it or add only appended rows, and rewrites rebuild it."""
+        with patch.object(RollupCube, 'build', side_effect=AssertionError("cube built at load")):
+            self.assertTrue(self.load()[0])
+        self.assertFalse(os.path.exists('test_transactions.cube'))
+        self.report()
+        self.assertEqual(RollupCube.read('test_transactions.cube')[1]['rows'], 5)
+
+        with patch.object(RollupCube, 'build', side_effect=AssertionError("cube rebuilt")):
+            self.assertTrue(self.load()[0])
+            with patch.object(RollupCube, 'write', side_effect=AssertionError("cube saved again")):
+                self.report()
+
+            with open(self.test_csv, 'a', encoding='utf-8', newline='') as file:
+                file.write('6,2022-02-14,789,250.00,credit,Bonus\n')
+            added = []
+            extend = RollupCube.extend
+
+            def record(cube, dates, *columns, **kwargs):
+                added.append(len(dates))
+                return extend(cube, dates, *columns, **kwargs)
+
+            with patch.object(RollupCube, 'extend', record):
+                self.assertTrue(self.load()[0])
+                self.report()
+            self.assertEqual(added, [1])  # Only the appended row
+
+        store = self.finance.transactions
+        self.assertEqual(store.rollups().partitions, rebuilt(store).partitions)
+        self.assertEqual(store.check_totals(), [])
+        saved, source = RollupCube.read('test_transactions.cube')
+        self.assertEqual(saved.partitions, store.rollups().partitions)
+        self.assertEqual((source['rows'], source['size']), (6, os.path.getsize(self.test_csv)))
+
+        self.write_csv(self.test_csv, self.rows[:3])
+        self.assertTrue(self.load()[0])
+        self.report()
+        self.assertEqual(self.finance.transactions.rollups().partitions, rebuilt(self.finance.transactions).partitions)
+        self.assertEqual(RollupCube.read('test_transactions.cube')[1]['rows'], 3)
+
+    def test_report_and_save_use_cube(self):
+        """Test 22.5: Reports read the cube kept up to date by edits, and the first report after saving writes a cube for the new file."""
+        self.load()
+        self.finance.transactions[0]['amount'] = 10.0
+        self.report()
+        self.assertFalse(os.path.exists('test_transactions.cube'))  # The rows no longer match the file
+        with open(os.path.join('reports', os.listdir('reports')[0]), encoding='utf-8') as file:
+            report = file.read()
+        self.assertIn("Total Credits: $4,510.00", report)
+
+        with patch('sys.stdout', new_callable=io.StringIO):
+            self.assertTrue(self.finance.save_transactions('saved.csv'))
+        self.assertFalse(os.path.exists('saved.cube'))
+        self.report()
+        saved, source = RollupCube.read('saved.cube')
+        self.assertEqual(saved.partitions, rebuilt(self.finance.transactions).partitions)
+        self.assertEqual(source['size'], os.path.getsize('saved.csv'))
+
+    def test_unwritable_cube_is_quiet(self):
+        """Test 22.6: A cube that cannot be saved is not tried at load, and only once by the reports."""
+        with patch.object(RollupCube, 'write', side_effect=PermissionError("Read-only directory")) as write:
+            self.assertTrue(self.load()[0])
+            self.assertEqual(write.call_count, 0)
+            self.report()
+            self.report()
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(self.read_errors_txt(), "")
+
+    def test_edited_middle_rows_rebuild_cube(self):
+        """Test 22.7: Rows rewritten in place anywhere in the file, then appended to, do not reuse the saved cube."""
+        rows = [[str(tid), f"2021-{tid % 12 + 1:02d}-01", str(tid % 9 + 1), '10.00', 'credit', 'Row']
+                for tid in range(1, 1001)]
+        self.write_csv(self.test_csv, rows)
+        self.load()
+        self.report()
+        with open(self.test_csv, 'r+b') as file:
+            data = file.read()
+            position = data.index(b'500,2021-09-01,6,10.00,credit')
+            file.seek(position)
+            file.write(b'500,2021-09-01,6,90.00,debit ')  # Same length, well past the first and last 4 KB
+        with open(self.test_csv, 'a', encoding='utf-8', newline='') as file:
+            file.write('1001,2022-02-14,789,250.00,credit,Bonus\n')
+        self.load()
+        self.report()
+        store = self.finance.transactions
+        self.assertEqual(store.get(500)['type'], 'debit')
+        self.assertEqual(store.rollups().partitions, rebuilt(store).partitions)
+        self.assertEqual(RollupCube.read('test_transactions.cube')[0].partitions, rebuilt(store).partitions)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import patch
+import io
+import os
+from row_index import RowIndex, index_path
+from test_load_transactions import LoadTestCase
+
+
+class TestLazyLoad(LoadTestCase):
+    rows = LoadTestCase.rows + [
+        ['6', 'not-a-date', '1', '1.00', 'credit', 'Invalid row'],
+        ['6', '2022-02-01', '2', '2.00', 'credit', 'Duplicate of an invalid row'],
+        ['7', '2022-02-02', '3', '3.00', 'debit', '"Quoted, with comma"'],
+        ['1', '2022-02-03', '4', '4.00', 'credit', 'Duplicate'],
+    ] + [[str(i), '2023-01-01', str(i), f'{i}.50', 'transfer', f'Row {i}'] for i in range(8, 60)]
+
+    def test_pages_match_full_load(self):
+        """Test 9.1: Pages and ID lookups read on demand match a full load."""
+        result, output = self.load(lazy=True)
+        self.assertTrue(result)
+        self.assertTrue(self.finance.is_lazy)
+        self.assertIn("rows are read when needed", output)
+        self.assertEqual(len(self.finance.transactions), 0)
+
+        lazy = self.finance._lazy
+        forward, row = [], 0
+        while row < len(lazy):
+            page, row = lazy.page_after(row, 10)
+            forward += page
+        backward, row = [], len(lazy)
+        while row > 0:
+            page, row = lazy.page_before(row, 7)
+            backward = page + backward
+
+        self.load()
+        expected = [dict(t) for t in self.finance.transactions]
+        self.assertEqual(forward, expected)
+        self.assertEqual(backward, expected)
+        for transaction in expected:
+            self.assertEqual(lazy.get(transaction['transaction_id']), transaction)
+        self.assertIsNone(lazy.get(6))  # Its first row is invalid
+        self.assertIsNone(lazy.get(1000))
+
+    def test_index_reused_until_file_changes(self):
+        """Test 9.2: The saved index is memory-mapped on the next open and rebuilt once stale."""
+        self.load(lazy=True)
+        self.assertTrue(os.path.exists(index_path(self.test_csv)))
+        index = RowIndex.open(self.test_csv)
+        self.assertIsInstance(index.offsets, memoryview)
+
+        self.write_csv(self.test_csv, self.rows + [['500', '2024-01-01', '5', '5.00', 'credit', 'Appended']])
+        index = RowIndex.open(self.test_csv)
+        self.assertNotIsInstance(index.offsets, memoryview)
+        self.assertEqual(index.find(500), len(self.rows))
+
+    def test_multiline_falls_back(self):
+        """Test 9.3: A file with line breaks inside fields is loaded in full."""
+        self.write_csv(self.test_csv, self.rows[:5] + [['100', '2022-01-01', '1', '1.00', 'credit', 'Two\nlines']])
+        result, output = self.load(lazy=True)
+        self.assertTrue(result)
+        self.assertFalse(self.finance.is_lazy)
+        self.assertIn("loading it in full", output)
+        self.assertEqual(len(self.finance.transactions), 6)
+
+    def test_analysis_loads_all_rows(self):
+        """Test 9.4: Operations that need every row load the file first."""
+        self.load(lazy=True)
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            self.assertTrue(self.finance.analyze_transactions())
+        self.assertIn("Loading all rows", mock_stdout.getvalue())
+        self.assertFalse(self.finance.is_lazy)
+        self.assertEqual(len(self.finance.transactions), 58)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import random
+import shutil
+import tempfile
+from snapshot_store import SnapshotStore
+
+
+def make_lines(count, seed=1):
+    rng = random.Random(seed)
+    return [f"{i},2021-01-{rng.randint(1, 28):02d},{rng.randint(100, 999)},{rng.uniform(1, 900):.2f},credit,Row {i}\n".encode()
+            for i in range(count)]
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.store = SnapshotStore(os.path.join(self.workdir, 'snapshots'), keep=3)
+        self.source = os.path.join(self.workdir, 'input.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def save(self, lines):
+        with open(self.source, 'wb') as file:
+            file.writelines(lines)
+        return self.store.save_file(self.source)
+
+    def restored(self, snapshot_id):
+        destination = os.path.join(self.workdir, 'restored.csv')
+        self.store.restore(snapshot_id, destination)
+        with open(destination, 'rb') as file:
+            return file.read()
+
+    def test_identical_input_is_not_stored_again(self):
+        """Test 7.1: Saving unchanged content returns the existing snapshot."""
+        lines = make_lines(20000)
+        first, created = self.save(lines)
+        self.assertTrue(created)
+        second, created = self.save(lines)
+        self.assertFalse(created)
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.store.list_snapshots()), 1)
+
+    def test_changes_store_only_new_chunks(self):
+        """Test 7.2: An edited file shares its unchanged chunks and each version restores exactly."""
+        lines = make_lines(20000)
+        first, _ = self.save(lines)
+        chunk_count = len(self.store.list_snapshots()[0]['chunks'])
+        self.assertGreater(chunk_count, 4)
+
+        edited = lines[:5000] + [b"99999,2021-02-02,100,1.00,debit,Inserted\n"] + lines[5000:15000] + lines[15001:]
+        writer = self.store.writer(self.source)
+        for line in edited:
+            writer.write(line)
+        second, created = writer.commit()
+        self.assertTrue(created)
+        self.assertLessEqual(writer.new_chunks, 4)
+
+        self.assertEqual(self.restored(first), b''.join(lines))
+        self.assertEqual(self.restored(second), b''.join(edited))
+
+    def test_retention(self):
+        """Test 7.3: Old snapshots beyond `keep` are removed with their unused chunks."""
+        ids = [self.save(make_lines(3000, seed))[0] for seed in range(5)]
+        self.assertEqual([manifest['id'] for manifest in self.store.list_snapshots()], ids[2:])
+        with self.assertRaises(KeyError):
+            self.restored(ids[0])
+        used = {digest for manifest in self.store.list_snapshots() for digest in manifest['chunks']}
+        stored = {name for _, _, names in os.walk(os.path.join(self.store.root, 'objects')) for name in names}
+        self.assertEqual(stored, used)
+
+    def test_damaged_chunk(self):
+        """Test 7.4: A damaged chunk is reported and the destination is left alone."""
+        snapshot_id, _ = self.save(make_lines(2000))
+        digest = self.store.list_snapshots()[0]['chunks'][0]
+        with open(self.store.chunk_path(digest), 'wb') as file:
+            file.write(b'not zlib')
+        destination = os.path.join(self.workdir, 'restored.csv')
+        with self.assertRaises(ValueError):
+            self.store.restore(snapshot_id, destination)
+        self.assertFalse(os.path.exists(destination))
+
+
+if __name__ == '__main__':
+    unittest.main()
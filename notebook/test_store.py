@@ -0,0 +1,311 @@
+import unittest
+import random
+from array import array
+from datetime import datetime
+from itertools import compress
+from id_index import IdIndex
+from store import TransactionStore, TransactionRow
+
+
+def make_transaction(transaction_id, date_str='2020-10-26', customer_id=926, amount=10.0,
+                     transaction_type='credit', description='Test'):
+    return {
+        'transaction_id': transaction_id,
+        'date': datetime.strptime(date_str, '%Y-%m-%d').date(),
+        'customer_id': customer_id,
+        'amount': amount,
+        'type': transaction_type,
+        'description': description
+    }
+
+
+class TestTransactionStore(unittest.TestCase):
+    def setUp(self):
+        """Build a small store from plain transaction dicts."""
+        self.rows = [
+            make_transaction(1, '2020-10-26', 926, 6478.39, 'credit', 'Online purchase - Electronics'),
+            make_transaction(2, '2020-10-27', 466, -100.50, 'debit', 'Grocery shopping'),
+            make_transaction(3, '2021-03-15', 123, 2500.00, 'transfer', 'Savings account transfer'),
+            make_transaction(4, '2021-06-20', 926, -89.99, 'debit', 'Grocery shopping'),
+        ]
+        self.store = TransactionStore(self.rows)
+
+    def test_rows_round_trip(self):
+        """Rows read back equal the dicts they were built from."""
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(list(self.store), self.rows)
+        self.assertEqual(self.store[-1], self.rows[-1])
+        self.assertEqual(self.store[1:3], self.rows[1:3])
+        self.assertIsInstance(self.store[0], TransactionRow)
+
+    def test_descriptions_encoded_once(self):
+        """Repeated descriptions share one table entry."""
+        self.assertEqual(len(self.store.description_table), 3)
+        self.assertEqual(self.store.description_codes[1], self.store.description_codes[3])
+
+    def test_row_update(self):
+        """Updating a row view writes through to the columns."""
+        row = self.store.get(1)
+        row.update({'date': datetime(2025, 5, 22).date(), 'amount': -200.75, 'type': 'debit',
+                    'description': 'Updated'})
+        self.assertEqual(self.store[0]['date'], datetime(2025, 5, 22).date())
+        self.assertEqual(self.store.amounts[0], -200.75)
+        self.assertEqual(self.store[0]['type'], 'debit')
+        self.assertEqual(self.store[0]['description'], 'Updated')
+
+    def test_invalid_type_rejected(self):
+        """Unknown transaction types cannot be stored."""
+        with self.assertRaises(ValueError):
+            self.store.append(make_transaction(5, transaction_type='refund'))
+        with self.assertRaises(ValueError):
+            self.store[0]['type'] = 'refund'
+
+    def test_remove_and_stale_views(self):
+        """Views follow their row across deletions and fail once it is gone."""
+        first = self.store[0]
+        last = self.store[3]
+        self.store.remove(first)
+        self.assertEqual(len(self.store), 3)
+        self.assertIsNone(self.store.get(1))
+        self.assertEqual(last['transaction_id'], 4)
+        with self.assertRaises(KeyError):
+            first['amount']
+
+    def test_copy_is_plain_dict(self):
+        """copy() returns an independent dict."""
+        snapshot = self.store[0].copy()
+        self.store[0]['amount'] = 1.0
+        self.assertEqual(snapshot['amount'], 6478.39)
+        self.assertIsInstance(snapshot, dict)
+
+    def test_type_mask(self):
+        """Type masks select the rows of one type."""
+        self.assertEqual(self.store.type_mask('debit'), b'\x00\x01\x00\x01')
+
+    def test_removal_keeps_order(self):
+        """Removed rows leave the others in order, in views, columns and lookups."""
+        third = self.store.get(3)
+        self.store.remove(self.store.get(2))
+        self.assertEqual(third['description'], 'Savings account transfer')
+        self.assertEqual(self.store.find(4), 3)  # Slot kept until compaction
+        self.assertEqual(list(self.store.transaction_ids), [1, 3, 4])
+        self.assertEqual(self.store.find(4), 2)
+        self.assertEqual(third['amount'], 2500.00)
+        del self.store[0]
+        self.assertEqual(list(self.store), [self.rows[2], self.rows[3]])
+        self.assertEqual(self.store.type_mask('debit'), b'\x00\x01')
+
+    def test_id_index_matches_list(self):
+        """Lookups stay consistent with a plain list through random changes."""
+        rng = random.Random(5)
+        expected = [dict(row) for row in self.rows]
+
+        def first(transaction_id):
+            return next((row for row in expected if row['transaction_id'] == transaction_id), None)
+
+        for step in range(3000):
+            action = rng.random()
+            if action < 0.4 or not expected:
+                row = make_transaction(rng.randint(1, 400), amount=float(step))
+                expected.append(row)
+                self.store.append(row)
+            elif action < 0.6:
+                victim = first(rng.choice(expected)['transaction_id'])
+                expected.remove(victim)
+                self.store.remove(self.store.get(victim['transaction_id']))
+            elif action < 0.75:
+                row = first(rng.choice(expected)['transaction_id'])
+                self.store.get(row['transaction_id'])['amount'] = -float(step)
+                row['amount'] = -float(step)
+            elif action < 0.85:
+                row = first(rng.choice(expected)['transaction_id'])
+                new_id = rng.randint(1, 400)
+                self.store.get(row['transaction_id'])['transaction_id'] = new_id
+                row['transaction_id'] = new_id
+            elif action < 0.9:
+                slot = rng.randrange(len(expected))
+                row = make_transaction(rng.randint(1, 400), amount=float(step))
+                expected.insert(slot, row)
+                self.store.insert(slot, row)
+            elif action < 0.95:
+                self.assertEqual(list(self.store), expected)
+            for transaction_id in (rng.randint(1, 400) for _ in range(3)):
+                self.assertEqual(self.store.get(transaction_id), first(transaction_id))
+        self.assertEqual(len(self.store), len(expected))
+        self.assertEqual(list(self.store), expected)
+
+    def test_next_id_stays_above_existing(self):
+        """New IDs exceed every ID added, edited or handed out, and are not reused after removals."""
+        store = TransactionStore([make_transaction(5), make_transaction(3)])
+        self.assertEqual(store.next_id(), 6)
+        store.append(make_transaction(40))
+        self.assertEqual(store.next_id(), 41)
+        store.get(3)['transaction_id'] = 100
+        self.assertEqual(list(store.reserve_ids(3)), [101, 102, 103])
+        store.extend_columns([200, 150], [737000] * 2, [1] * 2, [100] * 2, [0] * 2, [0] * 2)
+        store.insert(0, make_transaction(300))
+        store.remove(store.get(300))
+        self.assertEqual(store.next_id(), 301)
+        self.assertEqual(len(store.reserve_ids(0)), 0)
+        store.clear()
+        self.assertEqual(store.next_id(), 1)
+
+    def test_index_removal_shifts_entries(self):
+        """Removing from a crowded hash table keeps every other key reachable."""
+        rng = random.Random(9)
+        keys = array('q', rng.sample(range(-10 ** 12, 10 ** 12), 5000))
+        index = IdIndex.build(keys)
+        removed = set(rng.sample(range(len(keys)), 2500))
+        for slot in removed:
+            self.assertTrue(index.discard(keys[slot], slot))
+        self.assertEqual(len(index), 2500)
+        for slot, key in enumerate(keys):
+            self.assertEqual(index.find(key), None if slot in removed else slot)
+
+    def test_select_matches_scan(self):
+        """Indexed filters match a scan of the rows through adds, updates and removals."""
+        rng = random.Random(11)
+        store = TransactionStore()
+        for i in range(5000):
+            store.append_values(i, 737000 + rng.randrange(800), rng.randint(1, 30), 100, rng.randrange(3), 'Row')
+
+        def check():
+            # Query before reading the rows, which compacts the store and drops the indexes
+            results = []
+            for _ in range(10):
+                query = (rng.choice([None, 'credit', 'debit', 'transfer']), rng.choice([None, 2018, 2019, 2020]),
+                         rng.choice([None, None, rng.randint(1, 12)]), rng.choice([None, rng.randint(1, 31)]))
+                selection = store.select(*query)
+                page = rng.randrange(len(selection)) if selection else 0
+                results.append((query, len(selection), page,
+                                [store.row(slot)['transaction_id'] for slot in selection],
+                                [store.row(slot)['transaction_id'] for slot in selection[page:page + 10]]))
+            rows = list(store)
+            for (transaction_type, year, month, customer_id), count, page, selected, paged in results:
+                expected = [row['transaction_id'] for row in rows
+                            if transaction_type in (None, row['type']) and year in (None, row['date'].year)
+                            and month in (None, row['date'].month) and customer_id in (None, row['customer_id'])]
+                self.assertEqual(selected, expected)
+                self.assertEqual(count, len(expected))
+                self.assertEqual(paged, expected[page:page + 10])
+
+        check()
+        store.select('credit')  # Build the indexes so the changes below update them
+        for i in range(300):
+            row = store.get(rng.randrange(5000 + i))
+            if row is None:
+                continue
+            row.update({'type': rng.choice(['credit', 'debit']), 'customer_id': rng.randint(1, 31),
+                        'date': datetime(2020, rng.randint(1, 12), 1).date()})
+            store.remove(store.get(rng.randrange(5000 + i)) or row)
+            store.append_values(5000 + i, 737500, 31, 200, 2, 'New')
+        check()
+        store.select('credit')
+        store.extend_columns(range(9000, 9100), [737600] * 100, [7] * 100, [100] * 100, [0] * 100, [0] * 100)
+        check()
+
+    def test_dense_postings_change_in_place(self):
+        """Adding and removing rows sets and clears bits of the dense postings without copying them."""
+        store = TransactionStore()
+        store.extend_columns(range(1, 4001), [737000 + i % 400 for i in range(4000)], [i % 3 + 1 for i in range(4000)],
+                             [100] * 4000, [i % 3 for i in range(4000)], [0] * 4000)
+        store.description_table.append('Row')
+        before = store.select('credit', customer_id=1)
+        bitmaps = {field: store._secondary[field].get(key) for field, key in (('type', 0), ('customer_id', 1))}
+        self.assertTrue(all(isinstance(bitmap, bytearray) for bitmap in bitmaps.values()))
+
+        store.remove(store.get(1))
+        store.get(4)['type'] = 'debit'
+        for i in range(4001, 4101):
+            store.append_values(i, 737000, 1, 100, 0, 0)
+        for field, key in (('type', 0), ('customer_id', 1)):
+            self.assertIs(store._secondary[field].get(key), bitmaps[field])
+        after = [store.row(slot)['transaction_id'] for slot in store.select('credit', customer_id=1)]
+        self.assertEqual(after, [tid for tid in range(7, 4001, 3)] + list(range(4001, 4101)))
+        self.assertEqual(len(before), 1334)  # Taken before the changes, and unaffected by them
+
+    def test_customers_match_scan(self):
+        """The customer registry matches a scan of the rows through adds, updates and removals."""
+        rng = random.Random(13)
+        store = TransactionStore()
+        for i in range(2000):
+            store.append_values(i, 737000 + rng.randrange(400), rng.randint(0, 60), 100, rng.randrange(3), 'Row')
+
+        def check():
+            customers = store.customers()
+            latest = {}
+            for row in store:
+                if row['customer_id'] > 0:
+                    day = latest.get(row['customer_id'])
+                    latest[row['customer_id']] = row['date'] if day is None else max(day, row['date'])
+            self.assertEqual(len(customers), len(latest))
+            self.assertEqual(customers.sorted_ids(), sorted(latest))
+            self.assertEqual(customers.sorted_ids(10), sorted(latest)[:10])
+            self.assertEqual(customers.recent(10), sorted(latest, key=lambda cid: (-latest[cid].toordinal(), cid))[:10])
+            for customer_id in rng.sample(sorted(latest), 5):
+                self.assertEqual(customers.latest(customer_id), latest[customer_id])
+            self.assertIsNone(customers.latest(0))
+
+        check()
+        for i in range(500):
+            row = store.get(rng.randrange(2000 + i))
+            if row is None:
+                continue
+            if rng.random() < 0.5:
+                row.update({'customer_id': rng.randint(1, 70), 'date': datetime(2021, rng.randint(1, 12), 1).date()})
+            else:
+                store.remove(row)
+            store.append_values(2000 + i, 737000 + rng.randrange(400), rng.randint(1, 70), 200, 2, 'New')
+            if i % 100 == 0:
+                check()
+        store.extend_columns(range(9000, 9050), [738500] * 50, [99] * 50, [100] * 50, [0] * 50, [0] * 50)
+        store.insert(0, make_transaction(9999, '2023-01-01', customer_id=100))
+        check()
+        self.assertEqual(store.customers().recent(2), [100, 99])
+
+    def test_totals_match_recompute(self):
+        """Running totals agree with a full recompute through adds, updates and removals."""
+        rng = random.Random(17)
+        store = TransactionStore()
+        for i in range(2000):
+            store.append_values(i, 737000 + rng.randrange(900), rng.randint(1, 40), rng.randrange(100, 50001),
+                                rng.randrange(3), 'Row')
+        totals = store.totals()
+        self.assertEqual(totals.counts, [store.type_mask(name).count(1) for name in ('credit', 'debit', 'transfer')])
+        for i in range(600):
+            row = store.get(rng.randrange(2000 + i))
+            action = rng.random()
+            if row is None:
+                pass
+            elif action < 0.3:
+                row[rng.choice(['amount', 'customer_id'])] = rng.randint(1, 40)
+            elif action < 0.5:
+                row.update({'type': rng.choice(['credit', 'debit', 'transfer']),
+                            'date': datetime(2019, rng.randint(1, 12), 28).date()})
+            elif action < 0.7:
+                store.remove(row)
+            else:
+                store.update_slots([rng.randrange(len(store))], amount=1.25, transaction_type='debit')
+            store.append_values(2000 + i, 737000 + rng.randrange(900), rng.randint(1, 40), 350, rng.randrange(3), 'New')
+            if i % 150 == 0:
+                self.assertEqual(store.check_totals(), [])
+        store.extend_columns(range(5000, 5010), [738000] * 10, [41] * 10, [250] * 10, [2] * 10, [0] * 10)
+        store.insert(0, make_transaction(6000, customer_id=42, amount=-7.0, transaction_type='debit'))
+        self.assertEqual(store.check_totals(), [])
+        self.assertIs(store.totals(), totals)
+        self.assertEqual(totals.customers[41], [10, 2500])
+        self.assertEqual(totals.total(1), sum(abs(a) for a in compress(store.cents, store.type_mask('debit'))) / 100)
+
+        totals.add(737000, 0, 100, 1)  # Corrupted on purpose
+        self.assertEqual(len(store.check_totals()), 4)
+
+    def test_memory_per_row(self):
+        """Columns take a few dozen bytes per transaction."""
+        store = TransactionStore()
+        for i in range(1000):
+            store.append_values(i, 737000 + i % 365, 100 + i % 50, 1000, i % 3, 'Repeated description')
+        self.assertLess(store.nbytes() / len(store), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
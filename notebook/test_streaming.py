@@ -0,0 +1,98 @@
+import unittest
+from unittest.mock import patch
+import io
+import glob
+import os
+import random
+from datetime import date
+from parsing import compile_validator
+from streaming import BloomFilter, find_suspects, stream_batches
+from test_load_transactions import LoadTestCase
+
+POSITIONS = (0, 1, 2, 3, 4, 5)
+
+
+class TestStreamBatches(unittest.TestCase):
+    def test_suspects_and_duplicates(self):
+        """Test 25.1: The ID pass keeps every repeated ID, and batches reject exactly the repeats a load would."""
+        ids = list(range(1, 3001)) + [17, 2999, 17]
+        bloom = BloomFilter(2000)  # Small on purpose: plenty of false positives
+        self.assertGreater(sum(bloom.add(i) for i in range(1, 3001)), 0)
+        self.assertTrue(all(bloom.add(i) for i in range(1, 3001)))  # Never a false negative
+
+        records = [[str(tid), '2021-01-01', '5', '1.00', 'credit', 'Row'] for tid in ids]
+        records[10][3] = 'oops'  # Invalid, but its ID still counts as seen
+        records.append(['11', '2021-01-02', '5', '2.00', 'credit', 'Repeats the invalid row'])
+        records.append(['x', '2021-01-02', '5', '2.00', 'credit', 'No ID'])
+        suspects = find_suspects(iter([[]] + records), 0, 2000)
+        self.assertTrue({17, 2999, 11} <= suspects)
+        self.assertLess(len(suspects), 3000)
+
+        rejected = []
+        batches = list(stream_batches(iter(records), compile_validator(POSITIONS), suspects,
+                                      lambda row, error, fields: rejected.append((row, error[0])), batch_rows=1000))
+        self.assertEqual([len(batch[0]) for batch in batches], [1000, 1000, 999])
+        self.assertEqual([tid for batch in batches for tid in batch[0]], [tid for tid in range(1, 3001) if tid != 11])
+        self.assertEqual(rejected, [(12, 'invalid_amount'), (3002, 'duplicate_id'), (3003, 'duplicate_id'),
+                                    (3004, 'duplicate_id'), (3005, 'duplicate_id'), (3006, 'invalid_id')])
+        self.assertEqual(batches[0][3][0], 100)  # Cents
+
+
+class TestStreamingAnalysis(LoadTestCase):
+    def setUp(self):
+        super().setUp()
+        rng = random.Random(25)
+        types = ['credit', 'debit', 'transfer']
+        self.rows = [[str(tid), date.fromordinal(date(2019, 1, 1).toordinal() + rng.randrange(1500)).isoformat(),
+                      str(rng.randrange(1, 80)), f"{rng.uniform(1, 2000):.2f}", rng.choice(types), 'Row']
+                     for tid in range(1, 3001)]
+        self.rows[700][3] = '95000.00'  # Outlier
+        self.rows += [['42', '2020-05-05', '3', '10.00', 'credit', 'Duplicate'],
+                      ['3001', 'not a date', '3', '10.00', 'credit', 'Invalid']]
+        self.write_csv(self.test_csv, self.rows)
+
+    def report(self, **kwargs):
+        with patch('sys.stdout', new_callable=io.StringIO):
+            self.assertTrue(self.finance.generate_report(**kwargs))
+        path = glob.glob('reports/report_*.txt')[0]
+        with open(path, encoding='utf-8') as file:
+            report = file.read()
+        os.remove(path)
+        return report
+
+    def test_streamed_report_matches_loaded(self):
+        """Test 25.2: A report streamed from the CSV equals the one of the loaded file, for each detector."""
+        for detector in ('zscore', 'customer', 'mad'):
+            streamed = self.report(anomaly_detector=detector, source=self.test_csv)
+            self.assertEqual(len(self.finance.transactions), 0)  # Nothing was loaded
+            self.assertIn("Total Transactions: 3,000", streamed)
+            self.assertIn("ID 701: $95,000.00", streamed)
+            self.load()
+            self.assertEqual(streamed, self.report(anomaly_detector=detector))
+            self.finance.transactions = []
+        errors = self.read_errors_txt()
+        self.assertIn("Duplicate transaction_id '42'", errors)
+        self.assertIn("Invalid date format: 'not a date'", errors)
+
+    def test_streamed_analysis_matches_loaded(self):
+        """Test 25.3: Streamed analysis prints the loaded file's summary, range totals and windows."""
+        def analyze(**kwargs):
+            with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+                self.assertTrue(self.finance.analyze_transactions(**kwargs))
+            return mock_stdout.getvalue()
+
+        for start, end in ((None, None), (date(2020, 3, 1), date(2021, 2, 28))):
+            streamed = analyze(start=start, end=end, windows=(30, 365), source=self.test_csv)
+            self.assertIn(f"Streamed 3,000 transactions from '{self.test_csv}'.", streamed)
+            self.load()
+            self.assertTrue(streamed.endswith(analyze(start=start, end=end, windows=(30, 365))))
+            self.finance.transactions = []
+
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            self.assertFalse(self.finance.analyze_transactions(source='missing.csv'))
+            self.assertFalse(self.finance.generate_report(source='missing.csv'))
+        self.assertIn("File 'missing.csv' not found.", mock_stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
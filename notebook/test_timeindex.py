@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch
+import io
+import random
+from datetime import date, timedelta
+from store import TransactionStore
+from timeindex import FenwickTree, TimeIndex
+from test_load_transactions import LoadTestCase
+
+
+def brute_force(store, start, end):
+    rows = [(t, abs(a)) for d, t, a in zip(store.dates, store.types, store.cents)
+            if start.toordinal() <= d <= end.toordinal()]
+    cents = [sum(a for t, a in rows if t == code) for code in range(3)]
+    return {'credits': cents[0] / 100, 'debits': cents[1] / 100, 'transfers': cents[2] / 100,
+            'net_balance': (cents[0] - cents[1]) / 100, 'count': len(rows)}
+
+
+class TestTimeIndex(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(23)
+        self.rng = rng
+        self.store = TransactionStore()
+        start = date(2021, 1, 1).toordinal()
+        for i in range(1, 2001):
+            type_code = rng.randrange(3)
+            amount = rng.randrange(100, 90001)  # Cents
+            self.store.append_values(i, start + rng.randrange(700), rng.randrange(1, 50),
+                                     -amount if type_code == 1 else amount, type_code, 'Row')
+
+    def random_range(self):
+        first = date(2020, 12, 1) + timedelta(days=self.rng.randrange(800))
+        return first, first + timedelta(days=self.rng.randrange(120))
+
+    def test_fenwick_tree(self):
+        """Test 23.1: Prefix sums and recovered values match the plain list through updates."""
+        values = [self.rng.randrange(-50, 50) for _ in range(300)]
+        tree = FenwickTree(values)
+        for _ in range(200):
+            position, delta = self.rng.randrange(300), self.rng.randrange(-9, 10)
+            tree.add(position, delta)
+            values[position] += delta
+        self.assertEqual(list(tree.values()), values)
+        for end in (0, 1, 17, 128, 299, 300, 400):
+            self.assertEqual(tree.prefix(end), sum(values[:end]))
+
+    def test_ranges_follow_changes(self):
+        """Test 23.2: Range totals, counts and rolling windows match a scan of the rows after every kind of change."""
+        store = self.store
+        index = store.time_index()
+        for _ in range(50):
+            start, end = self.random_range()
+            self.assertEqual(index.summary(start, end), brute_force(store, start, end))
+
+        store.append_values(5001, date(2019, 6, 1).toordinal(), 1, 1000, 0, 'Before the span')
+        store.append_values(5002, date(2026, 2, 1).toordinal(), 1, -2000, 1, 'After the span')
+        store[3]['date'] = date(2022, 3, 3)
+        store[4]['amount'] = 1234.56
+        store[5]['type'] = 'transfer'
+        store.remove(store[6])
+        store.update_slots(range(10, 20), amount=5.0)
+        store.extend_columns([5003], [date(2021, 5, 5).toordinal()], [2], [-325], [1], [0])
+        self.assertIs(store.time_index(), index)
+        for _ in range(50):
+            start, end = self.random_range()
+            self.assertEqual(index.summary(start, end), brute_force(store, start, end))
+        self.assertEqual(index.date_range(), (date(2019, 6, 1), date(2026, 2, 1)))
+        self.assertEqual(index.count(), len(store))
+        self.assertEqual(index.count(type_code=1), list(store.types).count(1))
+
+        windows = index.rolling(30, date(2021, 3, 1), date(2021, 4, 30), step=7)
+        self.assertEqual(len(windows), 9)
+        for day, window in windows:
+            self.assertEqual(window, brute_force(store, day - timedelta(days=29), day))
+
+        store.remove_slots(range(0, 500))  # Bulk: rebuilt on the next use
+        self.assertEqual(store.time_index().summary(), brute_force(store, date.min, date.max))
+        self.assertEqual(TimeIndex().summary()['count'], 0)
+        self.assertEqual(TimeIndex().rolling(30), [])
+
+
+class TestAnalyzeRange(LoadTestCase):
+    def test_analyze_date_range(self):
+        """Test 23.3: Analysis over a date range and trailing windows reads the time index."""
+        self.load()
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            self.assertTrue(self.finance.analyze_transactions(date(2020, 10, 1), date(2021, 6, 30), windows=(30, 365)))
+        output = mock_stdout.getvalue()
+        self.assertIn("Financial Summary (2020-10-01 to 2021-06-30):", output)
+        self.assertRegex(output, r"Transactions:\S* 4\n")
+        self.assertIn("$6,478.39", output)
+        self.assertIn("$190.49", output)
+        self.assertIn("Last 30 days:", output)
+        self.assertRegex(output, r"Last 365 days:.*net \$6,287\.90 \(4 transactions\)")
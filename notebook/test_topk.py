@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import patch
+import io
+import glob
+import random
+from collections import Counter
+from topk import ApproximateTopK, ExactTopK, SpaceSaving, make_ranking
+from test_load_transactions import LoadTestCase
+
+
+class TestTopK(unittest.TestCase):
+    def setUp(self):
+        # Skewed: a few heavy customers among many light ones
+        rng = random.Random(21)
+        self.customer_ids = [rng.randrange(1, 6) if rng.random() < 0.3 else rng.randrange(6, 5000)
+                             for _ in range(20000)]
+        self.amounts = [round(rng.uniform(1, 200), 2) * rng.choice((1, -1)) for _ in range(20000)]
+        self.volumes = {}
+        for cid, amount in zip(self.customer_ids, self.amounts):
+            self.volumes[cid] = self.volumes.get(cid, 0.0) + abs(amount)
+        self.counts = Counter(self.customer_ids)
+
+    def test_exact(self):
+        """Test 21.1: Exact rankings equal a full sort, ties in first-appearance order."""
+        ranking = ExactTopK()
+        ranking.add(self.customer_ids, self.amounts)
+        expected = sorted(self.volumes.items(), key=lambda x: x[1], reverse=True)[:7]
+        self.assertEqual(ranking.top(7), [(cid, total, 0) for cid, total in expected])
+        self.assertEqual(ranking.top(7, 'count'), [(cid, count, 0) for cid, count in self.counts.most_common(7)])
+
+        ties = ExactTopK()
+        ties.add([5, 3, 9, 3], [1.0, 1.0, 2.0, -1.0])
+        self.assertEqual(ties.top(3, 'count'), [(3, 2, 0), (5, 1, 0), (9, 1, 0)])
+
+    def check_bounds(self, ranking, by, truth):
+        top = ranking.top(10, by)
+        listed = {cid for cid, _, _ in top}
+        for cid, value, error in top:
+            self.assertLessEqual(value - error, truth[cid] + 1e-6)
+            self.assertGreaterEqual(value + 1e-6, truth[cid])
+        for cid, value in truth.items():
+            if cid not in listed and cid not in ranking.summaries[by].counters:
+                self.assertLessEqual(value, ranking.bound(by) + 1e-6)
+        # The heaviest customers are found despite the small capacity
+        exact = [cid for cid, _ in sorted(truth.items(), key=lambda x: x[1], reverse=True)[:3]]
+        self.assertEqual([cid for cid, _, _ in top[:3]], exact)
+
+    def test_space_saving_bounds(self):
+        """Test 21.2: Approximate rankings keep `capacity` counters and bound every error."""
+        ranking = make_ranking(50)
+        self.assertIsInstance(ranking, ApproximateTopK)
+        ranking.add(self.customer_ids, self.amounts)
+        self.assertGreater(len(self.volumes), 500)
+        for by, truth in (('volume', self.volumes), ('count', self.counts)):
+            self.assertLessEqual(len(ranking.summaries[by].counters), 50)
+            self.assertLessEqual(ranking.bound(by), sum(truth.values()) / 50 + 1e-6)
+            self.check_bounds(ranking, by, truth)
+
+        summary = SpaceSaving(2)
+        for weights in ({'a': 5}, {'b': 1}, {'c': 2}):
+            summary.update(weights)
+        self.assertEqual(summary.top(2), [('a', 5, 0), ('c', 3, 1)])
+
+    def test_merged_shards(self):
+        """Test 21.3: Rankings merged from shards keep their error bounds."""
+        merged = make_ranking(50)
+        for start in range(0, 20000, 6000):
+            part = make_ranking(50)
+            part.add(self.customer_ids[start:start + 6000], self.amounts[start:start + 6000])
+            merged.merge(part)
+        for by, truth in (('volume', self.volumes), ('count', self.counts)):
+            self.check_bounds(merged, by, truth)
+        with self.assertRaises(ValueError):
+            make_ranking(0)
+
+
+class TestReportRankings(LoadTestCase):
+    def report(self, **kwargs):
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            result = self.finance.generate_report(**kwargs)
+        return result, mock_stdout.getvalue()
+
+    def test_report_rankings(self):
+        """Test 21.4: The report ranks K customers by volume and count, exactly or approximately."""
+        self.load()
+        self.assertTrue(self.report(top_customers=2)[0])
+        with open(glob.glob('reports/report_*.txt')[0], encoding='utf-8') as file:
+            report = file.read()
+        self.assertIn("Top 2 Customers by Transaction Volume:\n  Customer ID 926: $6,568.38\n"
+                      "  Customer ID 789: $4,500.00\n", report)
+        self.assertIn("Top 2 Customers by Transaction Count:\n  Customer ID 926: 2 transactions\n"
+                      "  Customer ID 466: 1 transactions\n", report)
+
+        self.assertTrue(self.report(customer_capacity=2)[0])
+        with open(glob.glob('reports/report_*.txt')[0], encoding='utf-8') as file:
+            report = file.read()
+        self.assertIn("(Approximate: customers not listed have at most", report)
+
+        for kwargs in ({'top_customers': 0}, {'customer_capacity': -1}):
+            result, output = self.report(**kwargs)
+            self.assertFalse(result)
+            self.assertIn("must be positive", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,387 @@
+import csv
+import io
+import os
+from array import array
+from datetime import date, datetime
+from money import split_cents
+from store import TYPE_CODES
+
+REQUIRED_COLUMNS = ('transaction_id', 'date', 'customer_id', 'amount', 'type', 'description')
+
+# Range of the 64-bit integer columns in TransactionStore
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+# Rejected rows logged individually per reason before only counting them
+MAX_ERROR_EXAMPLES = 20
+# Rejected rows buffered before each bulk write to the quarantine CSV
+QUARANTINE_BATCH = 10000
+
+# Memo of date string -> ordinal for parse_iso_date, bounded so odd inputs cannot grow it forever
+DATE_CACHE_SIZE = 100000
+_date_cache = {}
+
+
+def column_positions(header):
+    """
+    Locate the required columns in a CSV header.
+
+    Duplicate column names resolve to the last occurrence, as with csv.DictReader.
+
+    Args:
+        header (list): Column names from the first CSV record.
+
+    Returns:
+        tuple: (positions, missing) where positions holds the index of each
+        required column in REQUIRED_COLUMNS order, or None if `missing` is not empty.
+    """
+    index = {name: i for i, name in enumerate(header)}
+    missing = set(REQUIRED_COLUMNS) - set(index)
+    if missing:
+        return None, missing
+    return tuple(index[name] for name in REQUIRED_COLUMNS), missing
+
+
+def format_error(row_num, error):
+    """Render a rejection as the log message used by load_transactions."""
+    reason, message, numbered = error
+    return f"Row {row_num}: {message}" if numbered else message
+
+
+def duplicate_error(transaction_id):
+    """Rejection for a transaction_id that was already seen."""
+    return ('duplicate_id', f"Duplicate transaction_id '{transaction_id}'", True)
+
+
+class ValidationReport:
+    """
+    Collects the rows rejected during a load.
+
+    Rejections are counted per reason and only the first `max_examples` of each
+    reason are logged, followed by one summary line, so a badly broken file
+    does not turn into one log call per row. Rejected records can also be
+    written unchanged to a quarantine CSV (with their row number and reason in
+    front) for fixing and reloading.
+
+    Args:
+        logger (logging.Logger): Logger for the examples and the summary.
+        max_examples (int): Rows logged per reason; None logs every rejected row.
+        quarantine (str): Path of the quarantine CSV, or None for no quarantine.
+        header (list): Column names of the file being loaded, for the quarantine header.
+        append (bool): Add to an existing quarantine file instead of replacing it.
+    """
+
+    def __init__(self, logger, max_examples=MAX_ERROR_EXAMPLES, quarantine=None, header=None, append=False):
+        self.logger = logger
+        self.max_examples = max_examples
+        self.counts = {}
+        self.quarantine = quarantine
+        self._file = None
+        self._writer = None
+        self._pending = []
+        self._closed = False
+        if quarantine:
+            new_file = not (append and os.path.exists(quarantine) and os.path.getsize(quarantine))
+            self._file = open(quarantine, 'a' if append else 'w', encoding='utf-8', newline='')
+            self._writer = csv.writer(self._file)
+            if new_file:
+                self._writer.writerow(['source_row', 'rejection_reason'] + list(header or REQUIRED_COLUMNS))
+
+    @property
+    def rejected(self):
+        """Total number of rejected rows."""
+        return sum(self.counts.values())
+
+    def reject(self, row_num, error, fields=None):
+        """
+        Record one rejected row.
+
+        Args:
+            row_num (int): Row number in the file (the header is row 1).
+            error (tuple): (reason, message, numbered) from the validator.
+            fields (list): The raw record, for the quarantine CSV.
+        """
+        reason = error[0]
+        count = self.counts.get(reason, 0) + 1
+        self.counts[reason] = count
+        if self.max_examples is None or count <= self.max_examples:
+            self.logger.error(format_error(row_num, error))
+        if self._writer and fields is not None:
+            self._pending.append([row_num, reason, *fields])
+            if len(self._pending) >= QUARANTINE_BATCH:
+                self._flush()
+
+    def summary(self):
+        """One line with the number of rejected rows per reason."""
+        reasons = ', '.join(f"{reason}: {count}" for reason, count in sorted(self.counts.items()))
+        return f"Rejected {self.rejected} rows ({reasons})"
+
+    def close(self):
+        """Write the remaining quarantined rows and log the summary; later calls do nothing."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._file:
+            self._flush()
+            self._file.close()
+        if self.counts:
+            suppressed = 0
+            if self.max_examples is not None:
+                suppressed = sum(max(0, count - self.max_examples) for count in self.counts.values())
+            note = f"; {suppressed} not logged individually" if suppressed else ''
+            self.logger.error(f"{self.summary()}{note}")
+
+    def _flush(self):
+        self._writer.writerows(self._pending)
+        self._pending = []
+
+
+def parse_iso_date(date_str):
+    """
+    Return the date ordinal of a 'YYYY-MM-DD' string.
+
+    Accepts exactly what datetime.strptime(date_str, '%Y-%m-%d') accepts. The
+    canonical ten-character form is parsed by hand, anything else (single-digit
+    months, non-ASCII digits, ...) goes through strptime. Results are memoized,
+    since a file has far fewer distinct dates than rows.
+
+    Raises:
+        ValueError: If strptime would reject the string.
+    """
+    ordinal = _date_cache.get(date_str)
+    if ordinal is not None:
+        return ordinal
+    if (len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-' and date_str.isascii()
+            and date_str[:4].isdigit() and date_str[5:7].isdigit() and date_str[8:].isdigit()):
+        ordinal = date(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:])).toordinal()
+    else:
+        ordinal = datetime.strptime(date_str, '%Y-%m-%d').toordinal()
+    if len(_date_cache) < DATE_CACHE_SIZE:
+        _date_cache[date_str] = ordinal
+    return ordinal
+
+
+def compile_validator(positions):
+    """
+    Build the record validator for a file's column layout.
+
+    Column positions and lookups are bound once, so validating a record is a
+    single call with no per-row dict building.
+
+    Args:
+        positions (tuple): Column indexes from column_positions().
+
+    Returns:
+        function: validate(fields) -> (transaction_id, values, error). transaction_id
+        is None if it could not be parsed; it is reported even when another field is
+        invalid, because load_transactions counts it as seen for duplicate detection
+        either way. values is (date ordinal, customer_id, amount in signed cents,
+        type code, description) for a valid record, otherwise None and error is a
+        (reason, message, numbered) tuple for format_error().
+    """
+    id_pos, date_pos, customer_pos, amount_pos, type_pos, description_pos = positions
+    min_size = max(positions[:5]) + 1
+    type_codes = TYPE_CODES
+    debit_code = TYPE_CODES['debit']
+    parse_date = parse_iso_date
+    parse_amount = split_cents
+
+    def validate(fields):
+        size = len(fields)
+        if size < min_size:
+            return _validate_short(fields, positions)
+
+        # Validate transaction_id
+        try:
+            transaction_id = int(fields[id_pos])
+        except ValueError:
+            return None, None, ('invalid_id', f"Invalid transaction_id '{fields[id_pos]}'", True)
+        if not INT64_MIN <= transaction_id <= INT64_MAX:
+            return None, None, ('invalid_id', f"Invalid transaction_id '{fields[id_pos]}'", True)
+
+        # Validate date
+        date_str = fields[date_pos].strip()
+        try:
+            date_ordinal = parse_date(date_str)
+        except ValueError:
+            return transaction_id, None, ('invalid_date', f"Invalid date format: '{date_str}'", False)
+
+        # Validate customer_id
+        try:
+            customer_id = int(fields[customer_pos])
+        except ValueError:
+            customer_id = None
+        if customer_id is None or customer_id > INT64_MAX:
+            return transaction_id, None, ('invalid_customer_id', f"Invalid customer_id: '{fields[customer_pos]}'", False)
+        if customer_id <= 0:
+            return transaction_id, None, ('non_positive_customer_id', f"Non-positive customer_id: '{customer_id}'", False)
+
+        # Validate amount, parsed exactly into cents; the sign is checked before rounding, so '-0.001' is negative
+        try:
+            negative, amount = parse_amount(fields[amount_pos])
+        except ValueError:
+            return transaction_id, None, ('invalid_amount', f"Invalid amount '{fields[amount_pos]}'", True)
+        if negative:
+            # Shown as the float-based loader showed it; amounts that round to zero cents as written
+            shown = -amount / 100 if amount else fields[amount_pos].strip()
+            return transaction_id, None, ('negative_amount', f"Negative amount '{shown}'", True)
+
+        # Validate type
+        raw_type = fields[type_pos]
+        type_code = type_codes.get(raw_type)
+        if type_code is None:
+            transaction_type = raw_type.strip().lower()
+            type_code = type_codes.get(transaction_type)
+            if type_code is None:
+                return transaction_id, None, ('invalid_type', f"Invalid transaction type '{transaction_type}'", True)
+
+        # Adjust amount for debit
+        if type_code == debit_code:
+            amount = -amount
+
+        # Validate description
+        description = fields[description_pos].strip() if description_pos < size else ''
+        if not description:
+            return transaction_id, None, ('empty_description', "Empty description", True)
+
+        return transaction_id, (date_ordinal, customer_id, amount, type_code, description), None
+
+    return validate
+
+
+def _validate_short(fields, positions):
+    """Report the first required column missing from a short record."""
+    size = len(fields)
+    id_pos = positions[0]
+    if id_pos >= size:
+        return None, None, ('missing_column', "Missing column 'transaction_id'", True)
+    try:
+        transaction_id = int(fields[id_pos])
+        if not INT64_MIN <= transaction_id <= INT64_MAX:
+            raise ValueError
+    except ValueError:
+        return None, None, ('invalid_id', f"Invalid transaction_id '{fields[id_pos]}'", True)
+    for name, pos in zip(REQUIRED_COLUMNS[1:5], positions[1:5]):
+        if pos >= size:
+            return transaction_id, None, ('missing_column', f"Missing column '{name}'", True)
+
+
+def split_ranges(file, start, end, count):
+    """
+    Split the byte range [start, end) of a binary file into up to `count`
+    ranges that each begin at the start of a line.
+    """
+    boundaries = [start]
+    step = max(1, (end - start) // count)
+    for i in range(1, count):
+        file.seek(max(start + i * step, boundaries[-1]))
+        file.readline()
+        position = file.tell()
+        if position >= end:
+            break
+        if position > boundaries[-1]:
+            boundaries.append(position)
+    boundaries.append(end)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def read_records(filename, start, end, indexes):
+    """
+    Return the raw records at the given indexes of a newline-aligned byte range.
+
+    Indexes count non-blank records from the start of the range, as in parse_range().
+
+    Returns:
+        dict: record index -> list of fields.
+    """
+    wanted = set(indexes)
+    found = {}
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode('utf-8')
+    index = 0
+    for fields in csv.reader(io.StringIO(text, newline='')):
+        if not fields:
+            continue
+        if index in wanted:
+            found[index] = fields
+            if len(found) == len(wanted):
+                break
+        index += 1
+    return found
+
+
+def parse_range(filename, start, end, positions, keep_rejected=False):
+    """
+    Parse and validate the records in one newline-aligned byte range.
+
+    Runs in a worker process. Duplicate IDs are resolved within the range only;
+    the parent re-checks every ID against the ranges before it. With
+    `keep_rejected`, each entry of 'errors' also carries the raw record.
+
+    Returns:
+        dict: 'records' (number of non-blank records), 'ids' and 'id_parsed'
+        (transaction_id per record, with a 0/1 flag for whether it parsed),
+        'accepted' (record index of each valid row) and its column arrays,
+        'descriptions' (distinct descriptions used by 'description_codes'),
+        'errors' (list of (record index, error[, fields])) and 'multiline' (True if a
+        field contains a line break, meaning the split may not be record-aligned).
+    """
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode('utf-8')
+
+    ids = array('q')
+    id_parsed = bytearray()
+    accepted = array('I')
+    dates = array('i')
+    customer_ids = array('q')
+    amounts = array('q')
+    types = array('B')
+    description_codes = array('I')
+    descriptions = {}
+    errors = []
+    seen_ids = set()
+    check_multiline = '"' in text
+    multiline = False
+    validate = compile_validator(positions)
+
+    index = 0
+    for fields in csv.reader(io.StringIO(text, newline='')):
+        if not fields:
+            continue  # csv.DictReader skips blank lines without counting them
+        if check_multiline and any('\n' in field or '\r' in field for field in fields):
+            multiline = True
+        transaction_id, values, error = validate(fields)
+        if transaction_id is None:
+            ids.append(0)
+            id_parsed.append(0)
+        else:
+            ids.append(transaction_id)
+            id_parsed.append(1)
+            if transaction_id in seen_ids:
+                values, error = None, duplicate_error(transaction_id)
+            else:
+                seen_ids.add(transaction_id)
+        if values is None:
+            errors.append((index, error, fields) if keep_rejected else (index, error))
+        else:
+            date_ordinal, customer_id, amount, type_code, description = values
+            accepted.append(index)
+            dates.append(date_ordinal)
+            customer_ids.append(customer_id)
+            amounts.append(amount)
+            types.append(type_code)
+            description_codes.append(descriptions.setdefault(description, len(descriptions)))
+        index += 1
+
+    return {
+        'records': index,
+        'ids': ids,
+        'id_parsed': bytes(id_parsed),
+        'accepted': accepted,
+        'columns': (dates, customer_ids, amounts, types, description_codes),
+        'descriptions': list(descriptions),
+        'errors': errors,
+        'multiline': multiline
+    }
@@ -0,0 +1,276 @@
+from array import array
+from bisect import bisect_left, insort
+from datetime import date
+from heapq import merge
+
+# A key's postings turn from a sorted array of slots into a bitmap once they hold
+# more than 1/DENSE_RATIO of the rows, where 4-byte slots would outgrow n/8 bytes of bits
+DENSE_RATIO = 32
+
+# Bytes of bitmap whose set bits are counted together, so a page deep into a
+# selection is found without walking every bit before it
+BLOCK_BYTES = 4096
+
+_ASCII_BITS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+def bits_from_mask(mask):
+    """Turn a mask of 0/1 bytes, one per slot, into a bitmap."""
+    # Reversed so slot 0 is the lowest bit; base-2 parsing of the digits is linear
+    return int(mask.translate(_ASCII_BITS)[::-1], 2) if mask else 0
+
+
+# Helper function to turn slots into a bitmap.
+def _bitmap_from_slots(slots, size):
+    bitmap = bytearray((size + 7) // 8)
+    for slot in slots:
+        bitmap[slot >> 3] |= 1 << (slot & 7)
+    return bitmap
+
+
+# Helper function to read a bitmap as an int, for ANDing and ORing whole bitmaps in C.
+def _bits(bitmap):
+    return int.from_bytes(bitmap, 'little')
+
+
+# Helper function to grow a bitmap to cover `size` slots.
+def _grow(bitmap, size):
+    missing = (size + 7) // 8 - len(bitmap)
+    if missing > 0:
+        bitmap.extend(bytes(missing))
+
+
+class MonthKeys(dict):
+    """Date ordinal -> (year, month), computed once per distinct date."""
+
+    def __missing__(self, ordinal):
+        day = date.fromordinal(ordinal)
+        key = self[ordinal] = (day.year, day.month)
+        return key
+
+
+class YearKeys(dict):
+    """Date ordinal -> year, computed once per distinct date."""
+
+    def __missing__(self, ordinal):
+        key = self[ordinal] = date.fromordinal(ordinal).year
+        return key
+
+
+class FieldIndex:
+    """
+    Postings of one field: for each key, the slots holding it.
+
+    A key's postings are a sorted array of slots while the key is rare and a
+    bitmap (a bytearray with bit i & 7 of byte i >> 3 set for slot i) once it
+    is common, so intersecting common keys is a single C-level AND, while
+    memory stays at a few bytes per row however many keys there are (at most
+    DENSE_RATIO keys can be bitmaps). Bits are set and cleared in place, so
+    adding or removing a row costs the same however many rows share its key.
+    """
+
+    def __init__(self):
+        self.postings = {}
+
+    @classmethod
+    def build(cls, keys, size, skip=None):
+        """
+        Index `keys`, the field's value at each slot.
+
+        Args:
+            keys: Iterable of keys by slot.
+            size (int): Number of slots.
+            skip: Optional bytes-like with a true byte for each slot to leave out.
+
+        Returns:
+            FieldIndex: The index.
+        """
+        groups = {}
+        for slot, key in enumerate(keys):
+            if skip is not None and skip[slot]:
+                continue
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = array('I')
+            group.append(slot)
+        index = cls()
+        for key, slots in groups.items():
+            index.postings[key] = _bitmap_from_slots(slots, size) if len(slots) * DENSE_RATIO > size else slots
+        return index
+
+    @classmethod
+    def from_bitmaps(cls, bitmaps, size):
+        """Build an index from an int bitmap per key (see bits_from_mask(); for fields with a few, common keys)."""
+        index = cls()
+        for key, bits in bitmaps.items():
+            index.postings[key] = bytearray(bits.to_bytes((size + 7) // 8, 'little'))
+        return index
+
+    def get(self, key):
+        """Return the postings of `key` (a bitmap or a sorted slot array), or None."""
+        return self.postings.get(key)
+
+    def keys(self):
+        return self.postings.keys()
+
+    def add(self, key, slot, size):
+        """Add `slot` to the postings of `key`; `size` is the number of slots."""
+        posting = self.postings.get(key)
+        if posting is None:
+            self.postings[key] = array('I', [slot])
+        elif isinstance(posting, bytearray):
+            _grow(posting, size)
+            posting[slot >> 3] |= 1 << (slot & 7)
+        else:
+            if not posting or posting[-1] < slot:
+                posting.append(slot)
+            else:
+                insort(posting, slot)
+            if len(posting) * DENSE_RATIO > size:
+                self.postings[key] = _bitmap_from_slots(posting, size)
+
+    def extend(self, keys, start, size):
+        """Add slots `start`, `start` + 1, ... holding `keys`, grouped by key."""
+        groups = {}
+        for slot, key in enumerate(keys, start):
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = array('I')
+            group.append(slot)
+        for key, slots in groups.items():
+            posting = self.postings.get(key)
+            if isinstance(posting, bytearray):
+                _grow(posting, size)
+                for slot in slots:
+                    posting[slot >> 3] |= 1 << (slot & 7)
+            else:
+                if posting is None:
+                    posting = self.postings[key] = array('I')
+                posting.extend(slots)  # New slots come after all existing ones
+                if len(posting) * DENSE_RATIO > size:
+                    self.postings[key] = _bitmap_from_slots(posting, size)
+
+    def discard(self, key, slot):
+        """Remove `slot` from the postings of `key`, if present."""
+        posting = self.postings.get(key)
+        if isinstance(posting, bytearray):
+            if slot >> 3 < len(posting):
+                posting[slot >> 3] &= ~(1 << (slot & 7))
+        elif posting is not None:
+            position = bisect_left(posting, slot)
+            if position < len(posting) and posting[position] == slot:
+                del posting[position]
+
+
+def union(postings, size):
+    """Return the union of postings whose slots are disjoint (keys of one field)."""
+    postings = [posting for posting in postings if posting is not None]
+    bitmaps = [posting for posting in postings if isinstance(posting, bytearray)]
+    arrays = [posting for posting in postings if not isinstance(posting, bytearray)]
+    if not bitmaps:
+        return array('I', merge(*arrays)) if len(arrays) > 1 else (arrays[0] if arrays else array('I'))
+    bits = 0
+    for bitmap in bitmaps:
+        bits |= _bits(bitmap)
+    if arrays:
+        bits |= _bits(_bitmap_from_slots(merge(*arrays), size))
+    return bytearray(bits.to_bytes((size + 7) // 8, 'little'))
+
+
+def intersect(postings, size):
+    """
+    Return the slots in all of `postings` as a Selection.
+
+    Bitmaps are ANDed together; if any postings are slot arrays, the shortest
+    is filtered through the others, so the work follows the rarest key.
+    """
+    bitmaps = [posting for posting in postings if isinstance(posting, bytearray)]
+    arrays = sorted((posting for posting in postings if not isinstance(posting, bytearray)), key=len)
+    bits = None
+    for bitmap in bitmaps:
+        bits = _bits(bitmap) if bits is None else bits & _bits(bitmap)
+    if not arrays:
+        return Selection(bits if bits is not None else 0, size)
+
+    slots = arrays[0]
+    for other in arrays[1:]:
+        members = set(other)
+        slots = array('I', (slot for slot in slots if slot in members))
+    if bits is not None:
+        data = bits.to_bytes((size + 7) // 8, 'little')
+        slots = array('I', (slot for slot in slots if data[slot >> 3] >> (slot & 7) & 1))
+    return Selection(slots, size)
+
+
+class Selection:
+    """
+    Slots matching a query, in slot order.
+
+    Supports len(), indexing, slicing and iteration without listing every
+    matching slot, so a page of a large result costs only that page.
+    """
+
+    def __init__(self, posting, size):
+        if isinstance(posting, int):
+            self._slots = None
+            self._data = posting.to_bytes((size + 7) // 8, 'little')
+            self._count = posting.bit_count()
+            self._blocks = None
+        else:
+            self._slots = posting
+            self._count = len(posting)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        if self._slots is not None:
+            return iter(self._slots)
+        return self._iter_bits(0, 0)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            if self._slots is not None:
+                return list(self._slots[start:stop:step])
+            if start >= stop:
+                return []
+            slots = []
+            for slot in self._iter_bits(*self._seek(start)):
+                slots.append(slot)
+                if len(slots) == stop - start:
+                    break
+            return slots[::step]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("selection index out of range")
+        if self._slots is not None:
+            return self._slots[index]
+        return next(self._iter_bits(*self._seek(index)))
+
+    # Helper method to find the byte to start from for the `index`-th set bit.
+    def _seek(self, index):
+        """Return (byte position, set bits to skip from there) for the `index`-th set bit."""
+        data = self._data
+        if self._blocks is None:
+            self._blocks = [int.from_bytes(data[i:i + BLOCK_BYTES], 'little').bit_count()
+                            for i in range(0, len(data), BLOCK_BYTES)]
+        seen = 0
+        for block, count in enumerate(self._blocks):
+            if seen + count > index:
+                return block * BLOCK_BYTES, index - seen
+            seen += count
+        return len(data), 0
+
+    def _iter_bits(self, position, skip):
+        data = self._data
+        for position in range(position, len(data)):
+            byte = data[position]
+            while byte:
+                low = byte & -byte
+                if skip:
+                    skip -= 1
+                else:
+                    yield position * 8 + low.bit_length() - 1
+                byte ^= low
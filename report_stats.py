@@ -0,0 +1,217 @@
+from datetime import date
+from anomalies import ZScoreDetector
+from topk import ExactTopK
+
+# Type codes, as in store.TYPE_CODES
+CREDIT, DEBIT, TRANSFER = 0, 1, 2
+
+
+def partial_report(dates, types, amounts, customer_ids, detector=None, ranking=None):
+    """
+    Gather the statistics of one shard of rows.
+
+    Runs in a worker process; the parent merges the shards in row order.
+
+    Args:
+        detector: An unfitted anomaly detector to fit on the shard, or None for the default.
+        ranking: An empty customer ranking to fill from the shard, or None for exact rankings.
+
+    Returns:
+        ReportStats: The shard's statistics.
+    """
+    stats = ReportStats(detector, ranking)
+    stats.add(dates, types, amounts, customer_ids)
+    return stats
+
+
+def _period_data(cents, counts):
+    return {'credits': cents[CREDIT] / 100, 'debits': cents[DEBIT] / 100, 'transfers': cents[TRANSFER] / 100,
+            'count': sum(counts)}
+
+
+class ReportStats:
+    """
+    Statistics for every section of the financial report, gathered in one pass.
+
+    add() folds a batch of rows (the store's columns, or slices of them) into
+    the totals, so the report reads each row once, whatever its number of
+    sections. Amounts are whole cents and sums are integers, so they are
+    exact in any order: serial, sharded and cube-based reports agree.
+
+    Attributes:
+        count (int): Rows seen.
+        first_date, last_date (int): Smallest and largest date ordinal, or None.
+        type_cents (list): Per type code, the sum of credit amounts and of
+            absolute debit and transfer amounts, in cents.
+        detector: The anomaly detector fitted on the rows (see anomalies.py).
+        ranking: The customer rankings by volume and count in cents (see topk.py).
+    """
+
+    def __init__(self, detector=None, ranking=None):
+        self.count = 0
+        self.first_date = None
+        self.last_date = None
+        self.type_cents = [0, 0, 0]
+        self.detector = ZScoreDetector() if detector is None else detector
+        self.ranking = ExactTopK() if ranking is None else ranking
+        self._years = {}  # year -> [cents per type code, then its quarters' lists of cents and counts per type code]
+        self._periods = {}  # Date ordinal -> (year sums, quarter sums and counts)
+
+    def add(self, dates, types, amounts, customer_ids):
+        """
+        Fold rows into the statistics.
+
+        Args:
+            dates, types, amounts, customer_ids: Equal-length sequences of date
+                ordinals, type codes, signed amounts in cents and customer IDs.
+        """
+        if not len(dates):
+            return
+        first, last = min(dates), max(dates)
+        self.first_date = first if self.first_date is None else min(self.first_date, first)
+        self.last_date = last if self.last_date is None else max(self.last_date, last)
+
+        periods = self._periods
+        type_cents = self.type_cents
+        for ordinal, type_code, amount in zip(dates, types, amounts):
+            targets = periods.get(ordinal)
+            if targets is None:
+                targets = periods[ordinal] = self._period(ordinal)
+            year_sums, quarter_sums = targets
+            magnitude = abs(amount)
+            value = amount if type_code == CREDIT else magnitude  # Credits are summed signed, as the report always has
+            year_sums[type_code] += value
+            quarter_sums[type_code] += value
+            quarter_sums[3 + type_code] += 1
+            type_cents[type_code] += value
+        self.detector.fit(types, amounts, customer_ids)
+        self.ranking.add(customer_ids, amounts)
+        self.count += len(dates)
+
+    def add_cube(self, cube, customer_ids=None):
+        """
+        Fold in the totals of a rollup cube (see rollup.py) instead of reading its rows.
+
+        The cube's amounts are absolute cents, like the store's credits. The
+        anomaly detector needs the rows themselves and is not fitted.
+
+        Args:
+            cube (RollupCube): Counts and amounts per month, type and customer.
+            customer_ids: The customer column of the rows the cube totals. The cube keeps
+                no row order, so this ranks tied customers in order of first
+                appearance, as add() does; None leaves them in cube order.
+        """
+        first, last = cube.date_range()
+        if first is None:
+            return
+        self.first_date = first if self.first_date is None else min(self.first_date, first)
+        self.last_date = last if self.last_date is None else max(self.last_date, last)
+
+        volumes, counts = {}, {}
+        for (year, month), partition in sorted(cube.partitions.items()):  # Years in date order, as rows would add them
+            year_cents = self._years.get(year)
+            if year_cents is None:
+                year_cents = self._years[year] = [0, 0, 0] + [[0, 0, 0, 0, 0, 0] for _ in range(4)]
+            quarter_cents = year_cents[3 + (month - 1) // 3]
+            for (type_code, customer_id), (count, cents) in partition.items():
+                year_cents[type_code] += cents
+                quarter_cents[type_code] += cents
+                quarter_cents[3 + type_code] += count
+                self.type_cents[type_code] += cents
+                volumes[customer_id] = volumes.get(customer_id, 0) + cents
+                counts[customer_id] = counts.get(customer_id, 0) + count
+        if customer_ids is not None:
+            order = dict.fromkeys(customer_ids)
+            volumes = {customer_id: volumes[customer_id] for customer_id in order}
+            counts = {customer_id: counts[customer_id] for customer_id in order}
+        self.ranking.add_totals(volumes, counts)
+        self.count += sum(counts.values())
+
+    def merge(self, other):
+        """
+        Fold in the statistics of the rows that follow this one's, e.g. another shard.
+
+        Years and customers keep their order of first appearance when shards are
+        merged in row order.
+
+        Args:
+            other (ReportStats): Statistics of the following rows.
+        """
+        if not other.count:
+            return
+        self.detector.merge(other.detector)
+        self.ranking.merge(other.ranking)
+        self.first_date = other.first_date if self.first_date is None else min(self.first_date, other.first_date)
+        self.last_date = other.last_date if self.last_date is None else max(self.last_date, other.last_date)
+        self.count += other.count
+        for type_code in (CREDIT, DEBIT, TRANSFER):
+            self.type_cents[type_code] += other.type_cents[type_code]
+        for year, sums in other._years.items():
+            mine = self._years.get(year)
+            if mine is None:
+                self._years[year] = sums[:3] + [list(quarter_sums) for quarter_sums in sums[3:]]
+                continue
+            for index in (CREDIT, DEBIT, TRANSFER):
+                mine[index] += sums[index]
+            for quarter_sums, other_sums in zip(mine[3:], sums[3:]):
+                for index, value in enumerate(other_sums):
+                    quarter_sums[index] += value
+
+    @property
+    def type_totals(self):
+        """list: Per type code, the sum of credit amounts and of absolute debit and transfer amounts, in dollars."""
+        return [cents / 100 for cents in self.type_cents]
+
+    @property
+    def type_counts(self):
+        """list: Rows per type code."""
+        counts = [0, 0, 0]
+        for year_sums in self._years.values():
+            for quarter_sums in year_sums[3:]:
+                for type_code in (CREDIT, DEBIT, TRANSFER):
+                    counts[type_code] += quarter_sums[3 + type_code]
+        return counts
+
+    @property
+    def years(self):
+        """
+        dict: year -> {'credits', 'debits', 'transfers' (dollars), 'count', 'quarters':
+        {1-4: the same keys}}, in order of first appearance.
+        """
+        years = {}
+        for year, year_sums in self._years.items():
+            quarters = {quarter: _period_data(sums, sums[3:]) for quarter, sums in enumerate(year_sums[3:], 1)}
+            years[year] = dict(_period_data(year_sums, [sum(q['count'] for q in quarters.values())]), quarters=quarters)
+        return years
+
+    def anomalies(self, types, amounts, customer_ids):
+        """
+        Find the anomalous rows with the fitted detector.
+
+        Its statistics only become final once every row is added, so this is a
+        second pass over the columns the statistics were gathered from.
+
+        Returns:
+            list: Positions of the anomalous rows, in order.
+        """
+        return self.detector.flag(types, amounts, customer_ids)
+
+    def top_customers(self, count, by='volume'):
+        """Return the `count` customers with the largest volume or count, as (customer_id, value, error)."""
+        return self.ranking.top(count, by)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_periods']  # Rebuilt on demand; not worth sending between processes
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, _periods={})
+
+    # Helper method to find (creating them if needed) the year and quarter sums of a date.
+    def _period(self, ordinal):
+        day = date.fromordinal(ordinal)
+        year_sums = self._years.get(day.year)
+        if year_sums is None:
+            year_sums = self._years[day.year] = [0, 0, 0] + [[0, 0, 0, 0, 0, 0] for _ in range(4)]
+        return year_sums, year_sums[3 + (day.month - 1) // 3]  # Q1: Jan-Mar, Q2: Apr-Jun, etc.
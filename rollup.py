@@ -0,0 +1,246 @@
+import os
+import struct
+import sys
+from array import array
+from itertools import compress
+from compression import is_compressed
+from postings import MonthKeys
+
+# Sidecar layout (little-endian, every section 8-byte aligned):
+#   header   magic, version, cell count, day count, rows covered, then the
+#            fingerprint of the CSV the cube was written for (size, mtime, bytes
+#            covered or -1, CRC of the first and last 4 KB of those bytes or -1,
+#            device and inode number), then the offset of each section below
+#   sections per cell: month (int32, year * 12 + month - 1), type code (uint8),
+#            customer_id (int64), rows (int64) and absolute amount in cents (int64);
+#            per day with rows: date ordinal (int32) and rows (int64)
+MAGIC = b'SFACUBE1'
+VERSION = 2
+ROLLUP_SUFFIX = '.cube'
+
+_HEADER = struct.Struct('<8sIQQQQqqqQQ7Q')
+_CELL_CODES = ('i', 'B', 'q', 'q', 'q')
+_DAY_CODES = ('i', 'q')
+
+# Translation table turning the store's tombstone flags into a 0/1 mask of live rows
+_LIVE_MASK = bytes([1] + [0] * 255)
+
+
+def rollup_path(csv_path):
+    """Return the path of the rollup cube saved next to `csv_path`."""
+    if is_compressed(csv_path):
+        return csv_path + ROLLUP_SUFFIX
+    return os.path.splitext(csv_path)[0] + ROLLUP_SUFFIX
+
+
+# Helper function to pad a file to the next 8-byte boundary.
+def _align(file):
+    position = file.tell()
+    padding = -position % 8
+    if padding:
+        file.write(b'\0' * padding)
+    return position + padding
+
+
+class RollupCube:
+    """
+    Row counts and absolute amounts per month, type and customer, partitioned by month.
+
+    The store adds each new, edited or removed row to the cells of its month
+    (add(), with the old values taken out first), like the running totals,
+    so a change costs the same however many rows the store holds and closed
+    periods are totalled once and then only read. Amounts are kept in whole
+    cents, so any roll-up of the cells (quarters, years, customers) is exact.
+    The cube is saved next to the CSV with the file's fingerprint and reused
+    by later runs.
+
+    Attributes:
+        partitions (dict): (year, month) -> {(type code, customer_id): [rows, cents]}.
+        days (dict): Date ordinal -> rows on that day, for the date range.
+    """
+
+    def __init__(self):
+        self.partitions = {}
+        self.days = {}
+        self._month_keys = MonthKeys()
+
+    @classmethod
+    def build(cls, dates, types, cents, customer_ids, skip=None):
+        """
+        Total every row into a new cube.
+
+        Args:
+            dates, types, cents, customer_ids: The store's columns (amounts in signed cents).
+            skip: Optional bytes-like with a true byte for each row to leave out.
+
+        Returns:
+            RollupCube: The cube.
+        """
+        cube = cls()
+        if skip is None:
+            cube.extend(dates, types, cents, customer_ids)
+        else:
+            live = bytes(skip).translate(_LIVE_MASK)
+            cube.extend(*(compress(column, live) for column in (dates, types, cents, customer_ids)))
+        return cube
+
+    def add(self, ordinal, type_code, cents, customer_id, sign=1):
+        """Add a row to the cell of its month, type and customer, or with `sign` -1, take it out."""
+        month = self._month_keys[ordinal]
+        partition = self.partitions.get(month)
+        if partition is None:
+            partition = self.partitions[month] = {}
+        key = (type_code, customer_id)
+        cell = partition.get(key)
+        if cell is None:
+            cell = partition[key] = [0, 0]
+        cell[0] += sign
+        cell[1] += sign * abs(cents)
+        if not cell[0]:
+            del partition[key]
+            if not partition:
+                del self.partitions[month]
+        rows = self.days.get(ordinal, 0) + sign
+        if rows:
+            self.days[ordinal] = rows
+        else:
+            del self.days[ordinal]
+
+    def extend(self, dates, types, cents, customer_ids, sign=1):
+        """
+        Add many rows, or with `sign` -1, take them out.
+
+        Args:
+            dates, types, cents, customer_ids: Equal-length columns (amounts in signed cents).
+        """
+        month_keys = self._month_keys
+        partitions = self.partitions
+        days = {}  # Date ordinal -> [month, rows], for each distinct date folded
+        for ordinal, type_code, amount, customer_id in zip(dates, types, map(abs, cents), customer_ids):
+            day = days.get(ordinal)
+            if day is None:
+                day = days[ordinal] = [month_keys[ordinal], 0]
+            day[1] += 1
+            partition = partitions.get(day[0])
+            if partition is None:
+                partition = partitions[day[0]] = {}
+            cell = partition.get((type_code, customer_id))
+            if cell is None:
+                partition[(type_code, customer_id)] = [sign, sign * amount]
+            else:
+                cell[0] += sign
+                cell[1] += sign * amount
+        for ordinal, (month, rows) in days.items():
+            rows = self.days.get(ordinal, 0) + sign * rows
+            if rows:
+                self.days[ordinal] = rows
+            else:
+                del self.days[ordinal]
+        if sign < 0:
+            # Drop the cells, and months, whose rows were all taken out
+            for month in {month for month, _ in days.values()}:
+                partition = partitions[month]
+                for key in [key for key, (count, _) in partition.items() if not count]:
+                    del partition[key]
+                if not partition:
+                    del partitions[month]
+
+    def months(self):
+        """Return the months with rows, in order."""
+        return sorted(self.partitions)
+
+    def date_range(self):
+        """Return the first and last date ordinal of all rows, or (None, None)."""
+        if not self.days:
+            return None, None
+        return min(self.days), max(self.days)
+
+    def write(self, filename, source, rows):
+        """
+        Save the cube, recording the fingerprint of the CSV it totals.
+
+        The file is written to a temporary name and moved into place.
+
+        Args:
+            filename (str): Destination path (see rollup_path()).
+            source (dict): The CSV's 'size', 'mtime', 'offset' (bytes covered, or None),
+                'fingerprint' (CRC of those bytes, or None) and 'inode' (device and
+                inode number), as returned by FinanceUtils._file_checkpoint.
+            rows (int): Number of rows the cube totals.
+        """
+        cells = tuple(array(code) for code in _CELL_CODES)
+        for (year, month), partition in sorted(self.partitions.items()):
+            key = year * 12 + month - 1
+            for (type_code, customer_id), (count, cents) in partition.items():
+                for column, value in zip(cells, (key, type_code, customer_id, count, cents)):
+                    column.append(value)
+        days = (array('i', sorted(self.days)), array('q'))
+        days[1].extend(map(self.days.__getitem__, days[0]))
+
+        offsets = []
+        partial = f"{filename}.{os.getpid()}.part"
+        try:
+            with open(partial, 'wb') as file:
+                file.write(b'\0' * _HEADER.size)
+                for column in cells + days:
+                    offsets.append(_align(file))
+                    if sys.byteorder == 'big':
+                        column = array(column.typecode, column)
+                        column.byteswap()
+                    file.write(column)
+                file.seek(0)
+                offset = source['offset']
+                fingerprint = source['fingerprint']
+                file.write(_HEADER.pack(MAGIC, VERSION, len(cells[0]), len(days[0]), rows,
+                                        source['size'], source['mtime'], -1 if offset is None else offset,
+                                        -1 if fingerprint is None else fingerprint, *source['inode'], *offsets))
+            os.replace(partial, filename)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    @classmethod
+    def read(cls, filename):
+        """
+        Load a saved cube.
+
+        Returns:
+            tuple: (RollupCube, source) where source holds the 'size', 'mtime',
+            'offset', 'fingerprint', 'inode' and 'rows' recorded by write().
+
+        Raises:
+            ValueError: If the file is not a valid cube.
+        """
+        with open(filename, 'rb') as file:
+            data = file.read()
+        if len(data) < _HEADER.size:
+            raise ValueError(f"'{filename}' is not a rollup cube")
+        (magic, version, cell_count, day_count, rows, size, mtime, offset, fingerprint,
+         device, inode, *offsets) = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"'{filename}' is not a rollup cube")
+        columns = []
+        for code, start, count in zip(_CELL_CODES + _DAY_CODES, offsets,
+                                      (cell_count,) * len(_CELL_CODES) + (day_count,) * len(_DAY_CODES)):
+            column = array(code)
+            end = start + count * column.itemsize
+            if end > len(data):
+                raise ValueError(f"'{filename}' is truncated")
+            column.frombytes(data[start:end])
+            if sys.byteorder == 'big':
+                column.byteswap()
+            columns.append(column)
+
+        cube = cls()
+        partitions = cube.partitions
+        months = {}  # Section key -> (year, month)
+        for key, type_code, customer_id, count, cents in zip(*columns[:5]):
+            month = months.get(key)
+            if month is None:
+                month = months[key] = (key // 12, key % 12 + 1)
+                partitions[month] = {}
+            partitions[month][(type_code, customer_id)] = [count, cents]
+        cube.days.update(zip(*columns[5:]))
+        source = {'size': size, 'mtime': mtime, 'offset': None if offset < 0 else offset,
+                  'fingerprint': None if fingerprint < 0 else fingerprint, 'inode': (device, inode), 'rows': rows}
+        return cube, source
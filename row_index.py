@@ -0,0 +1,310 @@
+import csv
+import io
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import date
+from id_index import IdIndex, table_size
+from parsing import INT64_MAX, INT64_MIN, column_positions, compile_validator
+from store import TYPES
+
+# Sidecar layout (little-endian, every section 8-byte aligned):
+#   header   magic, version, row count, ID table size, size and mtime of the CSV,
+#            length of the CSV header line, then the offset of each section below
+#   sections the CSV header line, row start offsets (uint64, one more than rows:
+#            the last is the end of the data), transaction_id per row (int64),
+#            1 if that ID parsed (uint8), and an open-addressing table mapping
+#            transaction_id to 1 + the row of its first occurrence (uint64, 0 = empty)
+MAGIC = b'SFAIDX01'
+VERSION = 1
+INDEX_SUFFIX = '.idx'
+
+_HEADER = struct.Struct('<8sIIQQQqQ5Q')
+
+
+def index_path(csv_path):
+    """Return the path of the row index saved next to `csv_path`."""
+    return os.path.splitext(csv_path)[0] + INDEX_SUFFIX
+
+
+# Helper function to pad a file to the next 8-byte boundary.
+def _align(file):
+    position = file.tell()
+    padding = -position % 8
+    if padding:
+        file.write(b'\0' * padding)
+    return position + padding
+
+
+# Helper function to parse a transaction_id the way the validator does.
+def _parse_id(field):
+    try:
+        transaction_id = int(field)
+    except ValueError:
+        try:
+            transaction_id = int(field.decode('utf-8'))  # Non-ASCII digits
+        except (ValueError, UnicodeDecodeError):
+            return None
+    return transaction_id if INT64_MIN <= transaction_id <= INT64_MAX else None
+
+
+class RowIndex:
+    """
+    Byte offset of every record of a CSV, and the row of every transaction_id.
+
+    Lets single rows and pages be read and validated without parsing the rest
+    of the file. The index is saved next to the CSV and memory-mapped when it
+    is opened again, as long as the CSV's size and mtime are unchanged.
+    Requires one record per line (no line breaks inside quoted fields).
+    """
+
+    def __init__(self, filename, header, offsets, ids, id_parsed, table, buffer=None):
+        self.filename = filename
+        self.header = header
+        self.positions, _ = column_positions(header)
+        self.offsets = offsets
+        self.ids = ids
+        self.id_parsed = id_parsed
+        self.id_index = IdIndex(ids, table)
+        self._buffer = buffer
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def open(cls, filename, progress=None):
+        """
+        Load the saved index of `filename`, or build and save it if missing or stale.
+
+        Args:
+            filename (str): Path to the CSV.
+            progress (function): Called with (bytes_done, total_bytes) while building.
+
+        Returns:
+            RowIndex: The index.
+
+        Raises:
+            ValueError: If the header lacks required columns or a record spans lines.
+        """
+        sidecar = index_path(filename)
+        try:
+            return cls.read(sidecar, filename)
+        except (OSError, ValueError):
+            pass
+        index = cls.build(filename, progress)
+        try:
+            index.write(sidecar)
+        except OSError:
+            pass  # The index still works from memory
+        return index
+
+    @classmethod
+    def build(cls, filename, progress=None):
+        """Scan `filename` once and index it (see open())."""
+        offsets = array('Q')
+        ids = array('q')
+        id_parsed = bytearray()
+        with open(filename, 'rb') as file:
+            total_bytes = os.fstat(file.fileno()).st_size
+            header = next(csv.reader([file.readline().decode('utf-8')]), None)
+            if not header:
+                raise ValueError(f"No valid transactions in '{filename}'")
+            positions, missing = column_positions(header)
+            if missing:
+                raise ValueError(f"Missing columns in CSV: {missing}")
+            id_pos = positions[0]
+            offset = file.tell()
+            step = max(1, total_bytes // 100)
+            next_update = step
+            for line in file:
+                size = len(line)
+                if line == b'\n' or line == b'\r\n':
+                    offset += size
+                    continue  # Blank lines are not records
+                if b'"' in line:
+                    if line.count(b'"') % 2:
+                        raise ValueError(f"'{filename}' has line breaks inside fields; it cannot be indexed")
+                    fields = next(csv.reader([line.decode('utf-8')]))
+                    field = fields[id_pos].encode('utf-8') if id_pos < len(fields) else None
+                else:
+                    fields = line.rstrip(b'\r\n').split(b',', id_pos + 1)
+                    field = fields[id_pos] if id_pos < len(fields) else None
+                transaction_id = None if field is None else _parse_id(field)
+                offsets.append(offset)
+                ids.append(transaction_id or 0)
+                id_parsed.append(transaction_id is not None)
+                offset += size
+                if progress and offset >= next_update:
+                    progress(offset, total_bytes)
+                    next_update = offset + step
+            offsets.append(offset)
+
+        # Sized up front so the table is never resized while rows are added
+        table = array('Q', bytes(8 * table_size(len(ids))))
+        index = cls(filename, header, offsets, ids, bytes(id_parsed), table)
+        add = index.id_index.add
+        for row, transaction_id in enumerate(ids):
+            if id_parsed[row]:
+                add(transaction_id, row)  # Later rows with the same ID are duplicates of the first
+        return index
+
+    @classmethod
+    def read(cls, sidecar, filename):
+        """
+        Memory-map a saved index.
+
+        Raises:
+            ValueError: If it is not an index, or `filename` changed since it was written.
+        """
+        with open(sidecar, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(buffer) < _HEADER.size:
+            raise ValueError(f"'{sidecar}' is not a row index")
+        (magic, version, _, rows, table_entries, source_size, source_mtime, header_size,
+         *sections) = _HEADER.unpack_from(buffer)
+        stat = os.stat(filename)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"'{sidecar}' is not a row index")
+        if (source_size, source_mtime) != (stat.st_size, stat.st_mtime_ns):
+            raise ValueError(f"'{sidecar}' is out of date")
+        if sections[4] + table_entries * 8 > len(buffer):
+            raise ValueError(f"'{sidecar}' is truncated")
+        view = memoryview(buffer)
+        header = next(csv.reader([bytes(view[sections[0]:sections[0] + header_size]).decode('utf-8')]))
+        columns = [
+            view[sections[1]:sections[1] + (rows + 1) * 8].cast('Q'),
+            view[sections[2]:sections[2] + rows * 8].cast('q'),
+            view[sections[3]:sections[3] + rows],
+            view[sections[4]:sections[4] + table_entries * 8].cast('Q'),
+        ]
+        if sys.byteorder == 'big':
+            columns = [array(column.format, column.tobytes()) if column.format != 'B' else column
+                       for column in columns]
+            for column in columns[:2] + columns[3:]:
+                column.byteswap()
+        return cls(filename, header, *columns, buffer=buffer)
+
+    def write(self, sidecar):
+        """Save the index, recording the CSV's size and mtime."""
+        stat = os.stat(self.filename)
+        line = io.StringIO()
+        csv.writer(line, lineterminator='').writerow(self.header)
+        header = line.getvalue().encode('utf-8')
+        partial = f"{sidecar}.{os.getpid()}.part"
+        try:
+            with open(partial, 'wb') as file:
+                file.write(b'\0' * _HEADER.size)
+                sections = []
+                for data in (header, self.offsets, self.ids, self.id_parsed, self.id_index.table):
+                    sections.append(_align(file))
+                    if sys.byteorder == 'big' and isinstance(data, array):
+                        data = array(data.typecode, data)
+                        data.byteswap()
+                    file.write(data)
+                file.seek(0)
+                file.write(_HEADER.pack(MAGIC, VERSION, 0, len(self.ids), len(self.id_index.table),
+                                        stat.st_size, stat.st_mtime_ns, len(header), *sections))
+            os.replace(partial, sidecar)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def find(self, transaction_id):
+        """Return the row of the first record with `transaction_id`, or None."""
+        return self.id_index.find(transaction_id)
+
+    def read_rows(self, start, stop):
+        """Return the parsed records of rows [start, stop), read with a single seek."""
+        start = max(0, start)
+        stop = min(len(self), stop)
+        if start >= stop:
+            return []
+        with open(self.filename, 'rb') as file:
+            file.seek(self.offsets[start])
+            data = file.read(self.offsets[stop] - self.offsets[start])
+        return [fields for fields in csv.reader(io.StringIO(data.decode('utf-8'), newline='')) if fields]
+
+
+class LazyTransactions:
+    """
+    Transactions read from a RowIndex on demand.
+
+    Rows are validated exactly as load_transactions would validate them: a row
+    whose transaction_id appeared on an earlier row is a duplicate, even if the
+    earlier row was invalid. Invalid rows are skipped.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.filename = index.filename
+        self._validate = compile_validator(index.positions)
+
+    def __len__(self):
+        """Number of records in the file, valid or not."""
+        return len(self.index)
+
+    def get(self, transaction_id):
+        """Return the transaction dict for `transaction_id`, or None."""
+        row = self.index.find(transaction_id)
+        if row is None:
+            return None
+        return self._transaction(row, self.index.read_rows(row, row + 1)[0])
+
+    def page_after(self, row, count):
+        """
+        Collect up to `count` valid transactions starting at `row`.
+
+        Returns:
+            tuple: (transactions, next_row) where next_row is the row after the last one read.
+        """
+        transactions = []
+        batch = max(count, 16)
+        while len(transactions) < count and row < len(self.index):
+            records = self.index.read_rows(row, row + batch)
+            for i, fields in enumerate(records):
+                transaction = self._transaction(row + i, fields)
+                if transaction:
+                    transactions.append(transaction)
+                    if len(transactions) == count:
+                        return transactions, row + i + 1
+            row += len(records)
+        return transactions, row
+
+    def page_before(self, row, count):
+        """
+        Collect up to `count` valid transactions ending just before `row`.
+
+        Returns:
+            tuple: (transactions, first_row) where first_row is the first row read.
+        """
+        transactions = []
+        batch = max(count, 16)
+        while len(transactions) < count and row > 0:
+            start = max(0, row - batch)
+            records = self.index.read_rows(start, row)
+            for i in range(len(records) - 1, -1, -1):
+                transaction = self._transaction(start + i, records[i])
+                if transaction:
+                    transactions.append(transaction)
+                    if len(transactions) == count:
+                        transactions.reverse()
+                        return transactions, start + i
+            row = start
+        transactions.reverse()
+        return transactions, row
+
+    def _transaction(self, row, fields):
+        transaction_id, values, error = self._validate(fields)
+        if values is None or self.index.find(transaction_id) != row:
+            return None
+        date_ordinal, customer_id, amount, type_code, description = values
+        return {
+            'transaction_id': transaction_id,
+            'date': date.fromordinal(date_ordinal),
+            'customer_id': customer_id,
+            'amount': amount / 100,  # The validator parses amounts into cents
+            'type': TYPES[type_code],
+            'description': description
+        }
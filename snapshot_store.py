@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+
+# Chunks end after a line whose CRC32 has these low bits clear (about one line in
+# 1024), so boundaries follow the content and an edit only changes nearby chunks.
+BOUNDARY_MASK = 0x3FF
+MIN_CHUNK_SIZE = 16 * 1024
+MAX_CHUNK_SIZE = 256 * 1024
+COMPRESSION_LEVEL = 1
+
+# Retention: number of snapshots kept, newest first
+DEFAULT_KEEP = 20
+
+
+class SnapshotWriter:
+    """
+    Receives a file line by line and stores it as content-addressed chunks.
+
+    Chunks already in the store are not written again, so an unchanged file
+    costs no writes and a changed one only its new chunks. Nothing becomes a
+    snapshot until commit(); abort() removes the chunks this writer added.
+    """
+
+    def __init__(self, store, source):
+        self.store = store
+        self.source = source
+        self.size = 0
+        self.new_chunks = 0
+        self.new_bytes = 0  # Compressed bytes written
+        self.committed = False
+        self._digest = hashlib.sha256()
+        self._buffer = bytearray()
+        self._chunks = []
+        self._written = []
+
+    def write(self, line):
+        """Add the next line of the file (with its line ending)."""
+        self._buffer += line
+        size = len(self._buffer)
+        if size >= MAX_CHUNK_SIZE or (size >= MIN_CHUNK_SIZE and not zlib.crc32(line) & BOUNDARY_MASK):
+            self._flush()
+
+    def write_file(self, filename):
+        """Add every line of `filename`."""
+        with open(filename, 'rb') as file:
+            for line in file:
+                self.write(line)
+
+    def commit(self):
+        """
+        Record the snapshot unless an identical one already exists.
+
+        Returns:
+            tuple: (snapshot_id, created) where created is False if the content
+            matched an existing snapshot, whose ID is returned instead.
+        """
+        self._flush()
+        digest = self._digest.hexdigest()
+        existing = self.store.find(digest)
+        if existing:
+            self.committed = True
+            return existing, False
+        sequence = max((manifest['sequence'] for manifest in self.store.list_snapshots()), default=0) + 1
+        snapshot_id = self.store.new_id(sequence)
+        self.store.write_manifest(snapshot_id, {
+            'id': snapshot_id,
+            'sequence': sequence,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'source': self.source,
+            'size': self.size,
+            'sha256': digest,
+            'chunks': self._chunks
+        })
+        self.committed = True
+        self.store.apply_retention()
+        return snapshot_id, True
+
+    def abort(self):
+        """Discard the snapshot and the chunks this writer stored."""
+        for digest in self._written:
+            try:
+                os.remove(self.store.chunk_path(digest))
+            except FileNotFoundError:
+                pass
+        self._written = []
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        self._digest.update(chunk)
+        self.size += len(chunk)
+        digest = hashlib.sha256(chunk).hexdigest()
+        self._chunks.append(digest)
+        written = self.store.put_chunk(digest, chunk)
+        if written:
+            self._written.append(digest)
+            self.new_chunks += 1
+            self.new_bytes += written
+
+
+class SnapshotStore:
+    """
+    Deduplicated snapshots of input files.
+
+    Layout under `root`:
+        objects/<2 hex>/<sha256>   zlib-compressed chunk, named by the hash of its content
+        manifests/<id>.json        one per snapshot: sequence number, source, size, sha256 and chunk list
+
+    Args:
+        root (str): Directory holding the snapshots.
+        keep (int): Number of snapshots to keep; older ones are removed.
+        max_age_days (int): Also remove snapshots older than this (the newest is always kept).
+    """
+
+    def __init__(self, root='snapshots', keep=DEFAULT_KEEP, max_age_days=None):
+        self.root = root
+        self.keep = keep
+        self.max_age_days = max_age_days
+
+    def writer(self, source):
+        """Start a snapshot of `source`; feed it with write() or write_file()."""
+        os.makedirs(os.path.join(self.root, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(self.root, 'manifests'), exist_ok=True)
+        return SnapshotWriter(self, source)
+
+    def save_file(self, filename):
+        """Snapshot `filename`; returns (snapshot_id, created) as SnapshotWriter.commit()."""
+        writer = self.writer(filename)
+        try:
+            writer.write_file(filename)
+            return writer.commit()
+        finally:
+            if not writer.committed:
+                writer.abort()
+
+    def list_snapshots(self):
+        """Return the manifests of all snapshots, oldest first."""
+        directory = os.path.join(self.root, 'manifests')
+        if not os.path.isdir(directory):
+            return []
+        manifests = []
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                with open(os.path.join(directory, name), encoding='utf-8') as file:
+                    manifests.append(json.load(file))
+        return sorted(manifests, key=lambda manifest: manifest['sequence'])
+
+    def find(self, sha256):
+        """Return the ID of the newest snapshot with this content hash, or None."""
+        matches = [manifest['id'] for manifest in self.list_snapshots() if manifest['sha256'] == sha256]
+        return matches[-1] if matches else None
+
+    def restore(self, snapshot_id, destination):
+        """
+        Rebuild a snapshot's file.
+
+        Args:
+            snapshot_id (str): ID from list_snapshots().
+            destination (str): Path to write; replaced only once the content is verified.
+
+        Raises:
+            KeyError: If there is no such snapshot.
+            ValueError: If a chunk is missing or the rebuilt file does not match its hash.
+        """
+        path = os.path.join(self.root, 'manifests', f'{snapshot_id}.json')
+        try:
+            with open(path, encoding='utf-8') as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            raise KeyError(f"No snapshot '{snapshot_id}'") from None
+
+        digest = hashlib.sha256()
+        partial = f"{destination}.{os.getpid()}.part"
+        try:
+            with open(partial, 'wb') as file:
+                for chunk_digest in manifest['chunks']:
+                    try:
+                        with open(self.chunk_path(chunk_digest), 'rb') as chunk_file:
+                            chunk = zlib.decompress(chunk_file.read())
+                    except (FileNotFoundError, zlib.error):
+                        raise ValueError(f"Snapshot '{snapshot_id}' has a missing or damaged chunk") from None
+                    digest.update(chunk)
+                    file.write(chunk)
+            if digest.hexdigest() != manifest['sha256']:
+                raise ValueError(f"Snapshot '{snapshot_id}' does not match its checksum")
+            os.replace(partial, destination)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def apply_retention(self):
+        """Remove snapshots beyond the retention policy and chunks no snapshot uses; return removed IDs."""
+        manifests = self.list_snapshots()
+        expired = manifests[:-self.keep] if self.keep and len(manifests) > self.keep else []
+        if self.max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat(timespec='seconds')
+            expired += [manifest for manifest in manifests[:-1]
+                        if manifest['created'] < cutoff and manifest not in expired]
+        for manifest in expired:
+            os.remove(os.path.join(self.root, 'manifests', f"{manifest['id']}.json"))
+        if expired:
+            self.collect_garbage()
+        return [manifest['id'] for manifest in expired]
+
+    def collect_garbage(self):
+        """Remove chunks that no snapshot refers to; return how many were removed."""
+        used = {digest for manifest in self.list_snapshots() for digest in manifest['chunks']}
+        removed = 0
+        objects = os.path.join(self.root, 'objects')
+        for prefix in os.listdir(objects):
+            directory = os.path.join(objects, prefix)
+            for name in os.listdir(directory):
+                if name not in used:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+        return removed
+
+    def new_id(self, sequence):
+        """Return the snapshot ID backup_YYYYMMDD_HHMMSS_<sequence>; IDs are never reused."""
+        return f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{sequence}"
+
+    def write_manifest(self, snapshot_id, manifest):
+        """Atomically write a snapshot's manifest."""
+        path = os.path.join(self.root, 'manifests', f'{snapshot_id}.json')
+        with open(f'{path}.part', 'w', encoding='utf-8') as file:
+            json.dump(manifest, file)
+        os.replace(f'{path}.part', path)
+
+    def chunk_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    def put_chunk(self, digest, chunk):
+        """Store a chunk unless present; return the compressed bytes written (0 if it existed)."""
+        path = self.chunk_path(digest)
+        if os.path.exists(path):
+            return 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = zlib.compress(chunk, COMPRESSION_LEVEL)
+        with open(f'{path}.part', 'wb') as file:
+            file.write(data)
+        os.replace(f'{path}.part', path)
+        return len(data)
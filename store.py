@@ -0,0 +1,964 @@
+from array import array
+from collections.abc import MutableMapping, MutableSequence
+from datetime import date
+from itertools import compress
+from aggregates import RunningTotals
+from customers import CustomerRegistry
+from id_index import IdAllocator, IdIndex
+from money import to_cents
+from postings import FieldIndex, MonthKeys, YearKeys, bits_from_mask, intersect, union
+from rollup import RollupCube
+from timeindex import TimeIndex
+
+# Transaction types in code order; the code is what the store keeps per row.
+TYPES = ('credit', 'debit', 'transfer')
+TYPE_CODES = {name: code for code, name in enumerate(TYPES)}
+
+FIELDS = ('transaction_id', 'date', 'customer_id', 'amount', 'type', 'description')
+
+# Translation tables turning the type column into a 0/1 byte mask per type
+_TYPE_MASKS = {
+    name: bytes(1 if i == code else 0 for i in range(256))
+    for name, code in TYPE_CODES.items()
+}
+
+# Translation table turning the tombstone flags into a 0/1 mask of live rows
+_LIVE_MASK = bytes([1] + [0] * 255)
+
+# Bulk changes to more than 1/BULK_RATIO of the rows drop the indexes, to be rebuilt
+# on their next use, instead of updating them one row at a time
+BULK_RATIO = 64
+
+
+def _live_runs(deleted):
+    """Return the (start, end) slot ranges without tombstones, given the tombstone flags."""
+    runs = []
+    find = deleted.find
+    end = 0
+    while True:
+        start = find(0, end)
+        if start < 0:
+            return runs
+        end = find(1, start)
+        if end < 0:
+            end = len(deleted)
+        runs.append((start, end))
+
+
+class TransactionRow(MutableMapping):
+    """Dict-like view of one transaction stored in a TransactionStore."""
+
+    __slots__ = ('_store', '_slot', '_generation', '_transaction_id')
+
+    def __init__(self, store, slot):
+        self._store = store
+        self._slot = slot
+        self._generation = store._generation
+        self._transaction_id = store._transaction_ids[slot]
+
+    # Helper method to find this row again after rows were removed or replaced.
+    def _resolve(self):
+        """Return the current slot of this row, following it across deletions."""
+        store = self._store
+        if self._generation != store._generation:
+            slot = store.find(self._transaction_id)
+            if slot is None:
+                raise KeyError(f"Transaction {self._transaction_id} is no longer in the store")
+            self._slot = slot
+            self._generation = store._generation
+        elif store._deleted is not None and store._deleted[self._slot]:
+            raise KeyError(f"Transaction {self._transaction_id} is no longer in the store")
+        return self._slot
+
+    def __getitem__(self, key):
+        return self._store.get_field(self._resolve(), key)
+
+    def __setitem__(self, key, value):
+        slot = self._resolve()
+        self._store.set_field(slot, key, value)
+        if key == 'transaction_id':
+            self._transaction_id = self._store._transaction_ids[slot]
+
+    def __delitem__(self, key):
+        raise TypeError("Transaction fields cannot be removed")
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def update(self, other=(), **kwargs):
+        """Update several fields of the row at once."""
+        values = dict(other, **kwargs)
+        for key in FIELDS:
+            if key in values:
+                self[key] = values[key]
+
+    def copy(self):
+        """Return a plain dict with the row's current values."""
+        return dict(self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class TransactionStore(MutableSequence):
+    """
+    Columnar storage for transactions.
+
+    Each field lives in its own typed array: transaction and customer IDs as
+    64-bit integers, dates as proleptic Gregorian ordinals, amounts as 64-bit
+    integer cents (negative for debits), the type as a one-byte code and the description as an index into a table
+    of distinct descriptions. Indexing returns TransactionRow views, so code
+    written against a list of transaction dicts keeps working.
+
+    Rows are found by transaction_id through an IdIndex, built on the first
+    lookup and kept up to date by every change after it. Removing a row by ID
+    only marks its slot deleted (a tombstone), so lookups, updates and removals
+    all take constant time; the deleted slots are dropped in a single pass, keeping
+    the order of the remaining rows, the next time rows are accessed by
+    position or a column is read.
+
+    select() answers filters on type, year, month and customer from secondary
+    indexes (see postings.py), built on the first select() and kept up to date
+    the same way. customers() likewise keeps the distinct customers and their
+    latest transaction dates (see customers.py), totals() the counts and amounts
+    per type, quarter and customer (see aggregates.py), rollups() the same per
+    month, type and customer (see rollup.py), time_index() the same per type and day as prefix sums, for any
+    date range (see timeindex.py), and next_id() and reserve_ids() hand out new
+    transaction IDs through an IdAllocator seeded on first use.
+    """
+
+    def __init__(self, rows=()):
+        self._transaction_ids = array('q')
+        self._dates = array('i')
+        self._customer_ids = array('q')
+        self._amounts = array('q')  # Signed cents
+        self._types = array('B')
+        self._description_codes = array('I')
+        self.description_table = []
+        self._description_index = {}
+        # Bumped whenever rows move or are replaced so views re-resolve their slot
+        self._generation = 0
+        # Read-only buffer (e.g. an mmap) backing the columns until the first write
+        self._buffer = None
+        # transaction_id -> slot; None until the first lookup
+        self._id_index = None
+        # Source of new transaction IDs; None until the first next_id() or reserve_ids()
+        self._id_allocator = None
+        # Rows whose ID was already indexed at an earlier slot (removing the first must re-index)
+        self._duplicate_ids = 0
+        # Secondary indexes by type, year, (year, month) and customer_id; None until the first select()
+        self._secondary = None
+        self._year_keys = YearKeys()
+        self._month_keys = MonthKeys()
+        # Distinct customers and their latest dates; None until the first customers()
+        self._customers = None
+        # Counts and amounts per type, quarter and customer; None until the first totals()
+        self._totals = None
+        # Counts and amounts per month, type and customer; None until the first rollups() or set_rollups()
+        self._rollups = None
+        # Counts and amounts per type by day, as prefix sums; None until the first time_index()
+        self._time_index = None
+        # Tombstones: one byte per slot, 1 for a removed row; None when there are none
+        self._deleted = None
+        self._deleted_count = 0
+        # Bumped by every row added or removed and every change to a date, customer, amount or type
+        self._changes = 0
+        self.extend(rows)
+
+    # Columns, without rows removed since the last compaction
+    @property
+    def transaction_ids(self):
+        self.compact()
+        return self._transaction_ids
+
+    @property
+    def dates(self):
+        self.compact()
+        return self._dates
+
+    @property
+    def customer_ids(self):
+        self.compact()
+        return self._customer_ids
+
+    @property
+    def cents(self):
+        """The amount column, in signed cents; what every aggregate reads."""
+        self.compact()
+        return self._amounts
+
+    @property
+    def amounts(self):
+        """A copy of the amount column in dollars, as floats."""
+        self.compact()
+        return array('d', [cents / 100 for cents in self._amounts])
+
+    @property
+    def types(self):
+        self.compact()
+        return self._types
+
+    @property
+    def changes(self):
+        """A count that grows with every change to the rows the aggregates read; equal counts mean the same rows."""
+        return self._changes
+
+    @property
+    def description_codes(self):
+        self.compact()
+        return self._description_codes
+
+    @classmethod
+    def from_buffers(cls, columns, description_table, buffer=None):
+        """
+        Build a store over existing column buffers without copying them.
+
+        Args:
+            columns (tuple): Six memoryviews (or arrays) in column order, cast to
+                the store's typecodes.
+            description_table (list): Distinct descriptions indexed by description code.
+            buffer: Object backing the memoryviews (e.g. an mmap), kept alive
+                until the columns are copied into arrays on the first write.
+
+        Returns:
+            TransactionStore: The store.
+        """
+        store = cls()
+        (store._transaction_ids, store._dates, store._customer_ids,
+         store._amounts, store._types, store._description_codes) = columns
+        store.description_table = description_table
+        store._description_index = None  # Built on first use
+        store._buffer = buffer
+        return store
+
+    def __len__(self):
+        return len(self._transaction_ids) - self._deleted_count
+
+    def __getitem__(self, index):
+        self.compact()
+        if isinstance(index, slice):
+            return [TransactionRow(self, slot) for slot in range(*index.indices(len(self)))]
+        return TransactionRow(self, self._slot(index))
+
+    def __setitem__(self, index, transaction):
+        if isinstance(index, slice):
+            raise TypeError("Slice assignment is not supported")
+        self.compact()
+        self.set_values(self._slot(index), *self._encode(transaction))
+
+    def __delitem__(self, index):
+        self.compact()
+        if isinstance(index, slice):
+            if self._buffer is not None:
+                self.materialize()
+            for column in self._columns():
+                del column[index]
+            self._id_index = None  # Slots moved; rebuilt on the next lookup
+            self._secondary = None
+            self._customers = None
+            self._totals = None
+            self._rollups = None
+            self._time_index = None
+            self._changes += 1
+            self._generation += 1
+        else:
+            self._tombstone(self._slot(index))
+
+    def __iter__(self):
+        self.compact()
+        for slot in range(len(self)):
+            yield TransactionRow(self, slot)
+
+    def __repr__(self):
+        return f"TransactionStore({len(self)} transactions)"
+
+    def insert(self, index, transaction):
+        """Insert a transaction (any mapping with the six fields) before `index`."""
+        self.compact()
+        if index >= len(self):
+            self.append(transaction)
+            return
+        values = self._encode(transaction)
+        if self._buffer is not None:
+            self.materialize()
+        for column, value in zip(self._columns(), values):
+            column.insert(index, value)
+        self._id_index = None  # Slots moved; rebuilt on the next lookup
+        self._secondary = None
+        if self._customers is not None:
+            self._customers.add(self._customer_ids[index], self._dates[index])
+        self._total(index, 1)
+        if self._id_allocator is not None:
+            self._id_allocator.observe(values[0])
+        self._generation += 1
+
+    def append(self, transaction):
+        """Append a transaction (any mapping with the six fields)."""
+        self.append_values(*self._encode(transaction))
+
+    def extend(self, transactions):
+        """Append several transactions."""
+        for transaction in transactions:
+            self.append(transaction)
+
+    def append_values(self, transaction_id, date_ordinal, customer_id, amount, type_code, description):
+        """Append a row from already-validated, already-encoded values (the amount in signed cents)."""
+        if self._buffer is not None:
+            self.materialize()
+        self._transaction_ids.append(transaction_id)
+        self._dates.append(date_ordinal)
+        self._customer_ids.append(customer_id)
+        self._amounts.append(amount)
+        self._types.append(type_code)
+        if isinstance(description, str):
+            description = self.encode_description(description)
+        self._description_codes.append(description)
+        if self._deleted is not None:
+            self._deleted.append(0)
+        self._index(len(self._transaction_ids) - 1)
+        self._post(len(self._transaction_ids) - 1)
+
+    def set_values(self, slot, transaction_id, date_ordinal, customer_id, amount, type_code, description):
+        """Replace the row at `slot` (as returned by find()) with already-validated, already-encoded values (the amount in signed cents)."""
+        if self._buffer is not None:
+            self.materialize()
+        if isinstance(description, str):
+            description = self.encode_description(description)
+        self._unindex(slot)
+        self._unpost(slot)
+        values = (transaction_id, date_ordinal, customer_id, amount, type_code, description)
+        for column, value in zip(self._columns(), values):
+            column[slot] = value
+        self._index(slot)
+        self._post(slot)
+        self._generation += 1
+
+    def extend_columns(self, transaction_ids, dates, customer_ids, amounts, types, description_codes):
+        """Append many already-encoded rows at once, one array (or iterable) per column; amounts in signed cents."""
+        if self._buffer is not None:
+            self.materialize()
+        start = len(self._transaction_ids)
+        self._changes += 1
+        self._transaction_ids.extend(transaction_ids)
+        self._dates.extend(dates)
+        self._customer_ids.extend(customer_ids)
+        self._amounts.extend(amounts)
+        self._types.extend(types)
+        self._description_codes.extend(description_codes)
+        if self._deleted is not None:
+            self._deleted.extend(bytes(len(self._transaction_ids) - start))
+        if self._id_index is not None:
+            self._id_index.reserve(len(self._transaction_ids) - start)
+            add = self._id_index.add
+            for slot, transaction_id in enumerate(self._transaction_ids[start:], start):
+                if not add(transaction_id, slot):
+                    self._duplicate_ids += 1
+        if self._id_allocator is not None and len(self._transaction_ids) > start:
+            self._id_allocator.observe(max(self._transaction_ids[start:]))
+        if self._secondary is not None:
+            size = len(self._transaction_ids)
+            for field, keys in self._secondary_keys(start).items():
+                self._secondary[field].extend(keys, start, size)
+        if self._customers is not None:
+            for customer_id, ordinal in zip(self._customer_ids[start:], self._dates[start:]):
+                self._customers.add(customer_id, ordinal)
+        if self._totals is not None:
+            add = self._totals.add
+            for row in zip(self._dates[start:], self._types[start:], self._amounts[start:], self._customer_ids[start:]):
+                add(*row)
+        if self._rollups is not None:
+            self._rollups.extend(self._dates[start:], self._types[start:], self._amounts[start:],
+                                 self._customer_ids[start:])
+        if self._time_index is not None:
+            add = self._time_index.add
+            for row in zip(self._dates[start:], self._types[start:], self._amounts[start:]):
+                add(*row)
+
+    def remove(self, transaction):
+        """Remove a row in constant time, given its view or a mapping with its transaction_id."""
+        if isinstance(transaction, TransactionRow) and transaction._store is self:
+            slot = transaction._resolve()
+        else:
+            slot = self.find(transaction['transaction_id'])
+            if slot is None:
+                raise ValueError(f"Transaction {transaction['transaction_id']} not in store")
+        self._tombstone(slot)
+
+    def clear(self):
+        """Remove all rows."""
+        if self._buffer is not None:
+            self.materialize()
+        for column in self._columns():
+            del column[:]
+        self.description_table = []
+        self._description_index = {}
+        self._id_index = None
+        self._id_allocator = None
+        self._duplicate_ids = 0
+        self._secondary = None
+        self._customers = None
+        self._totals = None
+        self._rollups = None
+        self._time_index = None
+        self._deleted = None
+        self._deleted_count = 0
+        self._changes += 1
+        self._generation += 1
+
+    def find(self, transaction_id):
+        """
+        Return the slot holding `transaction_id`, or None.
+
+        Slots are positions in the columns; while removed rows await compaction
+        they can differ from the positions used by indexing.
+        """
+        if self._id_index is None:
+            self._id_index = IdIndex.build(self._transaction_ids, self._deleted)
+            self._duplicate_ids = len(self._transaction_ids) - self._deleted_count - len(self._id_index)
+        return self._id_index.find(transaction_id)
+
+    def get(self, transaction_id):
+        """Return the row view for `transaction_id`, or None."""
+        slot = self.find(transaction_id)
+        return None if slot is None else TransactionRow(self, slot)
+
+    def row(self, slot):
+        """Return the row view for a slot, as returned by find() and select()."""
+        return TransactionRow(self, slot)
+
+    def select(self, transaction_type=None, year=None, month=None, customer_id=None):
+        """
+        Find the rows matching every given filter, using the secondary indexes.
+
+        Args:
+            transaction_type (str): 'credit', 'debit' or 'transfer'.
+            year (int): Calendar year of the date.
+            month (int): Month of the date (1-12), in `year` if given, else in any year.
+            customer_id (int): Customer ID.
+
+        Returns:
+            Selection: The matching slots in row order, for row(); sized and
+            sliced without listing every match. Without filters, all rows.
+        """
+        if transaction_type is None and year is None and month is None and customer_id is None:
+            self.compact()
+            return range(len(self))
+        if self._secondary is None:
+            self._build_secondary()
+        size = len(self._transaction_ids)
+        postings = []
+        if transaction_type is not None:
+            postings.append(self._secondary['type'].get(self._type_code(transaction_type)))
+        if month is not None:
+            months = self._secondary['month']
+            if year is not None:
+                postings.append(months.get((year, month)))
+            else:
+                postings.append(union([months.get(key) for key in months.keys() if key[1] == month], size))
+        elif year is not None:
+            postings.append(self._secondary['year'].get(year))
+        if customer_id is not None:
+            postings.append(self._secondary['customer_id'].get(customer_id))
+        if any(posting is None for posting in postings):
+            return intersect([array('I')], size)
+        return intersect(postings, size)
+
+    def next_id(self):
+        """Return a transaction ID above every ID in the store, without scanning it."""
+        return self._allocator().allocate()
+
+    def reserve_ids(self, count, above=0):
+        """
+        Reserve `count` consecutive new transaction IDs, for bulk inserts.
+
+        Args:
+            count (int): Number of IDs.
+            above (int): An ID not yet in the store that the block must also exceed,
+                e.g. the largest ID of rows about to be added with it.
+
+        Returns:
+            range: IDs above every ID in the store and every ID handed out before.
+        """
+        allocator = self._allocator()
+        allocator.observe(above)
+        return allocator.reserve(count)
+
+    def customers(self):
+        """
+        Return the registry of distinct customers, built on the first call.
+
+        Returns:
+            CustomerRegistry: Kept up to date by every later change to the store.
+        """
+        if self._customers is None:
+            self._customers = CustomerRegistry.build(self._customer_ids, self._dates, self._deleted)
+        return self._customers
+
+    def match(self, transaction_type=None, year=None, month=None, customer_id=None, start=None, end=None,
+              description=None, where=None):
+        """
+        Find the rows matching every given filter, for bulk updates and removals.
+
+        Uses the secondary indexes if they are built; otherwise one pass over the
+        columns, starting from the type mask, so a one-off bulk change does not
+        pay for building them.
+
+        Args:
+            transaction_type (str): 'credit', 'debit' or 'transfer'.
+            year (int): Calendar year of the date.
+            month (int): Month of the date (1-12), in `year` if given, else in any year.
+            customer_id (int): Customer ID.
+            start (date): Earliest date, inclusive.
+            end (date): Latest date, inclusive.
+            description (str): Exact description.
+            where (callable): Predicate called with the row view of each remaining row.
+
+        Returns:
+            list: Positions of the matching rows, in row order.
+        """
+        self.compact()
+        dates = self._dates
+        if self._secondary is not None and (transaction_type, year, month, customer_id) != (None,) * 4:
+            slots = self.select(transaction_type, year, month, customer_id)
+        else:
+            if transaction_type is not None:
+                self._type_code(transaction_type)  # Rejects unknown types
+                slots = compress(range(len(self)), self.type_mask(transaction_type))
+            else:
+                slots = range(len(self))
+            if year is not None:
+                year_keys = self._year_keys
+                slots = (slot for slot in slots if year_keys[dates[slot]] == year)
+            if month is not None:
+                month_keys = self._month_keys
+                slots = (slot for slot in slots if month_keys[dates[slot]][1] == month)
+            if customer_id is not None:
+                customer_ids = self._customer_ids
+                slots = (slot for slot in slots if customer_ids[slot] == customer_id)
+        if start is not None or end is not None:
+            first = start.toordinal() if start is not None else date.min.toordinal()
+            last = end.toordinal() if end is not None else date.max.toordinal()
+            slots = (slot for slot in slots if first <= dates[slot] <= last)
+        if description is not None:
+            if self._description_index is None:
+                self._description_index = {text: code for code, text in enumerate(self.description_table)}
+            code = self._description_index.get(description)
+            codes = self._description_codes
+            slots = (slot for slot in slots if codes[slot] == code) if code is not None else ()
+        if where is not None:
+            slots = (slot for slot in slots if where(TransactionRow(self, slot)))
+        return list(slots)
+
+    def remove_slots(self, slots):
+        """
+        Remove many rows at once, given their positions (e.g. from match()).
+
+        Small removals are tombstoned row by row; larger ones mark every slot and
+        drop them in a single compaction.
+
+        Returns:
+            int: Number of rows removed.
+        """
+        slots = self._check_slots(slots)
+        if len(slots) * BULK_RATIO <= len(self):
+            for slot in slots:
+                self._tombstone(slot)
+            return len(slots)
+        self._deleted = bytearray(len(self._transaction_ids))
+        for slot in slots:
+            self._deleted[slot] = 1
+        self._deleted_count = len(slots)
+        self._changes += 1
+        self._customers = None  # Rebuilt on the next use, like the indexes dropped by compact()
+        self._totals = None
+        self._time_index = None
+        if self._rollups is not None:
+            self._rollups.extend(*([column[slot] for slot in slots] for column in
+                                   (self._dates, self._types, self._amounts, self._customer_ids)), sign=-1)
+        self.compact()
+        return len(slots)
+
+    def update_slots(self, slots, date=None, customer_id=None, amount=None, transaction_type=None, description=None):
+        """
+        Set the given fields of many rows at once, given their positions (e.g. from match()).
+
+        Amounts are stored negative for debits, so a new `amount` (in dollars)
+        is the absolute value, and changing the type to or from 'debit' flips the sign
+        of the row's amount. Transaction IDs cannot be changed in bulk.
+
+        Returns:
+            int: Number of rows updated.
+        """
+        slots = self._check_slots(slots)
+        if self._buffer is not None:
+            self.materialize()
+        if len(slots) * BULK_RATIO > len(self):
+            self._secondary = None  # Rebuilt on the next use
+            self._customers = None
+            self._totals = None
+            self._time_index = None
+        changes = []
+        if date is not None:
+            changes.append((self._dates, date.toordinal()))
+        if customer_id is not None:
+            changes.append((self._customer_ids, customer_id))
+        if transaction_type is not None:
+            changes.append((self._types, self._type_code(transaction_type)))
+        if description is not None:
+            changes.append((self._description_codes, self.encode_description(description)))
+        amounts = self._amounts
+        types = self._types
+        debit = TYPE_CODES['debit']
+        # Only a new date, customer or type moves a row between postings; other changes only alter its totals
+        if date is not None or customer_id is not None or transaction_type is not None:
+            unpost, post = self._unpost, self._post
+        else:
+            unpost, post = (lambda slot: self._total(slot, -1)), (lambda slot: self._total(slot, 1))
+        for slot in slots:
+            unpost(slot)
+            for column, value in changes:
+                column[slot] = value
+            if amount is not None or transaction_type is not None:
+                value = abs(to_cents(amount) if amount is not None else amounts[slot])
+                amounts[slot] = -value if types[slot] == debit else value
+            post(slot)
+        self._generation += 1
+        return len(slots)
+
+    def replace_slots(self, slots, dates, customer_ids, amounts, types, description_codes):
+        """
+        Replace every field but the transaction ID of many rows at once, given their slots (as returned by find()).
+
+        The values are written a column at a time. As in update_slots(), the
+        indexes are updated row by row for up to 1/BULK_RATIO of the rows, and
+        otherwise dropped once for the whole batch, to be rebuilt on their next use.
+
+        Args:
+            slots (sequence): Distinct slots of the rows to replace.
+            dates, customer_ids, amounts, types, description_codes: Already-encoded
+                values in the order of `slots` (amounts in signed cents).
+        """
+        if self._buffer is not None:
+            self.materialize()
+        if len(slots) * BULK_RATIO > len(self):
+            self._secondary = None  # Rebuilt on the next use
+            self._customers = None
+            self._totals = None
+            self._time_index = None
+        for slot in slots:
+            self._unpost(slot)
+        for column, values in zip(self._columns()[1:], (dates, customer_ids, amounts, types, description_codes)):
+            for slot, value in zip(slots, values):
+                column[slot] = value
+        for slot in slots:
+            self._post(slot)
+        self._generation += 1
+
+    def totals(self):
+        """
+        Return the running counts and amounts per type, quarter and customer, built on the first call.
+
+        Returns:
+            RunningTotals: Kept up to date by every later change to the store.
+        """
+        if self._totals is None and self._rollups is not None:
+            self._totals = RunningTotals.from_cube(self._rollups)  # Far fewer cells than rows
+        elif self._totals is None:
+            self._totals = RunningTotals.build(self._dates, self._types, self._amounts, self._customer_ids,
+                                               self._deleted)
+        return self._totals
+
+    def rollups(self):
+        """
+        Return the counts and amounts per month, type and customer, built on the first call.
+
+        Returns:
+            RollupCube: Kept up to date by every later change to the store.
+        """
+        if self._rollups is None:
+            self._rollups = RollupCube.build(self._dates, self._types, self._amounts, self._customer_ids,
+                                             self._deleted)
+        return self._rollups
+
+    def time_index(self):
+        """
+        Return the counts and amounts per type by day, built on the first call.
+
+        Returns:
+            TimeIndex: Kept up to date by every later change to the store; sums
+            over any date range take O(log days).
+        """
+        if self._time_index is None:
+            self._time_index = TimeIndex.build(self._dates, self._types, self._amounts, self._deleted)
+        return self._time_index
+
+    def set_rollups(self, cube):
+        """
+        Attach a cube totalled from these rows, e.g. one saved by an earlier run.
+
+        The cube must total exactly the rows in the store; later changes keep it
+        up to date like one built by rollups().
+        """
+        self._rollups = cube
+
+    def check_totals(self):
+        """
+        Compare the running totals, if built, with totals recomputed from every row.
+
+        Returns:
+            list: The totals that differ (see RunningTotals.differences); empty if consistent.
+        """
+        if self._totals is None:
+            return []
+        fresh = RunningTotals.build(self._dates, self._types, self._amounts, self._customer_ids, self._deleted)
+        return self._totals.differences(fresh)
+
+    def encode_description(self, description):
+        """Return the code for `description`, adding it to the table if new."""
+        if self._description_index is None:
+            self._description_index = {text: code for code, text in enumerate(self.description_table)}
+        code = self._description_index.get(description)
+        if code is None:
+            code = len(self.description_table)
+            self.description_table.append(description)
+            self._description_index[description] = code
+        return code
+
+    def type_mask(self, transaction_type):
+        """Return a bytes mask with 1 for every row of the given type, for itertools.compress."""
+        return self.types.tobytes().translate(_TYPE_MASKS[transaction_type])
+
+    def nbytes(self):
+        """Approximate memory used by the columns and the description table."""
+        columns = sum(column.itemsize * len(column) for column in self._columns())
+        table = sum(len(description) for description in self.description_table)
+        return columns + table
+
+    def get_field(self, slot, key):
+        """Return one decoded field of the row at `slot`."""
+        if key == 'transaction_id':
+            return self._transaction_ids[slot]
+        if key == 'date':
+            return date.fromordinal(self._dates[slot])
+        if key == 'customer_id':
+            return self._customer_ids[slot]
+        if key == 'amount':
+            return self._amounts[slot] / 100
+        if key == 'type':
+            return TYPES[self._types[slot]]
+        if key == 'description':
+            return self.description_table[self._description_codes[slot]]
+        raise KeyError(key)
+
+    def set_field(self, slot, key, value):
+        """Encode and store one field of the row at `slot`."""
+        if self._buffer is not None:
+            self.materialize()
+        if key == 'transaction_id':
+            self._unindex(slot)
+            self._transaction_ids[slot] = value
+            self._index(slot)
+        elif key == 'date':
+            ordinal = value.toordinal()
+            self._unpost(slot)
+            self._dates[slot] = ordinal
+            self._post(slot)
+        elif key == 'customer_id':
+            self._unpost(slot)
+            self._customer_ids[slot] = value
+            self._post(slot)
+        elif key == 'amount':
+            self._total(slot, -1)
+            self._amounts[slot] = to_cents(value)
+            self._total(slot, 1)
+        elif key == 'type':
+            code = self._type_code(value)
+            self._unpost(slot)
+            self._types[slot] = code
+            self._post(slot)
+        elif key == 'description':
+            self._description_codes[slot] = self.encode_description(value)
+        else:
+            raise KeyError(key)
+
+    def materialize(self):
+        """
+        Copy buffer-backed columns into arrays so the store can be modified.
+
+        Called by every method that writes. The backing buffer is released once
+        no other view of it is alive.
+        """
+        if self._buffer is None:
+            return
+        columns = []
+        for column in self._columns():
+            if isinstance(column, memoryview):
+                copy = array(column.format)
+                copy.frombytes(column.cast('B'))
+                column = copy
+            columns.append(column)
+        (self._transaction_ids, self._dates, self._customer_ids,
+         self._amounts, self._types, self._description_codes) = columns
+        self._buffer = None
+        if self._id_index is not None:
+            self._id_index.keys = self._transaction_ids
+
+    def compact(self):
+        """
+        Drop the slots of removed rows, keeping the order of the others.
+
+        Called before rows are accessed by position or a column is read, so
+        removals in between cost one pass over the columns in total. Each run
+        of live rows between removed ones is copied as a block of bytes.
+        """
+        if not self._deleted_count:
+            return
+        runs = _live_runs(self._deleted)
+        columns = []
+        for column in self._columns():
+            typecode = column.format if isinstance(column, memoryview) else column.typecode
+            size = column.itemsize
+            copy = array(typecode)
+            with memoryview(column).cast('B') as data:
+                for start, end in runs:
+                    copy.frombytes(data[start * size:end * size])
+            columns.append(copy)
+        (self._transaction_ids, self._dates, self._customer_ids,
+         self._amounts, self._types, self._description_codes) = columns
+        self._buffer = None
+        self._deleted = None
+        self._deleted_count = 0
+        self._id_index = None  # Slots moved; rebuilt on the next lookup
+        self._secondary = None
+        self._generation += 1
+
+    def _columns(self):
+        return (self._transaction_ids, self._dates, self._customer_ids,
+                self._amounts, self._types, self._description_codes)
+
+    # Helper method to mark a slot removed without moving any other row.
+    def _tombstone(self, slot):
+        if self._deleted is None:
+            self._deleted = bytearray(len(self._transaction_ids))
+        self._unindex(slot)
+        self._unpost(slot)
+        self._deleted[slot] = 1
+        self._deleted_count += 1
+
+    # Helper method to seed the ID allocator from the ID column on first use.
+    def _allocator(self):
+        if self._id_allocator is None:
+            self._id_allocator = IdAllocator(max(self._transaction_ids, default=0))
+        return self._id_allocator
+
+    # Helper method to add a slot to the ID index, if it is built, and note its ID for the allocator.
+    def _index(self, slot):
+        if self._id_allocator is not None:
+            self._id_allocator.observe(self._transaction_ids[slot])
+        if self._id_index is not None and not self._id_index.add(self._transaction_ids[slot], slot):
+            self._duplicate_ids += 1
+
+    # Helper method to remove a slot from the ID index before its ID changes or it is removed.
+    def _unindex(self, slot):
+        index = self._id_index
+        if index is None:
+            return
+        if index.discard(self._transaction_ids[slot], slot):
+            if self._duplicate_ids:
+                self._id_index = None  # A later row with this ID must now be found; rebuilt on the next lookup
+        elif self._duplicate_ids:
+            self._duplicate_ids -= 1  # This row was the duplicate
+
+    # Helper method to compact the store and check the positions given to a bulk change.
+    def _check_slots(self, slots):
+        slots = sorted(set(slots))
+        self.compact()
+        if slots and (slots[0] < 0 or slots[-1] >= len(self)):
+            raise IndexError("transaction index out of range")
+        return slots
+
+    def _slot(self, index):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("transaction index out of range")
+        return index
+
+    # Helper method to build the secondary indexes on the first select().
+    def _build_secondary(self):
+        size = len(self._transaction_ids)
+        # The type column becomes a bitmap per type through byte masks, without a loop per row
+        types = bytes(self._types)
+        live = bits_from_mask(self._deleted.translate(_LIVE_MASK)) if self._deleted is not None else -1
+        self._secondary = {
+            'type': FieldIndex.from_bitmaps({code: bits_from_mask(types.translate(_TYPE_MASKS[name])) & live
+                                             for name, code in TYPE_CODES.items()}, size)
+        }
+        keys = self._secondary_keys(0)
+        del keys['type']
+        for field, field_keys in keys.items():
+            self._secondary[field] = FieldIndex.build(field_keys, size, self._deleted)
+
+    # Helper method to list the secondary index keys of the slots from `start` on.
+    def _secondary_keys(self, start):
+        return {
+            'type': self._types[start:],
+            'year': map(self._year_keys.__getitem__, self._dates[start:]),
+            'month': map(self._month_keys.__getitem__, self._dates[start:]),
+            'customer_id': self._customer_ids[start:],
+        }
+
+    # Helper method to list the secondary index keys of one slot.
+    def _slot_keys(self, slot):
+        ordinal = self._dates[slot]
+        return (('type', self._types[slot]), ('year', self._year_keys[ordinal]),
+                ('month', self._month_keys[ordinal]), ('customer_id', self._customer_ids[slot]))
+
+    # Helper method to add a slot to the secondary indexes, customer registry and running totals, if built.
+    def _post(self, slot):
+        if self._secondary is not None:
+            size = len(self._transaction_ids)
+            for field, key in self._slot_keys(slot):
+                self._secondary[field].add(key, slot, size)
+        if self._customers is not None:
+            self._customers.add(self._customer_ids[slot], self._dates[slot])
+        self._total(slot, 1)
+
+    # Helper method to remove a slot from the secondary indexes, customer registry and running totals before it changes.
+    def _unpost(self, slot):
+        if self._secondary is not None:
+            for field, key in self._slot_keys(slot):
+                self._secondary[field].discard(key, slot)
+        if self._customers is not None:
+            self._customers.discard(self._customer_ids[slot], self._dates[slot])
+        self._total(slot, -1)
+
+    # Helper method to add a slot to the running totals, time index and rollup cube (`sign` 1) or take it out (-1), if they are built.
+    def _total(self, slot, sign):
+        self._changes += 1
+        if self._totals is not None:
+            self._totals.add(self._dates[slot], self._types[slot], self._amounts[slot], self._customer_ids[slot], sign)
+        if self._time_index is not None:
+            self._time_index.add(self._dates[slot], self._types[slot], self._amounts[slot], sign)
+        if self._rollups is not None:
+            self._rollups.add(self._dates[slot], self._types[slot], self._amounts[slot], self._customer_ids[slot], sign)
+
+    def _type_code(self, transaction_type):
+        try:
+            return TYPE_CODES[transaction_type]
+        except KeyError:
+            raise ValueError(f"Invalid transaction type '{transaction_type}'") from None
+
+    def _encode(self, transaction):
+        return (
+            transaction['transaction_id'],
+            transaction['date'].toordinal(),
+            transaction['customer_id'],
+            to_cents(transaction['amount']),
+            self._type_code(transaction['type']),
+            self.encode_description(transaction['description'])
+        )
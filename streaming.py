@@ -0,0 +1,146 @@
+from array import array
+from parsing import INT64_MAX, INT64_MIN, duplicate_error
+
+# Valid rows handed on per batch while streaming a file
+STREAM_BATCH = 65536
+
+# Bits of the Bloom filter of transaction IDs: about one per byte of CSV (30 or
+# more per row), capped at 1 GiB of memory for files of several gigabytes
+BLOOM_MIN_BITS = 1 << 16
+BLOOM_MAX_BITS = 1 << 33
+BLOOM_HASHES = 4
+
+# Fibonacci hashing, as in id_index.py
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+def bloom_bits(file_bytes, compressed=False):
+    """Return the Bloom filter size for a file of `file_bytes` bytes (4 times as many if compressed)."""
+    return max(BLOOM_MIN_BITS, min(BLOOM_MAX_BITS, file_bytes * (4 if compressed else 1)))
+
+
+class BloomFilter:
+    """
+    Approximate set of integers in a fixed number of bits.
+
+    add() may report an integer as already present when it is not (a false
+    positive, rarer the more bits per integer), but never the other way round.
+
+    Args:
+        bits (int): Size of the filter.
+        hashes (int): Bits set per integer.
+    """
+
+    def __init__(self, bits, hashes=BLOOM_HASHES):
+        self.bits = max(8, bits)
+        self.hashes = hashes
+        self._bytes = bytearray((self.bits + 7) // 8)
+
+    def add(self, value):
+        """Add an integer; return True if it may have been added before (all its bits were set)."""
+        bits, data = self.bits, self._bytes
+        mixed = (value * _HASH_MULTIPLIER) & _MASK_64
+        mixed ^= mixed >> 29
+        position = mixed % bits
+        step = (mixed >> 32) % bits | 1  # Double hashing: the other bits follow at a stride
+        present = True
+        for _ in range(self.hashes):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not data[byte] & mask:
+                present = False
+                data[byte] |= mask
+            position = (position + step) % bits
+        return present
+
+
+def record_id(fields, id_pos):
+    """Return the transaction_id the validator reads from a record (and counts as seen), or None."""
+    if len(fields) <= id_pos:
+        return None
+    try:
+        transaction_id = int(fields[id_pos])
+    except ValueError:
+        return None
+    return transaction_id if INT64_MIN <= transaction_id <= INT64_MAX else None
+
+
+def find_suspects(records, id_pos, bits):
+    """
+    Find the transaction IDs that may occur more than once, in one pass over the IDs only.
+
+    Every ID goes through a Bloom filter of `bits` bits; those it may have
+    seen before are kept. They include every true duplicate plus a few false
+    positives, so streaming the rows afterwards only has to remember these IDs
+    instead of all of them.
+
+    Args:
+        records (iterator): Records following the header.
+        id_pos (int): Position of the transaction_id column.
+        bits (int): Size of the Bloom filter.
+
+    Returns:
+        set: The possibly repeated IDs.
+    """
+    seen = BloomFilter(bits)
+    suspects = set()
+    for fields in records:
+        transaction_id = record_id(fields, id_pos)
+        if transaction_id is not None and seen.add(transaction_id):
+            suspects.add(transaction_id)
+    return suspects
+
+
+def stream_batches(records, validate, suspects, reject=None, first_row=2, batch_rows=STREAM_BATCH):
+    """
+    Validate records as load_transactions does and yield the valid ones in batches of columns.
+
+    A record whose ID was seen before is rejected as a duplicate, as on load;
+    only IDs in `suspects` (see find_suspects()) can repeat, so only those are
+    remembered. Descriptions are validated but not kept.
+
+    Args:
+        records (iterator): Records following the header.
+        validate (function): From parsing.compile_validator().
+        suspects (set): Every ID that may occur more than once.
+        reject (function): reject(row_num, error, fields) for each rejected record, or None.
+        first_row (int): Row number of the first record, for error messages.
+        batch_rows (int): Rows per batch.
+
+    Yields:
+        tuple: (transaction_ids, dates, customer_ids, cents, types) arrays,
+        with up to `batch_rows` rows each.
+    """
+    seen = set()
+    batch = _empty_batch()
+    ids, dates, customer_ids, cents, types = batch
+    row_num = first_row - 1
+    for fields in records:
+        if not fields:
+            continue  # Blank lines are skipped without counting, as on load
+        row_num += 1
+        transaction_id, values, error = validate(fields)
+        if transaction_id is not None and transaction_id in suspects:
+            if transaction_id in seen:
+                values, error = None, duplicate_error(transaction_id)
+            else:
+                seen.add(transaction_id)
+        if values is None:
+            if reject is not None:
+                reject(row_num, error, fields)
+            continue
+        ids.append(transaction_id)
+        dates.append(values[0])
+        customer_ids.append(values[1])
+        cents.append(values[2])
+        types.append(values[3])
+        if len(ids) == batch_rows:
+            yield batch
+            batch = _empty_batch()
+            ids, dates, customer_ids, cents, types = batch
+    if ids:
+        yield batch
+
+
+def _empty_batch():
+    return array('q'), array('i'), array('q'), array('q'), array('B')
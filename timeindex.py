@@ -0,0 +1,250 @@
+from array import array
+from bisect import bisect_left
+from datetime import date, timedelta
+
+# Type codes, as in store.TYPE_CODES
+CREDIT, DEBIT, TRANSFER = 0, 1, 2
+
+
+class FenwickTree:
+    """
+    Prefix sums of a sequence of integers (a binary indexed tree).
+
+    Both adding to one value and summing any prefix take O(log n), so range
+    sums stay cheap while the values change.
+    """
+
+    def __init__(self, values=()):
+        tree = array('q', [0])
+        tree.extend(values)
+        size = len(tree) - 1
+        for i in range(1, size + 1):  # Built in O(n): each node passes its sum up to its parent
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def __len__(self):
+        return len(self._tree) - 1
+
+    def add(self, position, delta):
+        """Add `delta` to the value at `position` (0-based)."""
+        tree = self._tree
+        size = len(tree) - 1
+        i = position + 1
+        while i <= size:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, end):
+        """Return the sum of the values before position `end`."""
+        tree = self._tree
+        total = 0
+        i = min(end, len(tree) - 1)
+        while i > 0:
+            total += tree[i]
+            i &= i - 1
+        return total
+
+    def values(self):
+        """Return the values, in O(n)."""
+        values = array('q', self._tree)
+        size = len(values) - 1
+        for i in range(size, 0, -1):  # The build, undone from the last node back
+            parent = i + (i & -i)
+            if parent <= size:
+                values[parent] -= values[i]
+        return values[1:]
+
+
+class TimeIndex:
+    """
+    Counts and absolute amounts per type by day, for sums over any date range.
+
+    One Fenwick tree per type for counts and one for amounts in cents span the
+    days from the first date to the last, so the totals between two dates take
+    O(log days) whatever the number of transactions, and a change to a row
+    updates them in O(log days) too. The span grows (to at least twice its
+    size) when a date falls outside it.
+    """
+
+    def __init__(self, first=None, days=0):
+        self.first = first  # Ordinal of the first day spanned, or None when empty
+        self._trees = [FenwickTree([0] * days) for _ in range(6)]  # Counts per type code, then cents per type code
+
+    @classmethod
+    def build(cls, dates, types, cents, skip=None):
+        """
+        Index every row.
+
+        Args:
+            dates, types, cents: The store's columns (amounts in signed cents).
+            skip: Optional bytes-like with a true byte for each row to leave out.
+
+        Returns:
+            TimeIndex: The index.
+        """
+        return cls.from_days(day_totals(dates, types, cents, skip))
+
+    @classmethod
+    def from_days(cls, by_day):
+        """
+        Index rows already summed by day, e.g. batch by batch with day_totals().
+
+        Args:
+            by_day (dict): (date ordinal, type code) -> [rows, absolute amount in cents].
+
+        Returns:
+            TimeIndex: The index.
+        """
+        if not by_day:
+            return cls()
+        first = min(ordinal for ordinal, _ in by_day)
+        days = max(ordinal for ordinal, _ in by_day) - first + 1
+        values = [[0] * days for _ in range(6)]
+        for (ordinal, type_code), (count, cents) in by_day.items():
+            values[type_code][ordinal - first] = count
+            values[3 + type_code][ordinal - first] = cents
+        index = cls()
+        index.first = first
+        index._trees = [FenwickTree(column) for column in values]
+        return index
+
+    @property
+    def days(self):
+        """int: Number of days spanned."""
+        return len(self._trees[0])
+
+    def add(self, ordinal, type_code, cents, sign=1):
+        """Add a row (amount in signed cents) to the index, or with `sign` -1, take it out."""
+        self._cover(ordinal)
+        position = ordinal - self.first
+        self._trees[type_code].add(position, sign)
+        self._trees[3 + type_code].add(position, sign * abs(cents))
+
+    def discard(self, ordinal, type_code, cents):
+        """Take a row out of the index."""
+        self.add(ordinal, type_code, cents, -1)
+
+    def count(self, start=None, end=None, type_code=None):
+        """Return the number of rows dated from `start` to `end` (inclusive; None for unbounded), of one type or all."""
+        codes = (CREDIT, DEBIT, TRANSFER) if type_code is None else (type_code,)
+        return sum(self._range(self._trees[code], start, end) for code in codes)
+
+    def total(self, start=None, end=None, type_code=CREDIT):
+        """Return the absolute amount of one type dated from `start` to `end` (inclusive), in dollars."""
+        return self._range(self._trees[3 + type_code], start, end) / 100
+
+    def summary(self, start=None, end=None):
+        """
+        Return the totals of the rows dated from `start` to `end` (inclusive).
+
+        Returns:
+            dict: 'credits', 'debits', 'transfers' (dollars), 'net_balance'
+            (credits - debits) and 'count'.
+        """
+        cents = [self._range(self._trees[3 + code], start, end) for code in (CREDIT, DEBIT, TRANSFER)]
+        return {
+            'credits': cents[CREDIT] / 100,
+            'debits': cents[DEBIT] / 100,
+            'transfers': cents[TRANSFER] / 100,
+            'net_balance': (cents[CREDIT] - cents[DEBIT]) / 100,
+            'count': self.count(start, end),
+        }
+
+    def date_range(self):
+        """
+        Return the first and last date with transactions, or (None, None).
+
+        Found by binary search on the running count, in O(log² days).
+        """
+        rows = self.count()
+        if not rows:
+            return None, None
+        counts = [self._trees[code] for code in (CREDIT, DEBIT, TRANSFER)]
+        key = lambda position: sum(tree.prefix(position + 1) for tree in counts)
+        first = bisect_left(range(self.days), 1, key=key)
+        last = bisect_left(range(self.days), rows, key=key)
+        return date.fromordinal(self.first + first), date.fromordinal(self.first + last)
+
+    def rolling(self, days, start=None, end=None, step=1):
+        """
+        Return the summary of a window of `days` days ending on each `step`th day.
+
+        Args:
+            days (int): Window length; the window ending on day d covers d - days + 1 to d.
+            start, end (date): First and last window end; None for the first and
+                last day with transactions.
+            step (int): Days between window ends.
+
+        Returns:
+            list: (window end date, summary()) pairs, in date order.
+        """
+        if days < 1 or step < 1:
+            raise ValueError(f"Window length and step must be positive, got {days} and {step}")
+        first, last = self.date_range()
+        if first is None:
+            return []
+        day = start or first
+        end = end or last
+        windows = []
+        while day <= end:
+            windows.append((day, self.summary(day - timedelta(days=days - 1), day)))
+            day += timedelta(days=step)
+        return windows
+
+    # Helper method to sum one tree's values for the days from `start` to `end`.
+    def _range(self, tree, start, end):
+        if self.first is None:
+            return 0
+        low = 0 if start is None else max(0, start.toordinal() - self.first)
+        high = len(tree) if end is None else end.toordinal() - self.first + 1
+        if high <= low:
+            return 0
+        return tree.prefix(high) - tree.prefix(low)
+
+    # Helper method to widen the span of days to include `ordinal`.
+    def _cover(self, ordinal):
+        if self.first is not None and 0 <= ordinal - self.first < self.days:
+            return
+        if self.first is None:
+            self.first = ordinal
+            self._trees = [FenwickTree([0]) for _ in range(6)]
+            return
+        last = self.first + self.days - 1
+        # At least double the span on the side that grew, so dates arriving in order rarely regrow it
+        if ordinal > last:
+            padding_before, padding_after = 0, max(ordinal - last, self.days)
+        else:
+            padding_before, padding_after = max(self.first - ordinal, self.days), 0
+        self._trees = [FenwickTree([0] * padding_before + list(tree.values()) + [0] * padding_after)
+                       for tree in self._trees]
+        self.first -= padding_before
+
+
+def day_totals(dates, types, cents, skip=None, by_day=None):
+    """
+    Sum rows per day and type, for TimeIndex.from_days().
+
+    Args:
+        dates, types, cents: Columns of rows (amounts in signed cents).
+        skip: Optional bytes-like with a true byte for each row to leave out.
+        by_day (dict): Sums to add to, e.g. those of earlier batches, or None for new ones.
+
+    Returns:
+        dict: (date ordinal, type code) -> [rows, absolute amount in cents].
+    """
+    if by_day is None:
+        by_day = {}
+    rows = zip(dates, types, map(abs, cents))
+    if skip is not None:
+        rows = (row for row, skipped in zip(rows, skip) if not skipped)
+    for ordinal, type_code, amount in rows:
+        key = (ordinal, type_code)
+        day = by_day.get(key)
+        if day is None:
+            by_day[key] = [1, amount]
+        else:
+            day[0] += 1
+            day[1] += amount
+    return by_day
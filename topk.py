@@ -0,0 +1,198 @@
+from collections import Counter
+from heapq import nlargest
+from operator import itemgetter
+
+# Rows aggregated per customer before they reach a Space-Saving summary, which
+# bounds the scratch memory of one batch
+BATCH_ROWS = 65536
+
+
+class ExactTopK:
+    """
+    Exact customer rankings by volume (sum of absolute amounts, in the unit of the
+    amounts given: the store's cents) and by count.
+
+    Keeps one total per customer; the top K is taken with a heap of K entries
+    instead of sorting every customer. Ties keep first-appearance order.
+    """
+
+    approximate = False
+
+    def __init__(self):
+        self.volumes = {}  # customer_id -> sum of absolute amounts, in order of first appearance
+        self.counts = Counter()
+
+    def add(self, customer_ids, amounts):
+        """Add a batch of rows."""
+        volumes = self.volumes
+        for customer_id, amount in zip(customer_ids, amounts):
+            volumes[customer_id] = volumes.get(customer_id, 0) + abs(amount)
+        self.counts.update(customer_ids)
+
+    def add_totals(self, volumes, counts):
+        """
+        Add per-customer totals (e.g. from a rollup cube), as customer_id -> volume and customer_id -> rows.
+
+        Customers not seen before are added in the order of `volumes`, which ties then keep.
+        """
+        totals = self.volumes
+        for customer_id, volume in volumes.items():
+            totals[customer_id] = totals.get(customer_id, 0) + volume
+        self.counts.update(counts)
+
+    def merge(self, other):
+        """Fold in the rankings of the rows that follow this one's."""
+        volumes = self.volumes
+        for customer_id, volume in other.volumes.items():
+            volumes[customer_id] = volumes.get(customer_id, 0) + volume
+        self.counts.update(other.counts)
+
+    def top(self, k, by='volume'):
+        """
+        Return the top `k` customers by 'volume' or 'count'.
+
+        Returns:
+            list: (customer_id, value, error) tuples, largest first; error is always 0.
+        """
+        totals = self.volumes if by == 'volume' else self.counts
+        return [(customer_id, value, 0) for customer_id, value in nlargest(k, totals.items(), key=itemgetter(1))]
+
+    def bound(self, by='volume'):
+        """Return the most any value may overstate its true value: 0, as rankings are exact."""
+        return 0
+
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving summary: the heaviest items of a stream in `capacity` counters.
+
+    Updated a batch of item weights at a time. Items without a counter start
+    from the smallest estimate, as if they took over its counter, and then
+    only the `capacity` largest estimates are kept, so
+    every estimate overstates its item's true weight by at most the error
+    recorded with it. Neither an error nor the weight of an item without a
+    counter exceeds the smallest estimate kept.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counters = {}  # item -> (estimate, error)
+        self.total = 0
+
+    def update(self, weights):
+        """Add a batch of weights, as item -> weight."""
+        self.total += sum(weights.values())
+        floor = self.bound()
+        counters = self.counters
+        for item, weight in weights.items():
+            counter = counters.get(item)
+            counters[item] = (floor + weight, floor) if counter is None else (counter[0] + weight, counter[1])
+        self._prune()
+
+    def merge(self, other):
+        """
+        Fold in a summary of other items (mergeable summaries, Agarwal et al.).
+
+        An item missing from a full summary may have had up to its smallest
+        estimate there, so that is added to the item's estimate and error.
+        """
+        self.total += other.total
+        floor, other_floor = self.bound(), other.bound()
+        counters = self.counters
+        for item, (estimate, error) in counters.items():
+            if item not in other.counters:
+                counters[item] = (estimate + other_floor, error + other_floor)
+        for item, (estimate, error) in other.counters.items():
+            counter = counters.get(item, (floor, floor))
+            counters[item] = (counter[0] + estimate, counter[1] + error)
+        self._prune()
+
+    def minimum(self):
+        """Return the smallest estimate, or 0 if there are no counters."""
+        return min(map(itemgetter(0), self.counters.values()), default=0)
+
+    def bound(self):
+        """Return the largest error any estimate can have, which is also the most an uncounted item can weigh."""
+        return self.minimum() if len(self.counters) >= self.capacity else 0
+
+    def top(self, k):
+        """Return the `k` items with the largest estimates, as (item, estimate, error)."""
+        return [(item, estimate, error)
+                for item, (estimate, error) in nlargest(k, self.counters.items(), key=lambda entry: entry[1][0])]
+
+    # Helper method to drop all but the largest `capacity` estimates.
+    def _prune(self):
+        if len(self.counters) > self.capacity:
+            estimates = sorted(map(itemgetter(0), self.counters.values()), reverse=True)
+            cutoff = estimates[self.capacity - 1]
+            ties = self.capacity - estimates.index(cutoff)  # Counters kept at the cutoff itself
+            kept = {}
+            for item, counter in self.counters.items():
+                if counter[0] > cutoff:
+                    kept[item] = counter
+                elif counter[0] == cutoff and ties:
+                    kept[item] = counter
+                    ties -= 1
+            self.counters = kept
+
+
+class ApproximateTopK:
+    """
+    Customer rankings by volume and count in bounded memory, with error bounds.
+
+    Two Space-Saving summaries of `capacity` counters each replace the totals
+    of every customer. Rows are totalled per customer in batches of BATCH_ROWS,
+    and each batch's totals update the summaries together.
+    """
+
+    approximate = True
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError(f"Top-K capacity must be positive, got {capacity}")
+        self.summaries = {'volume': SpaceSaving(capacity), 'count': SpaceSaving(capacity)}
+
+    def add(self, customer_ids, amounts):
+        """Add a batch of rows."""
+        volume, count = self.summaries['volume'], self.summaries['count']
+        for start in range(0, len(customer_ids), BATCH_ROWS):
+            batch_ids = customer_ids[start:start + BATCH_ROWS]
+            volumes = {}
+            for customer_id, amount in zip(batch_ids, amounts[start:start + BATCH_ROWS]):
+                volumes[customer_id] = volumes.get(customer_id, 0) + abs(amount)
+            volume.update(volumes)
+            count.update(Counter(batch_ids))
+
+    def add_totals(self, volumes, counts):
+        """Add per-customer totals (e.g. from a rollup cube), as customer_id -> volume and customer_id -> rows."""
+        self.summaries['volume'].update(volumes)
+        self.summaries['count'].update(counts)
+
+    def merge(self, other):
+        """Fold in the rankings of other rows."""
+        for by, summary in self.summaries.items():
+            summary.merge(other.summaries[by])
+
+    def top(self, k, by='volume'):
+        """
+        Return the top `k` customers by 'volume' or 'count'.
+
+        Returns:
+            list: (customer_id, value, error) tuples, largest value first; each
+            true value lies between value - error and value.
+        """
+        return self.summaries[by].top(k)
+
+    def bound(self, by='volume'):
+        """Return the most any value may overstate its true value."""
+        return self.summaries[by].bound()
+
+
+def make_ranking(capacity=None):
+    """
+    Create a customer ranking: exact, or with `capacity`, approximate in that many counters per ranking.
+
+    Raises:
+        ValueError: If the capacity is not positive.
+    """
+    return ExactTopK() if capacity is None else ApproximateTopK(capacity)
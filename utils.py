@@ -1,8 +1,29 @@
 import csv
-from datetime import datetime
+import io
+from datetime import date, datetime, timedelta
 import logging
+import math
 import os
+import time
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import compress
 from tabulate import tabulate
+from anomalies import make_detector
+from binary_store import binary_path, is_binary, is_current, read_binary, write_binary
+from compression import is_compressed, open_input, open_output
+from money import format_cents, parse_cents, to_dollars
+from parsing import (MAX_ERROR_EXAMPLES, ValidationReport, column_positions, compile_validator, duplicate_error,
+                     parse_range, read_records, split_ranges)
+from report_stats import ReportStats, partial_report
+from rollup import RollupCube, rollup_path
+from row_index import LazyTransactions, RowIndex
+from snapshot_store import SnapshotStore
+from store import TransactionStore, TYPES, TYPE_CODES
+from streaming import bloom_bits, find_suspects, stream_batches
+from timeindex import TimeIndex, day_totals
+from topk import make_ranking
 
 class FinanceUtils:
     """Class to manage financial transactions with CRUD operations and analysis."""
@@ -11,6 +32,7 @@ class FinanceUtils:
     def __init__(self):
         """Initialize transactions list and configure logging."""
         self.transactions = []
+        self.snapshots = SnapshotStore('snapshots')  # Deduplicated backups of loaded files
         # Configure logging with a custom FileHandler
         self.logger = logging.getLogger('FinanceUtils')
         self.logger.setLevel(logging.INFO)
@@ -61,6 +83,24 @@ class FinanceUtils:
             self.logger.info("For a more visual experience, consider installing colorama.")
             self.color = {'cyan': '', 'green': '', 'yellow': '', 'red': '', 'reset': ''}  # Fallback to empty strings
 
+    @property
+    def transactions(self):
+        """Loaded transactions, stored column-wise in a TransactionStore."""
+        return self._transactions
+
+    @transactions.setter
+    def transactions(self, rows):
+        """Accept a TransactionStore or any iterable of transaction dicts."""
+        self._transactions = rows if isinstance(rows, TransactionStore) else TransactionStore(rows)
+        self._load_state = None  # Replaced rows no longer match the last loaded file
+        self._lazy = None  # Set by a lazy load, whose rows are read from the file on demand
+        self._rollup_source = None  # The CSV holding exactly these rows, whose rollup cube reports reuse or save
+
+    @property
+    def is_lazy(self):
+        """True if the current file was opened with load_transactions(lazy=True) and not parsed yet."""
+        return self._lazy is not None
+
     # Ensure file handler is closed when instance is destroyed.
     def __del__(self):
         """Ensure file handlers are closed when instance is destroyed."""
@@ -74,10 +114,9 @@ class FinanceUtils:
     # Helper method to find a transaction by its ID.
     def _get_transaction_by_id(self, transaction_id):
         """Helper method to find a transaction by its ID."""
-        for t in self.transactions:
-            if t['transaction_id'] == transaction_id:
-                return t
-        return None
+        if self._lazy is not None:
+            return self._lazy.get(transaction_id)
+        return self.transactions.get(transaction_id)
 
     # Helper method to display a retro-style asterisk progress bar.
     def _display_progress_bar(self, progress, total, prefix="Processing"):
@@ -98,6 +137,30 @@ class FinanceUtils:
             # Fallback to plain text
             print(f"{prefix}: {int((progress / total) * 100 if total > 0 else 100)}%")
 
+    # Helper method to read a file once, reporting progress from byte offsets.
+    def _read_lines(self, file, total_bytes, sink=None, prefix="Processing"):
+        """
+        Yield decoded lines from a binary file in a single pass.
+
+        Progress is based on bytes consumed out of `total_bytes` instead of a
+        pre-counted number of rows; for a compressed file, whose lines add up to
+        more than `total_bytes`, it is the file's compressed `position`. Each raw
+        line is also written to `sink` (if given) so a copy of the file can come
+        from the same read.
+        """
+        step = max(1, total_bytes // 100)
+        next_update = step
+        bytes_read = 0
+        compressed = hasattr(file, 'position')
+        for raw in file:
+            if sink:
+                sink.write(raw)
+            bytes_read += len(raw)
+            if bytes_read >= next_update:
+                self._display_progress_bar(min(file.position, total_bytes) if compressed else bytes_read, total_bytes, prefix)
+                next_update = bytes_read + step
+            yield raw.decode('utf-8')
+
     # Clear the terminal screen for a cleaner user interface.
     def clear_terminal(self):
         """Clear the terminal screen for a cleaner user interface."""
@@ -107,143 +170,154 @@ class FinanceUtils:
         except Exception as e:
             self.logger.error(f"Failed to clear terminal: {e}")
 
-    def load_transactions(self, filename='financial_transactions.csv'):
+    def load_transactions(self, filename='financial_transactions.csv', workers=None, incremental=False,
+                          error_examples=MAX_ERROR_EXAMPLES, quarantine=None, lazy=False):
         """
         Load transactions from a CSV file into self.transactions.
+
+        With `workers` greater than 1, the file is split into newline-aligned byte
+        ranges that are parsed and validated in a process pool and merged in file
+        order. Duplicate IDs are still detected across the whole file and errors
+        keep their row numbers. Files with line breaks inside quoted fields fall
+        back to a serial load.
+
+        Files ending in '.gz', '.bz2' or '.xz' are decompressed while they are read,
+        in a background thread so decompression overlaps with parsing. They are
+        always loaded serially, and an incremental load of one that changed
+        reloads it in full.
+
+        `filename` may also be a binary snapshot written by save_transactions, and
+        a CSV with an up-to-date snapshot next to it is loaded from the snapshot.
+        Snapshots are memory-mapped, so no rows are parsed and no backup is made.
+
+        With `incremental`, a CSV loaded before is not parsed again: only the bytes
+        appended since the last load are read and their rows are added to the
+        current transactions, checked against every transaction_id seen in the file
+        so far. A file that was rewritten or truncated in the meantime is reloaded
+        in full.
+
+        Rejected rows are counted per reason; the first `error_examples` of each
+        reason are logged to errors.txt, followed by a summary line. With
+        `quarantine`, the rejected records are also written to that CSV as they
+        were read, after their row number and rejection reason.
+
+        With `lazy`, nothing is parsed up front: an index of each row's byte offset
+        and of each transaction_id's row is built (or memory-mapped from the
+        '.idx' file saved next to the CSV) and view_transactions pages and ID
+        lookups read only the rows they show. Operations that need every row
+        (filters, edits, analysis, saving, reports) load the file in full first.
         
         Args:
-            filename (str): Path to the CSV file.
+            filename (str): Path to the CSV file (optionally compressed) or binary snapshot.
+            workers (int): Number of worker processes; None or 1 loads serially.
+            incremental (bool): Only load rows appended since the last load of `filename`.
+            error_examples (int): Rejected rows logged per reason; None logs all of them.
+            quarantine (str): Path of a CSV to receive the rejected rows, or None.
+            lazy (bool): Index the file and read rows on demand instead of loading them.
             
         Returns:
             bool: True if loading succeeds, False otherwise.
         """
+        state = self._load_state
+        if incremental and state and state['filename'] == os.path.abspath(filename):
+            loaded = self._load_appended(filename, error_examples, quarantine)
+            if loaded is not None:
+                return loaded
+            self.logger.info(f"'{filename}' was rewritten or truncated; reloading it in full")
+            print(f"'{filename}' was rewritten or truncated; reloading it in full.")
+
         self.transactions = []
-        required_columns = {'transaction_id', 'date', 'customer_id', 'amount', 'type', 'description'}
         seen_ids = set()  # Track transaction_id duplicates
+        if lazy:
+            if self._open_lazy(filename):
+                return True
+            self.transactions = []
+
+        # Prefer the binary snapshot when it matches the CSV; fall back to parsing otherwise
+        if is_binary(filename):
+            return self._load_snapshot(filename)
+        snapshot = binary_path(filename)
+        if snapshot != filename and is_current(snapshot, filename):
+            if self._load_snapshot(snapshot):
+                return True
+            self.transactions = []
 
+        # The snapshot is written from the same read as the parse and only kept if loading succeeds
+        snapshot = None
+        report = None
         try:
-            with open(filename, mode='r', encoding='utf-8') as file:
-                total_rows = sum(1 for _ in file) - 1  # Exclude header
-            if total_rows <= 0:
-                self.logger.error(f"No valid transactions in '{filename}'")
-                print(f"Error: No valid transactions in CSV")
-                return False
-        
-            with open(filename, mode='r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-
-                # Check required columns
-                if not required_columns.issubset(reader.fieldnames):
-                    missing = required_columns - set(reader.fieldnames)
-                    self.logger.error(f"Missing columns in CSV: {missing}")
-                    print(f"Missing columns in CSV: {missing}")
-                    return False
-                
-                processed_rows = 0
-                for row_num, row in enumerate(reader, start=2):
-                    try:
-                        # Validate transaction_id
-                        try:
-                            transaction_id = int(row['transaction_id'])
-                            if transaction_id in seen_ids:
-                                self.logger.error(f"Row {row_num}: Duplicate transaction_id '{transaction_id}'")
-                                continue
-                            seen_ids.add(transaction_id)
-                        except ValueError:
-                            self.logger.error(f"Row {row_num}: Invalid transaction_id '{row['transaction_id']}'")
-                            continue
-
-                        # Validate date
-                        date_str = row['date'].strip()
-                        try:
-                            date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-                        except ValueError:
-                            self.logger.error(f"Invalid date format: '{date_str}'")
-                            continue
-
-                        # Validate customer_id
-                        try:
-                            customer_id = int(row['customer_id'])
-                            if customer_id <= 0:
-                                self.logger.error(f"Non-positive customer_id: '{customer_id}'")
-                                continue
-                        except ValueError:
-                            self.logger.error(f"Invalid customer_id: '{row['customer_id']}'")
-                            continue
-
-                        # Validate amount
-                        try:
-                            amount = float(row['amount'])
-                            if amount < 0:
-                                self.logger.error(f"Row {row_num}: Negative amount '{amount}'")
-                                continue
-                        except ValueError:
-                            self.logger.error(f"Row {row_num}: Invalid amount '{row['amount']}'")
-                            continue
-
-                        # Validate type
-                        transaction_type = row['type'].strip().lower()
-                        if transaction_type not in {'credit', 'debit', 'transfer'}:
-                            self.logger.error(f"Row {row_num}: Invalid transaction type '{transaction_type}'")
-                            continue
-
-                        # Adjust amount for debit
-                        if transaction_type == 'debit':
-                            amount = -amount
-
-                        # Validate description
-                        description = row.get('description')
-                        if description is None or not str(description).strip():
-                            self.logger.error(f"Row {row_num}: Empty description")
-                            continue
-                        description = str(description).strip()
-
-                        # Create transaction dictionary
-                        transaction = {
-                            'transaction_id': transaction_id,
-                            'date': date_obj,
-                            'customer_id': customer_id,
-                            'amount': amount,
-                            'type': transaction_type,
-                            'description': description
-                        }
-                        self.transactions.append(transaction)
-
-                        # Update progress bar every 1% of rows
-                        processed_rows += 1
-                        if processed_rows % max(1, total_rows // 100) == 0:
-                            self._display_progress_bar(processed_rows, total_rows, "Loading")
-
-                    except KeyError as e:
-                        self.logger.error(f"Row {row_num}: Missing column {e}")
-                        continue
+            with open_input(filename) as file:
+                total_bytes = os.fstat(file.fileno()).st_size
+                loaded = False
+
+                # Compressed input cannot be split into byte ranges
+                if workers and workers > 1 and is_compressed(filename):
+                    self.logger.info(f"'{filename}' is compressed; loading serially")
+                elif workers and workers > 1:
+                    header = next(csv.reader([file.readline().decode('utf-8')]), None)
+                    positions = self._check_header(header, filename)
+                    if positions is None:
+                        return False
+                    report = self._open_report(header, error_examples, quarantine)
+                    records = self._load_parallel(filename, file.tell(), total_bytes, positions, workers, seen_ids, report)
+                    loaded = records is not None
+                    if loaded:
+                        offset = total_bytes
+                        snapshot = self._open_snapshot(filename, copy=True)
+                    else:
+                        self.logger.info(f"Line breaks inside fields of '{filename}'; loading serially")
+                        self.transactions = []
+                        seen_ids.clear()
+                        file.seek(0)
+
+                if not loaded:
+                    snapshot = self._open_snapshot(filename)
+                    records = csv.reader(self._read_lines(file, total_bytes, snapshot, "Loading"))
+                    header = next(records, None)
+                    positions = self._check_header(header, filename)
+                    if positions is None:
+                        return False
+                    report = report or self._open_report(header, error_examples, quarantine)
+                    records = self._parse_records(records, positions, seen_ids, report)
+                    offset = None if is_compressed(filename) else file.tell()
 
                 # Final progress update
-                self._display_progress_bar(processed_rows, total_rows, "Loading")
+                self._display_progress_bar(total_bytes, total_bytes, "Loading")
                 print()  # Newline after progress bar
+                self._close_report(report)
 
                 if not self.transactions:
                     self.logger.error(f"No valid transactions in '{filename}'")
                     print(f"Error: No valid transactions in CSV")
                     return False
                 
+                checkpoint = self._file_checkpoint(file, offset)
+                self._track_rollups(filename, checkpoint)
+                self.transactions.totals()  # Running totals for analysis, kept up to date from here on
                 print(f"Loaded {len(self.transactions)} transactions from '{filename}'.")
                 self.logger.info(f"Loaded {len(self.transactions)} transactions from '{filename}'")
-
-                # Create a backup of the original file and save it with a timestamp to /snapshots
-                if not os.path.exists('snapshots'):
-                    os.makedirs('snapshots')
-
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                backup_filename = os.path.join('snapshots', f'backup_{timestamp}.csv')
-                try:
-                    with open(filename, 'rb') as src_file, open(backup_filename, 'wb') as dst_file:
-                        dst_file.write(src_file.read())
-                    print(f"Backup created: '{backup_filename}'")
-                    self.logger.info(f"Created backup: '{backup_filename}'")
-                except Exception as e:
-                    self.logger.error(f"Failed to create backup: {e}")
-                    print(f"Warning: Failed to create backup: {e}")
+                self._load_state = {
+                    'filename': os.path.abspath(filename),
+                    'header': header,
+                    'positions': positions,
+                    'seen_ids': seen_ids,
+                    'next_row': 2 + records,
+                    **checkpoint
+                }
+
+                # Keep a snapshot of the original file in /snapshots, unless an identical one exists
+                if snapshot:
+                    try:
+                        snapshot_id, created = snapshot.commit()
+                        if created:
+                            print(f"Backup created: snapshot '{snapshot_id}' ({snapshot.new_chunks} new chunks, {snapshot.new_bytes / 1024:.1f} KB written)")
+                            self.logger.info(f"Created backup: snapshot '{snapshot_id}' ({snapshot.new_chunks} new chunks, {snapshot.new_bytes} bytes)")
+                        else:
+                            print(f"Backup unchanged: input matches snapshot '{snapshot_id}'")
+                            self.logger.info(f"Input '{filename}' matches snapshot '{snapshot_id}'; no backup written")
+                    except Exception as e:
+                        self.logger.error(f"Failed to create backup: {e}")
+                        print(f"Warning: Failed to create backup: {e}")
 
                 return True
             
@@ -266,8 +340,627 @@ class FinanceUtils:
             self.logger.error(f"IO error reading {filename}: {e}")
             print(f"Error: IO error reading file: {e}")
             return False
-        
+
+        finally:
+            # Discard the snapshot's new chunks if loading did not succeed
+            if snapshot and not snapshot.committed:
+                snapshot.abort()
+            if report:
+                report.close()
+
+    # Helper method to identify the loaded part of a file, to detect rewrites later.
+    def _file_checkpoint(self, file, offset):
+        """
+        Record where loading stopped in an open binary file and what the file looked like.
+
+        Returns:
+            dict: 'offset', the file's 'inode' (device and inode number), 'size' and
+            'mtime', and a 'fingerprint' (CRC32 of the first and last 4 KB before
+            `offset`) that changes if the loaded bytes are rewritten in place.
+            For a compressed file, `offset` and the fingerprint are None.
+        """
+        stat = os.fstat(file.fileno())
+        if offset is None:
+            return {'offset': None, 'inode': (stat.st_dev, stat.st_ino), 'size': stat.st_size,
+                    'mtime': stat.st_mtime_ns, 'fingerprint': None}
+        file.seek(0)
+        head = file.read(min(offset, 4096))
+        file.seek(max(0, offset - 4096))
+        tail = file.read(offset - max(0, offset - 4096))
+        return {
+            'offset': offset,
+            'inode': (stat.st_dev, stat.st_ino),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'fingerprint': zlib.crc32(tail, zlib.crc32(head))
+        }
+
+    # Helper method to check that the bytes before an offset in an open binary file end in a complete line.
+    def _ends_line(self, file, offset):
+        if not offset:
+            return False
+        file.seek(offset - 1)
+        return file.read(1) == b'\n'
+
+    # Helper method to CRC32 the bytes of an open binary file from `start` to `end`, continuing from `crc`.
+    def _crc(self, file, end, start=0, crc=0):
+        file.seek(start)
+        while start < end:
+            chunk = file.read(min(1 << 20, end - start))
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+            start += len(chunk)
+        return crc
+
+    # Helper method to remember the CSV the store's rows were read from or written to, for the cube of the next report.
+    def _track_rollups(self, filename, checkpoint):
+        self._rollup_source = {
+            'filename': filename,
+            'offset': checkpoint['offset'],
+            'inode': checkpoint['inode'],
+            'size': checkpoint['size'],
+            'mtime': checkpoint['mtime'],
+            'changes': self.transactions.changes,
+            'saved': False
+        }
+
+    # Helper method to give a report the store's rollup cube, reusing or saving the one next to the CSV of its rows.
+    def _report_rollups(self):
+        """
+        Return the store's rollup cube, on the first report after a load or save reusing or saving the one next to the CSV.
+
+        While the store holds exactly the rows of the CSV it was loaded from or
+        saved to, a cube saved for the same file (device and inode, size, mtime
+        and the CRC32 of every byte its rows were read from) is used as it is.
+        One saved before rows were appended (the bytes it covered are unchanged
+        and end in a complete line) has only the new rows added. Otherwise the
+        cube is built from the rows. Either way it is then saved with the file's
+        fingerprint, once, so later runs can reuse it.
+
+        Returns:
+            RollupCube: Up to date with every row in the store.
+        """
+        store = self.transactions
+        source = self._rollup_source
+        if source is None or source['saved'] or source['changes'] != store.changes:
+            return store.rollups()
+        source['saved'] = True  # Tried once, whatever the outcome
+        filename = source['filename']
+        path = rollup_path(filename)
+        try:
+            with open(filename, 'rb') as file:
+                stat = os.fstat(file.fileno())
+                if ((stat.st_dev, stat.st_ino), stat.st_size, stat.st_mtime_ns) != (source['inode'], source['size'], source['mtime']):
+                    return store.rollups()  # Changed since; its rows are no longer the store's
+                end = stat.st_size if source['offset'] is None else source['offset']
+                try:
+                    cube, saved = RollupCube.read(path)
+                except (OSError, ValueError):
+                    cube = None  # Missing or unreadable; built from the rows below
+                fingerprint = None
+                if cube is not None and saved['inode'] == source['inode'] and saved['rows'] <= len(store):
+                    if ((saved['size'], saved['mtime'], saved['offset'], saved['rows'])
+                            == (source['size'], source['mtime'], source['offset'], len(store))):
+                        fingerprint = self._crc(file, end)
+                        if fingerprint == saved['fingerprint']:
+                            store.set_rollups(cube)
+                            return cube
+                    elif (saved['offset'] is not None and source['offset'] is not None and saved['offset'] <= end
+                          and self._ends_line(file, saved['offset'])):
+                        # A last covered row cut short would have been completed by the appended bytes
+                        crc = self._crc(file, saved['offset'])
+                        if crc == saved['fingerprint']:
+                            start = saved['rows']
+                            cube.extend(store.dates[start:], store.types[start:], store.cents[start:],
+                                        store.customer_ids[start:])
+                            store.set_rollups(cube)
+                            self.logger.info(f"Added {len(store) - start} appended rows to the rollup cube of '{filename}'")
+                            fingerprint = self._crc(file, end, saved['offset'], crc)
+                if fingerprint is None:
+                    fingerprint = self._crc(file, end)
+            checkpoint = {key: source[key] for key in ('offset', 'inode', 'size', 'mtime')}
+            store.rollups().write(path, dict(checkpoint, fingerprint=fingerprint), len(store))
+            self.logger.info(f"Saved rollup cube '{path}'")
+        except OSError as e:
+            self.logger.info(f"Rollup cube of '{filename}' not saved: {e}")  # Only a cache; the report goes on
+        return store.rollups()
+
+    # Helper method to load only the rows appended since the last load.
+    def _load_appended(self, filename, error_examples, quarantine):
+        """
+        Parse the complete lines appended to a CSV since the last load and add their rows.
+
+        A trailing line without a newline is left for the next load, since the
+        writer may still be appending it.
+
+        Returns:
+            bool: True if loading succeeds, False on an error, or None if the file
+            was replaced, truncated or rewritten and needs a full reload.
+        """
+        state = self._load_state
+        store = self.transactions
+        report = None
+        try:
+            with open(filename, 'rb') as file:
+                stat = os.fstat(file.fileno())
+                if stat.st_size == state['size'] and stat.st_mtime_ns == state['mtime']:
+                    print(f"No new transactions in '{filename}'.")
+                    return True
+                if state['offset'] is None:
+                    return None  # Compressed; there is no offset to resume from
+                checkpoint = self._file_checkpoint(file, state['offset']) if stat.st_size >= state['offset'] else None
+                if (checkpoint is None or checkpoint['inode'] != state['inode']
+                        or checkpoint['fingerprint'] != state['fingerprint']
+                        or (stat.st_size == state['offset'] and stat.st_mtime_ns != state['mtime'])):
+                    return None
+
+                file.seek(state['offset'])
+                data = file.read(stat.st_size - state['offset'])
+                data = data[:data.rfind(b'\n') + 1]  # Complete lines only
+                before = len(store)
+                changes = store.changes
+                records = csv.reader(io.StringIO(data.decode('utf-8'), newline=''))
+                report = self._open_report(state['header'], error_examples, quarantine, append=True)
+                state['next_row'] += self._parse_records(records, state['positions'], state['seen_ids'],
+                                                         report, first_row=state['next_row'])
+                state.update(self._file_checkpoint(file, state['offset'] + len(data)))
+                self._close_report(report)
+                source = self._rollup_source
+                if len(store) > before and source and source['changes'] == changes:
+                    self._track_rollups(filename, state)  # Still exactly the file's rows; the next report saves their cube
+
+        except FileNotFoundError:
+            self.logger.error(f"File '{filename}' not found.")
+            print(f"File '{filename}' not found.")
+            return False
+
+        except csv.Error:
+            self.logger.error(f"Malformed CSV file '{filename}'.")
+            print(f"Error reading CSV file '{filename}'.")
+            return False
+
+        except UnicodeDecodeError as e:
+            self.logger.error(f"Encoding error in CSV file '{filename}': {e}")
+            print(f"Error: Invalid encoding in CSV file")
+            return False
+
+        except IOError as e:
+            self.logger.error(f"IO error reading {filename}: {e}")
+            print(f"Error: IO error reading file: {e}")
+            return False
+
+        finally:
+            if report:
+                report.close()
+
+        added = len(store) - before
+        print(f"Loaded {added} new transactions from '{filename}' ({len(store)} in total).")
+        self.logger.info(f"Loaded {added} new transactions from '{filename}' ({len(store)} in total)")
+        return True
+
+    def follow_transactions(self, filename='financial_transactions.csv', interval=2.0, max_polls=None, quarantine=None):
+        """
+        Keep loading rows appended to a CSV until interrupted with Ctrl+C.
+
+        The file is loaded (incrementally, if it was loaded before) and then
+        polled every `interval` seconds. A poll only stats the file; new bytes
+        are parsed through load_transactions(incremental=True).
+
+        Args:
+            filename (str): Path to the CSV file.
+            interval (float): Seconds between polls.
+            max_polls (int): Stop after this many polls; None follows until interrupted.
+            quarantine (str): Path of a CSV to receive rejected rows, or None.
+
+        Returns:
+            bool: True if following ended normally, False if a load failed.
+        """
+        if not self.load_transactions(filename, incremental=True, quarantine=quarantine):
+            return False
+        print(f"Following '{filename}' for new transactions. Press Ctrl+C to stop.")
+        self.logger.info(f"Following '{filename}' every {interval}s")
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                time.sleep(interval)
+                polls += 1
+                try:
+                    stat = os.stat(filename)
+                except FileNotFoundError:
+                    continue  # Being replaced; the next poll reloads it in full
+                state = self._load_state
+                if state and (stat.st_size, stat.st_mtime_ns) == (state['size'], state['mtime']):
+                    continue
+                if not self.load_transactions(filename, incremental=True, quarantine=quarantine):
+                    return False
+        except KeyboardInterrupt:
+            print()
+        print(f"Stopped following '{filename}'.")
+        self.logger.info(f"Stopped following '{filename}'")
+        return True
+
+    def merge_transactions(self, filename, on_conflict='skip', workers=None, error_examples=MAX_ERROR_EXAMPLES,
+                           quarantine=None):
+        """
+        Add the transactions of another CSV (e.g. a daily delta) to the loaded ones.
+
+        The file is parsed the way load_transactions parses one, serially or in
+        `workers` processes, with the same validation and the same check for
+        IDs repeated within it, and may be compressed. A row whose
+        transaction_id is already loaded is found through the ID index and
+        resolved by `on_conflict`: 'skip' keeps the loaded row, 'overwrite'
+        replaces it with the merged one and 'reassign' adds the merged row
+        under a new ID above every existing one. Nothing changes until the whole
+        file has been read; the new rows are then appended in one batch, in
+        file order.
+
+        Args:
+            filename (str): Path to the CSV file to merge (optionally compressed).
+            on_conflict (str): 'skip', 'overwrite' or 'reassign'.
+            workers (int): Number of worker processes; None or 1 parses serially.
+            error_examples (int): Rejected rows logged per reason; None logs all of them.
+            quarantine (str): Path of a CSV to receive the rejected rows, or None.
+
+        Returns:
+            bool: True if the file was merged, False otherwise.
+        """
+        if on_conflict not in ('skip', 'overwrite', 'reassign'):
+            self.logger.error(f"Invalid merge conflict policy '{on_conflict}'")
+            print(f"Error: Conflict policy must be 'skip', 'overwrite' or 'reassign'.")
+            return False
+        if not self._ensure_loaded():
+            return False
+        batch = TransactionStore()  # The merged rows, until they are all read
+        seen_ids = set()
+        report = None
+        try:
+            with open_input(filename) as file:
+                total_bytes = os.fstat(file.fileno()).st_size
+                loaded = False
+                if workers and workers > 1 and not is_compressed(filename):
+                    header = next(csv.reader([file.readline().decode('utf-8')]), None)
+                    positions = self._check_header(header, filename)
+                    if positions is None:
+                        return False
+                    report = self._open_report(header, error_examples, quarantine)
+                    loaded = self._load_parallel(filename, file.tell(), total_bytes, positions, workers, seen_ids,
+                                                 report, store=batch) is not None
+                    if not loaded:
+                        self.logger.info(f"Line breaks inside fields of '{filename}'; merging serially")
+                        batch.clear()
+                        seen_ids.clear()
+                        file.seek(0)
+
+                if not loaded:
+                    records = csv.reader(self._read_lines(file, total_bytes, prefix="Merging"))
+                    header = next(records, None)
+                    positions = self._check_header(header, filename)
+                    if positions is None:
+                        return False
+                    report = report or self._open_report(header, error_examples, quarantine)
+                    self._parse_records(records, positions, seen_ids, report, store=batch)
+                self._display_progress_bar(total_bytes, total_bytes, "Merging")
+                print()  # Newline after progress bar
+                self._close_report(report)
+
+        except FileNotFoundError:
+            self.logger.error(f"File '{filename}' not found.")
+            print(f"File '{filename}' not found.")
+            return False
+
+        except csv.Error:
+            self.logger.error(f"Malformed CSV file '{filename}'.")
+            print(f"Error reading CSV file '{filename}'.")
+            return False
+
+        except UnicodeDecodeError as e:
+            self.logger.error(f"Encoding error in CSV file '{filename}': {e}")
+            print(f"Error: Invalid encoding in CSV file")
+            return False
+
+        except IOError as e:
+            self.logger.error(f"IO error reading {filename}: {e}")
+            print(f"Error: IO error reading file: {e}")
+            return False
+
+        finally:
+            if report:
+                report.close()
+
+        added, reassigned, overwritten, skipped = self._apply_merge(batch, on_conflict)
+        summary = (f"{added} added ({reassigned} with new IDs), {overwritten} overwritten, "
+                   f"{skipped} skipped as already loaded")
+        print(f"Merged '{filename}': {summary}; {len(self.transactions)} transactions in total.")
+        self.logger.info(f"Merged '{filename}' (on_conflict={on_conflict}): {summary}; {len(self.transactions)} in total")
+        return True
+
+    # Helper method to resolve ID conflicts of merged rows and add them to the loaded ones.
+    def _apply_merge(self, batch, on_conflict):
+        """
+        Add the rows of `batch` (a TransactionStore) to self.transactions.
+
+        Returns:
+            tuple: Rows added, of which with a new ID; rows overwritten; rows skipped.
+        """
+        store = self.transactions
+        find = store.find
+        ids = array('q', batch.transaction_ids)
+        keep = bytearray(len(ids))
+        overwrites = []
+        reassigned = []
+        skipped = 0
+        for position, transaction_id in enumerate(ids):
+            slot = find(transaction_id)
+            if slot is None:
+                keep[position] = 1
+            elif on_conflict == 'skip':
+                skipped += 1
+            elif on_conflict == 'overwrite':
+                overwrites.append((slot, position))
+            else:
+                keep[position] = 1
+                reassigned.append(position)
+
+        # New IDs for conflicting rows come from one reserved block above the merged IDs too
+        if reassigned:
+            for position, new_id in zip(reassigned, store.reserve_ids(len(reassigned), max(ids))):
+                ids[position] = new_id
+        codes = [store.encode_description(description) for description in batch.description_table]
+        description_codes = array('I', map(codes.__getitem__, batch.description_codes))
+        columns = [ids, batch.dates, batch.customer_ids, batch.cents, batch.types, description_codes]
+        if overwrites:
+            # Overwritten rows keep their ID and slot; the other fields are written a column at a time
+            slots, positions = zip(*overwrites)
+            store.replace_slots(slots, *([column[position] for position in positions] for column in columns[1:]))
+        if len(overwrites) + skipped:
+            columns = [array(column.typecode, compress(column, keep)) for column in columns]
+        store.extend_columns(*columns)
+        if self._load_state:
+            self._load_state['seen_ids'].update(columns[0])  # Rows appended to the loaded file may not reuse them
+        return len(columns[0]), len(reassigned), len(overwrites), skipped
+
+    # Helper method to open a CSV for lazy, on-demand access.
+    def _open_lazy(self, filename):
+        """Index `filename` for load_transactions(lazy=True); return False to load it in full instead."""
+        if is_compressed(filename):
+            self.logger.info(f"Cannot open compressed '{filename}' lazily; loading it in full")
+            print(f"Cannot open compressed '{filename}' lazily; loading it in full.")
+            return False
+        try:
+            index = RowIndex.open(filename, lambda done, total: self._display_progress_bar(done, total, "Indexing"))
+        except FileNotFoundError:
+            return False  # Reported by the full load
+        except (ValueError, UnicodeDecodeError, IOError) as e:
+            self.logger.info(f"Cannot open '{filename}' lazily ({e}); loading it in full")
+            print(f"Cannot open '{filename}' lazily ({e}); loading it in full.")
+            return False
+        if not len(index):
+            return False
+        self._lazy = LazyTransactions(index)
+        print(f"\rIndexed {len(index)} rows of '{filename}'; rows are read when needed.")
+        self.logger.info(f"Opened '{filename}' lazily ({len(index)} rows indexed)")
+        return True
+
+    # Helper method to parse the whole file when an operation needs every row of a lazy load.
+    def _ensure_loaded(self):
+        """Fully load the lazily opened file, if any; return False if that fails."""
+        if self._lazy is None:
+            return True
+        filename = self._lazy.filename
+        print(f"Loading all rows of '{filename}'...")
+        return self.load_transactions(filename)
+
+    # Helper method to load a binary snapshot written by save_transactions.
+    def _load_snapshot(self, filename):
+        """Memory-map a binary snapshot into self.transactions; return True on success."""
+        try:
+            self.transactions = read_binary(filename)
+        except (ValueError, IOError) as e:
+            self.logger.error(f"Failed to read binary snapshot '{filename}': {e}")
+            print(f"Error: Failed to read binary snapshot '{filename}': {e}")
+            return False
+        if not self.transactions:
+            self.logger.error(f"No valid transactions in '{filename}'")
+            print(f"Error: No valid transactions in snapshot")
+            return False
+        print(f"Loaded {len(self.transactions)} transactions from '{filename}'.")
+        self.logger.info(f"Loaded {len(self.transactions)} transactions from binary snapshot '{filename}'")
+        return True
+
+    # Helper method to set up the rejected-row report for a load.
+    def _open_report(self, header, error_examples, quarantine, append=False):
+        """Return a ValidationReport, without quarantine if its file cannot be opened."""
+        try:
+            return ValidationReport(self.logger, error_examples, quarantine, header, append)
+        except IOError as e:
+            self.logger.error(f"Failed to open quarantine file '{quarantine}': {e}")
+            print(f"Warning: Failed to open quarantine file '{quarantine}': {e}")
+            return ValidationReport(self.logger, error_examples)
+
+    # Helper method to finish the rejected-row report and tell the user about it.
+    def _close_report(self, report):
+        report.close()
+        if report.rejected:
+            print(f"{report.summary()}; see logs/errors.txt.")
+            if report.quarantine:
+                print(f"Rejected rows written to '{report.quarantine}'.")
+
+    # Helper method to validate the CSV header and locate the required columns.
+    def _check_header(self, header, filename):
+        """Return the required column positions, or None after reporting the problem."""
+        if header is None:
+            self.logger.error(f"No valid transactions in '{filename}'")
+            print(f"Error: No valid transactions in CSV")
+            return None
+        positions, missing = column_positions(header)
+        if missing:
+            self.logger.error(f"Missing columns in CSV: {missing}")
+            print(f"Missing columns in CSV: {missing}")
+            return None
+        return positions
+
+    # Helper method to start a snapshot of the input in /snapshots.
+    def _open_snapshot(self, filename, copy=False):
+        """
+        Start the snapshot that load_transactions commits on success.
+
+        Args:
+            filename (str): File being loaded.
+            copy (bool): Read the whole file into the snapshot now; otherwise the
+                snapshot is returned for the loader to write lines into.
+
+        Returns:
+            SnapshotWriter: The snapshot, or None if it cannot be created.
+        """
+        snapshot = None
+        try:
+            snapshot = self.snapshots.writer(filename)
+            if copy:
+                snapshot.write_file(filename)
+            return snapshot
+        except IOError as e:
+            if snapshot:
+                snapshot.abort()
+            self.logger.error(f"Failed to create backup: {e}")
+            print(f"Warning: Failed to create backup: {e}")
+            return None
+
+    def restore_snapshot(self, snapshot_id=None, filename=None):
+        """
+        Rebuild a file saved in /snapshots when it was loaded.
+
+        Args:
+            snapshot_id (str): Snapshot to restore (e.g. 'backup_20250101_120000');
+                None restores the newest one.
+            filename (str): Where to write it; defaults to 'snapshots/<snapshot_id>.csv'.
+
+        Returns:
+            bool: True if the file was restored, False otherwise.
+        """
+        try:
+            if snapshot_id is None:
+                snapshots = self.snapshots.list_snapshots()
+                if not snapshots:
+                    print("No snapshots to restore.")
+                    return False
+                snapshot_id = snapshots[-1]['id']
+            filename = filename or os.path.join(self.snapshots.root, f'{snapshot_id}.csv')
+            self.snapshots.restore(snapshot_id, filename)
+        except KeyError:
+            self.logger.error(f"Snapshot '{snapshot_id}' not found")
+            print(f"Error: Snapshot '{snapshot_id}' not found.")
+            return False
+        except (ValueError, IOError) as e:
+            self.logger.error(f"Failed to restore snapshot '{snapshot_id}': {e}")
+            print(f"Error: Failed to restore snapshot '{snapshot_id}': {e}")
+            return False
+        print(f"Snapshot '{snapshot_id}' restored to '{filename}'.")
+        self.logger.info(f"Restored snapshot '{snapshot_id}' to '{filename}'")
+        return True
+
+    # Helper method to validate CSV records and append the valid ones.
+    def _parse_records(self, records, positions, seen_ids, report, first_row=2, store=None):
+        """
+        Validate records from a csv.reader and append valid ones to self.transactions.
+
+        Args:
+            records (iterator): Records following the header.
+            positions (tuple): Column positions from _check_header().
+            seen_ids (set): transaction_ids seen so far; updated in place.
+            report (ValidationReport): Receives the rejected records.
+            first_row (int): Row number of the first record, for error messages.
+            store (TransactionStore): Where to append instead of self.transactions.
+
+        Returns:
+            int: Number of records read (blank lines are not counted).
+        """
+        append_values = (self.transactions if store is None else store).append_values
+        reject = report.reject
+        validate = compile_validator(positions)
+        row_num = first_row - 1
+        for fields in records:
+            if not fields:
+                continue  # Blank lines are skipped without counting, as csv.DictReader does
+            row_num += 1
+            transaction_id, values, error = validate(fields)
+            if transaction_id is not None:
+                if transaction_id in seen_ids:
+                    values, error = None, duplicate_error(transaction_id)
+                else:
+                    seen_ids.add(transaction_id)
+            if values is None:
+                reject(row_num, error, fields)
+                continue
+            append_values(transaction_id, *values)
+        return row_num - first_row + 1
+
+    # Helper method to parse byte ranges of a CSV in a process pool.
+    def _load_parallel(self, filename, data_start, total_bytes, positions, workers, seen_ids, report, store=None):
+        """
+        Parse the records after the header in worker processes and merge them in order.
+
+        The rows are appended to `store`, or to self.transactions if it is None.
+
+        Returns:
+            int: Number of records read, or None if a field contains a line break,
+            in which case the byte ranges may not line up with records and nothing
+            has been loaded.
+        """
+        with open(filename, 'rb') as file:
+            ranges = split_ranges(file, data_start, total_bytes, workers * 4)
+
+        keep_rejected = report.quarantine is not None
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(parse_range, filename, start, end, positions, keep_rejected)
+                       for start, end in ranges]
+            results = [future.result() for future in futures]
+        if any(result['multiline'] for result in results):
+            return None
+
+        if store is None:
+            store = self.transactions
+        row_offset = 2
+        for (start, end), result in zip(ranges, results):
+            ids = result['ids']
+            chunk_ids = set(compress(ids, result['id_parsed']))
+            errors = result['errors']
+            keep = None
+
+            # IDs already used by earlier ranges make these records duplicates
+            conflicts = chunk_ids & seen_ids
+            if conflicts:
+                duplicates = [i for i, (tid, parsed) in enumerate(zip(ids, result['id_parsed']))
+                              if parsed and tid in conflicts]
+                raw = read_records(filename, start, end, duplicates) if keep_rejected else {}
+                errors = {entry[0]: entry for entry in errors}
+                for i in duplicates:
+                    errors[i] = (i, duplicate_error(ids[i]), raw.get(i))
+                errors = [errors[i] for i in sorted(errors)]
+                duplicate_set = set(duplicates)
+                keep = bytes(i not in duplicate_set for i in result['accepted'])
+            seen_ids |= chunk_ids
+
+            for i, error, *fields in errors:
+                report.reject(row_offset + i, error, fields[0] if fields else None)
+
+            accepted = result['accepted']
+            columns = result['columns']
+            if keep is not None:
+                accepted = array('I', compress(accepted, keep))
+                columns = [array(column.typecode, compress(column, keep)) for column in columns]
+            dates, customer_ids, amounts, types, description_codes = columns
+            codes = [store.encode_description(description) for description in result['descriptions']]
+            store.extend_columns(array('q', (ids[i] for i in accepted)), dates, customer_ids,
+                                 amounts, types, array('I', map(codes.__getitem__, description_codes)))
+
+            row_offset += result['records']
+            self._display_progress_bar(end, total_bytes, "Loading")
+        return row_offset - 2
+
     def add_transaction(self):
+        if not self._ensure_loaded():
+            return False
         print("\nAdd New Transaction (enter 'cancel' to abort)")
 
         # Date input
@@ -283,19 +976,11 @@ class FinanceUtils:
                 self.logger.error(f"Invalid date format: {date_input}")
                 print("Invalid date format. Please enter in YYYY-MM-DD format.")
 
-        # Customer ID input with suggestions from most recent transactions
-        # Sort transactions by date (descending) and get unique customer IDs
-        recent_transactions = sorted(self.transactions, key=lambda t: t['date'], reverse=True)
-        seen_ids = set()
-        customer_ids = []
-        for t in recent_transactions:
-            if t['customer_id'] > 0 and t['customer_id'] not in seen_ids:
-                customer_ids.append(t['customer_id'])
-                seen_ids.add(t['customer_id'])
-                if len(customer_ids) >= 10:  # Limit to 10 IDs
-                    break
+        # Customer ID input with suggestions from the customers with the most recent transactions
+        customers = self.transactions.customers()
+        customer_ids = customers.recent(10)  # Limit to 10 IDs
         if customer_ids:
-            print(f"Recent customer IDs: {', '.join(map(str, customer_ids))}{'...' if len(seen_ids) < len(set(t['customer_id'] for t in self.transactions if t['customer_id'] > 0)) else ''}")
+            print(f"Recent customer IDs: {', '.join(map(str, customer_ids))}{'...' if len(customers) > len(customer_ids) else ''}")
         else:
             print("No customer IDs available.")
 
@@ -322,7 +1007,7 @@ class FinanceUtils:
                 print("Transaction cancelled.")
                 return False
             try:
-                amount = float(amount_input)
+                amount = to_dollars(parse_cents(amount_input))  # Exact to the cent; rejects nan and inf
                 if amount <= 0:
                     self.logger.error(f"Non-positive amount input: {amount_input}")
                     print("Error: Amount must be positive. Please try again.")
@@ -361,8 +1046,8 @@ class FinanceUtils:
                 continue
             break
 
-        # Generate new transaction ID
-        transaction_id = max((t['transaction_id'] for t in self.transactions), default=0) + 1
+        # Generate new transaction ID, above every ID loaded or handed out so far
+        transaction_id = self.transactions.next_id()
 
         # Create and append transaction
         transaction = {
@@ -396,8 +1081,22 @@ class FinanceUtils:
 
         return True
 
-    def view_transactions(self, filter_type=None, filter_year=None):
-        if not self.transactions:
+    def view_transactions(self, filter_type=None, filter_year=None, filter_customer=None):
+        """
+        Show transactions 10 per page, optionally filtered by type, year and customer.
+
+        Filters are answered from the store's secondary indexes, so changing
+        them does not rescan every transaction.
+
+        Args:
+            filter_type (str): 'credit', 'debit' or 'transfer', or None for all.
+            filter_year (int): Year of the transaction date, or None for all.
+            filter_customer (int): Customer ID, or None for all.
+
+        Returns:
+            bool: True if transactions were displayed, False otherwise.
+        """
+        if not self.transactions and self._lazy is None:
             self.logger.info("Attempted to view transactions with no transactions loaded")
             print("No transactions to display.")
             return False
@@ -422,18 +1121,33 @@ class FinanceUtils:
                 self.logger.error(f"Invalid filter year input: {filter_year}")
                 print(f"{self.color['red']}Error: Year must be an integer.{self.color['reset']}")
                 return False
+
+        # Validate filter_customer
+        if filter_customer is not None:
+            try:
+                filter_customer = int(filter_customer)
+            except ValueError:
+                self.logger.error(f"Invalid filter customer input: {filter_customer}")
+                print(f"{self.color['red']}Error: Customer ID must be an integer.{self.color['reset']}")
+                return False
+
+        # Without filters, a lazily opened file is paged straight from disk
+        if self._lazy is not None:
+            if not filter_type and filter_year is None and filter_customer is None:
+                return self._view_lazy()
+            if not self._ensure_loaded():
+                return False
             
-        # Apply filters
-        transactions = self.transactions
-        if filter_type:
-            transactions = [t for t in transactions if t['type'] == filter_type.lower()]
-        if filter_year is not None:
-            transactions = [t for t in transactions if t['date'].year == filter_year]
+        # Look up the matching slots in the secondary indexes; rows are only read for the page shown
+        store = self.transactions
+        transactions = store.select(filter_type.lower() if filter_type else None, filter_year, customer_id=filter_customer)
 
         if not transactions:
             filter_msg = f"{filter_type.capitalize()} transactions in {filter_year}" if filter_type and filter_year else \
                          f"{filter_type.capitalize()} transactions" if filter_type else \
                          f"All transactions in {filter_year}" if filter_year else "Transactions"
+            if filter_customer is not None:
+                filter_msg += f" of customer {filter_customer}"
             print(f"No {filter_msg} found.")
             return False
         
@@ -446,25 +1160,17 @@ class FinanceUtils:
             # Calculate slice for current page
             start_idx = (current_page - 1) * page_size
             end_idx = start_idx + page_size
-            page_transactions = transactions[start_idx:end_idx]
+            page_transactions = [store.row(slot) for slot in transactions[start_idx:end_idx]]
 
             # Prepare table data
-            table = [
-                [
-                    t['transaction_id'],
-                    t['date'].strftime('%b %d, %Y'),
-                    t['customer_id'],
-                    f"${t['amount']:,.2f}",
-                    t['type'].capitalize(),
-                    t['description'][:30] + ('...' if len(t['description']) > 30 else '')
-                ]
-                for t in page_transactions
-            ]
+            table = self._page_table(page_transactions)
 
             headers = [f"{self.color['yellow']}{h}{self.color['reset']}" for h in ['ID', 'Date', 'Customer', 'Amount', 'Type', 'Description']]
             filter_msg = f"{filter_type.capitalize()} transactions in {filter_year}" if filter_type and filter_year else \
                          f"{filter_type.capitalize()} transactions" if filter_type else \
                          f"Transactions in {filter_year}" if filter_year else "All transactions"
+            if filter_customer is not None:
+                filter_msg += f" of customer {filter_customer}"
             print(f"\n{filter_msg} (Page {current_page} of {total_pages}, {len(page_transactions)} transactions):")
             print(tabulate(table, headers=headers, tablefmt='grid', stralign='left'))
 
@@ -488,6 +1194,74 @@ class FinanceUtils:
 
         print(f"Displayed {len(transactions)} transactions across {total_pages} page(s).")
         return True
+
+    # Helper method to format a page of transactions for tabulate.
+    def _page_table(self, page_transactions):
+        return [
+            [
+                t['transaction_id'],
+                t['date'].strftime('%b %d, %Y'),
+                t['customer_id'],
+                f"${t['amount']:,.2f}",
+                t['type'].capitalize(),
+                t['description'][:30] + ('...' if len(t['description']) > 30 else '')
+            ]
+            for t in page_transactions
+        ]
+
+    # Helper method to page through a lazily opened file without loading it.
+    def _view_lazy(self):
+        """
+        Show all transactions of a lazily opened file, 10 per page, reading only shown rows.
+
+        The number of valid rows is not known without parsing everything, so
+        pages are labelled with the file rows they cover.
+        """
+        lazy = self._lazy
+        page_size = 10
+        page, next_row = lazy.page_after(0, page_size)
+        first_row = 0
+        if not page:
+            print("No Transactions found.")
+            return False
+        headers = [f"{self.color['yellow']}{h}{self.color['reset']}" for h in ['ID', 'Date', 'Customer', 'Amount', 'Type', 'Description']]
+        shown = 0
+        pages = 0
+
+        while True:
+            shown += len(page)
+            pages += 1
+            print(f"\nAll transactions (rows {first_row + 1}-{next_row} of {len(lazy)}, {len(page)} transactions):")
+            print(tabulate(self._page_table(page), headers=headers, tablefmt='grid', stralign='left'))
+
+            # Navigation prompt
+            has_prev = lazy.page_before(first_row, 1)[0]
+            has_next = lazy.page_after(next_row, 1)[0]
+            if not has_prev and not has_next:
+                break
+            print(f"\n{self.color['yellow']}Enter command{self.color['reset']} (start, next, prev, end, exit):")
+            command = input("> ").strip().lower()
+            if command == 'exit':
+                break
+            elif command == 'start' and has_prev:
+                first_row = 0
+                page, next_row = lazy.page_after(0, page_size)
+            elif command == 'next' and has_next:
+                first_row = next_row
+                page, next_row = lazy.page_after(next_row, page_size)
+            elif command == 'prev' and has_prev:
+                next_row = first_row
+                page, first_row = lazy.page_before(first_row, page_size)
+            elif command == 'end' and has_next:
+                next_row = len(lazy)
+                page, first_row = lazy.page_before(next_row, page_size)
+            else:
+                print("Invalid command. Use 'start', 'next', 'prev', 'end', or 'exit'.")
+                shown -= len(page)
+                pages -= 1
+
+        print(f"Displayed {shown} transactions across {pages} page(s).")
+        return True
     
     def update_transaction(self):
         """
@@ -496,7 +1270,7 @@ class FinanceUtils:
         Returns:
             bool: True if transaction is updated, False if cancelled or invalid.
         """
-        if not self.transactions:
+        if not self.transactions and self._lazy is None:
             self.logger.info("Attempted to update transaction with no transactions loaded")
             print("No transactions loaded. Please load a transaction file first.")
             return False
@@ -551,9 +1325,9 @@ class FinanceUtils:
                 print("Error: Date must be in YYYY-MM-DD format (e.g., 2020-10-26). Try again.")
 
         # Customer ID input
-        customer_ids = sorted(set(t['customer_id'] for t in self.transactions if t['customer_id'] > 0))
-        if customer_ids:
-            print(f"Valid customer IDs: {', '.join(map(str, customer_ids[:10]))}{'...' if len(customer_ids) > 10 else ''}")
+        customers = self.transactions.customers()
+        if customers:
+            print(f"Valid customer IDs: {', '.join(map(str, customers.sorted_ids(10)))}{'...' if len(customers) > 10 else ''}")
         while True:
             customer_input = input(f"New customer ID [{transaction['customer_id']}]: ").strip()
             if customer_input.lower() == 'cancel':
@@ -583,7 +1357,7 @@ class FinanceUtils:
                 amount = abs(transaction['amount'])
                 break
             try:
-                amount = float(amount_input)
+                amount = to_dollars(parse_cents(amount_input))  # Exact to the cent; rejects nan and inf
                 if amount <= 0:
                     self.logger.error(f"Non-positive amount input: '{amount}'")
                     print("Error: Amount must be positive. Try again.")
@@ -629,6 +1403,12 @@ class FinanceUtils:
             description = description.strip()
             break
 
+        # A lazily opened file is loaded in full before it is changed
+        if self._lazy is not None:
+            if not self._ensure_loaded():
+                return False
+            transaction = self._get_transaction_by_id(transaction_id)
+
         # Update transaction
         transaction.update({
             'date': date_obj,
@@ -667,7 +1447,7 @@ class FinanceUtils:
         Returns:
             bool: True if transaction is deleted, False if cancelled or invalid.
         """
-        if not self.transactions:
+        if not self.transactions and self._lazy is None:
             self.logger.info("Attempted to delete transaction with no transactions loaded")
             print("No transactions loaded. Please load a transaction file first.")
             return False
@@ -713,7 +1493,14 @@ class FinanceUtils:
                 break
             print("Please enter 'yes', 'no', or 'cancel'.")
 
-        # Delete transaction
+        # A lazily opened file is loaded in full before it is changed
+        if self._lazy is not None:
+            if not self._ensure_loaded():
+                return False
+            transaction = self._get_transaction_by_id(transaction_id)
+
+        # Delete transaction, keeping a copy of its values for the log
+        transaction = transaction.copy()
         self.transactions.remove(transaction)
         print(f"{self.color['green']}Transaction {transaction_id} deleted successfully!{self.color['reset']}")
 
@@ -727,27 +1514,152 @@ class FinanceUtils:
 
         return True
     
-    def analyze_transactions(self):
+    def update_transactions(self, changes, **filters):
+        """
+        Update every transaction matching a filter spec in one pass, without prompts.
+
+        Args:
+            changes (dict): New values by field: 'date' (a date), 'customer_id'
+                (positive int), 'amount' (positive; stored negative for debits),
+                'type' or 'description'.
+            **filters: At least one of transaction_type, year, month, customer_id,
+                start and end (dates, inclusive), description (exact) and where
+                (a predicate called with each row), as for TransactionStore.match().
+
+        Returns:
+            int: Number of transactions updated.
+
+        Raises:
+            ValueError: If a change or filter is invalid.
+        """
+        fields = {'date': 'date', 'customer_id': 'customer_id', 'amount': 'amount',
+                  'type': 'transaction_type', 'description': 'description'}
+        unknown = set(changes) - set(fields)
+        if not changes or unknown:
+            self._reject_bulk(f"Cannot update fields {sorted(unknown)}" if unknown else "No changes given")
+        if 'date' in changes and not isinstance(changes['date'], date):
+            self._reject_bulk(f"Invalid date '{changes['date']}'")
+        if 'customer_id' in changes and (not isinstance(changes['customer_id'], int) or changes['customer_id'] <= 0):
+            self._reject_bulk(f"Invalid customer ID '{changes['customer_id']}'")
+        if 'amount' in changes and (not isinstance(changes['amount'], (int, float)) or not math.isfinite(changes['amount'])
+                                    or changes['amount'] <= 0):
+            self._reject_bulk(f"Invalid amount '{changes['amount']}'")
+        if 'type' in changes and changes['type'] not in TYPE_CODES:
+            self._reject_bulk(f"Invalid transaction type '{changes['type']}'")
+        if 'description' in changes and not str(changes['description']).strip():
+            self._reject_bulk("Empty description")
+
+        slots = self._match_bulk(filters)
+        updated = self.transactions.update_slots(slots, **{fields[key]: value for key, value in changes.items()})
+        summary = ', '.join(f"{key}={value}" for key, value in changes.items())
+        print(f"Updated {updated} transactions matching {self._describe_filters(filters)}.")
+        self.logger.info(f"Bulk updated {updated} transactions matching {self._describe_filters(filters)}: {summary}")
+        return updated
+
+    def delete_transactions(self, **filters):
+        """
+        Delete every transaction matching a filter spec in one pass, without prompts.
+
+        Args:
+            **filters: At least one of transaction_type, year, month, customer_id,
+                start and end (dates, inclusive), description (exact) and where
+                (a predicate called with each row), as for TransactionStore.match().
+
+        Returns:
+            int: Number of transactions deleted.
+
+        Raises:
+            ValueError: If a filter is invalid.
+        """
+        slots = self._match_bulk(filters)
+        deleted = self.transactions.remove_slots(slots)
+        print(f"Deleted {deleted} transactions matching {self._describe_filters(filters)}.")
+        self.logger.info(f"Bulk deleted {deleted} transactions matching {self._describe_filters(filters)} "
+                         f"({len(self.transactions)} left)")
+        return deleted
+
+    # Helper method to find the rows of a bulk update or delete.
+    def _match_bulk(self, filters):
+        """Return the positions of the rows matching `filters`, after validating them."""
+        allowed = {'transaction_type', 'year', 'month', 'customer_id', 'start', 'end', 'description', 'where'}
+        filters = {key: value for key, value in filters.items() if value is not None}
+        if not filters or set(filters) - allowed:
+            self._reject_bulk(f"Unknown filters {sorted(set(filters) - allowed)}" if filters else "No filter given")
+        if not self._ensure_loaded():
+            raise IOError("Failed to load the lazily opened file")
+        try:
+            return self.transactions.match(**filters)
+        except ValueError as e:
+            self._reject_bulk(str(e))
+
+    # Helper method to log and raise an invalid bulk operation.
+    def _reject_bulk(self, message):
+        self.logger.error(f"Invalid bulk operation: {message}")
+        raise ValueError(message)
+
+    # Helper method to describe a filter spec in messages.
+    def _describe_filters(self, filters):
+        return ', '.join(f"{key}={'<predicate>' if key == 'where' else value}"
+                         for key, value in filters.items() if value is not None)
+
+    def analyze_transactions(self, start=None, end=None, windows=(), source=None):
         """
         Analyze transactions and print summary stats. 
+
+        The sums come from the store's running totals, built on load and updated
+        by every add, update and delete, so no transactions are scanned. With a
+        date range, they come from the store's time index instead (see
+        timeindex.py), which sums any range of days in O(log days).
+
+        With `source`, that CSV is analyzed instead of the loaded transactions,
+        without loading it: its rows are validated as load_transactions does and
+        summed per day and type as they stream past (see _stream_file()), so
+        memory depends on the number of days, not rows.
+
+        Args:
+            start (date): First date to include, or None from the first transaction.
+            end (date): Last date to include, or None up to the last transaction.
+            windows (tuple): Window lengths in days (e.g. (30, 90)); for each, the
+                totals of the window ending on `end` (or the last transaction date)
+                are printed too.
+            source (str): Path of a CSV (optionally compressed) to stream instead
+                of the loaded transactions, or None.
+
+        Returns:
+            bool: True if the analysis succeeds, False otherwise.
         """
-        if not self.transactions:
+        index = None
+        if source is not None:
+            by_day = {}
+            if self._stream_file(source, lambda ids, dates, customer_ids, cents, types:
+                                 day_totals(dates, types, cents, by_day=by_day)) is None:
+                return False
+            index = TimeIndex.from_days(by_day)
+            if not index.count():
+                self.logger.error(f"No valid transactions in '{source}'")
+                print(f"Error: No valid transactions in CSV")
+                return False
+            print(f"Streamed {index.count():,} transactions from '{source}'.")
+            self.logger.info(f"Analyzed {index.count()} transactions streamed from '{source}'")
+        elif not self._ensure_loaded():
+            return False
+        elif not self.transactions:
             self.logger.info("Attempted to analyze transactions with no transactions loaded")
             print("No transactions loaded. Please load a transaction file first.")
             return False
         
-        # Initialize analysis data
-        type_sums = {"debit": 0.0, "credit": 0.0}
-        transfer_total = 0.0
-
-        # Process transactions
-        for transaction in self.transactions:
-            if transaction['type'] == 'debit':
-                type_sums['debit'] += abs(transaction['amount'])
-            elif transaction['type'] == 'credit':
-                type_sums['credit'] += abs(transaction['amount'])
-            elif transaction['type'] == 'transfer':
-                transfer_total += abs(transaction['amount'])
+        # Read each type's sum off the running totals or the time index, which every change keeps up to date
+        if index is not None or start is not None or end is not None:
+            if index is None:
+                index = self.transactions.time_index()
+            totals = lambda type_code: index.total(start, end, type_code)
+        else:
+            totals = self.transactions.totals().total
+        type_sums = {
+            "debit": totals(TYPE_CODES['debit']),
+            "credit": totals(TYPE_CODES['credit'])
+        }
+        transfer_total = totals(TYPE_CODES['transfer'])
 
         # Calculate totals
         total_transactions = len(self.transactions)
@@ -757,7 +1669,12 @@ class FinanceUtils:
         net_balance = total_credit + total_debit
 
         # Print summary
-        print(f"\n{self.color['cyan']}Financial Summary:{self.color['reset']}")
+        if start is not None or end is not None:
+            period = f"{start or 'start'} to {end or 'end'}"
+            print(f"\n{self.color['cyan']}Financial Summary ({period}):{self.color['reset']}")
+            print(f"{self.color['yellow']}Transactions:{self.color['reset']} {index.count(start, end):,}")
+        else:
+            print(f"\n{self.color['cyan']}Financial Summary:{self.color['reset']}")
         print(f"{self.color['yellow']}Total Credits:{self.color['reset']} ${total_credit:,.2f}")
         print(f"{self.color['yellow']}Total Debits:{self.color['reset']} ${total_debit:,.2f}")
         print(f"{self.color['yellow']}Total Transfers:{self.color['reset']} ${total_transfer:,.2f}")
@@ -766,18 +1683,33 @@ class FinanceUtils:
         for t in type_sums:
             print(f"  {self.color['yellow']}{t.capitalize()}:{self.color['reset']} ${type_sums[t]:,.2f}")
 
+        # Trailing windows, each one lookup in the time index
+        if windows:
+            if index is None:
+                index = self.transactions.time_index()
+            last = end or index.date_range()[1]
+            print(f"{self.color['yellow']}Rolling windows to {last}:{self.color['reset']} ")
+            for days in windows:
+                window = index.summary(last - timedelta(days=days - 1), last)
+                print(f"  {self.color['yellow']}Last {days} days:{self.color['reset']} credits ${window['credits']:,.2f}, "
+                      f"debits ${window['debits']:,.2f}, net ${window['net_balance']:,.2f} ({window['count']:,} transactions)")
+
         return True
     
-    def save_transactions(self, filename='financial_transactions.csv'):
+    def save_transactions(self, filename='financial_transactions.csv', binary=False):
         """
-        Save transactions to a CSV file.
+        Save transactions to a CSV file, compressed if it ends in '.gz', '.bz2' or '.xz'.
         
         Args:
             filename (str): Path to the CSV file.
+            binary (bool): Also write a binary snapshot next to the CSV (same name,
+                '.bin' suffix) that load_transactions opens without parsing.
             
         Returns:
             bool: True if saving succeeds, False otherwise.
         """
+        if not self._ensure_loaded():
+            return False
         if not self.transactions:
             self.logger.info("Attempted to save transactions with no transactions loaded")
             print("No transactions loaded. Please load a transaction file first.")
@@ -785,19 +1717,26 @@ class FinanceUtils:
         
         try:
             total_transactions = len(self.transactions) # Track total transactions for progress bar
-            with open(filename, mode='w', encoding='utf-8', newline='') as file:
+            with open_output(filename) as file:
                 fieldnames = ['transaction_id', 'date', 'customer_id', 'amount', 'type', 'description']
                 writer = csv.DictWriter(file, fieldnames=fieldnames)
                 writer.writeheader()
                 
-                for i, transaction in enumerate(self.transactions, 1):
+                store = self.transactions
+                date_strings = {}  # Ordinal -> 'YYYY-MM-DD', formatted once per distinct date
+                rows = zip(store.transaction_ids, store.dates, store.customer_ids,
+                           store.cents, store.types, store.description_codes)
+                for i, (transaction_id, ordinal, customer_id, cents, type_code, description_code) in enumerate(rows, 1):
+                    date_str = date_strings.get(ordinal)
+                    if date_str is None:
+                        date_str = date_strings[ordinal] = date.fromordinal(ordinal).strftime('%Y-%m-%d')
                     writer.writerow({
-                        'transaction_id': transaction['transaction_id'],
-                        'date': transaction['date'].strftime('%Y-%m-%d'),
-                        'customer_id': transaction['customer_id'],
-                        'amount': abs(transaction['amount']),
-                        'type': transaction['type'],
-                        'description': transaction['description']
+                        'transaction_id': transaction_id,
+                        'date': date_str,
+                        'customer_id': customer_id,
+                        'amount': format_cents(abs(cents)),
+                        'type': TYPES[type_code],
+                        'description': store.description_table[description_code]
                     })
                     # Update progress bar every 1% of transactions
                     if i % max(1, total_transactions // 100) == 0:
@@ -809,6 +1748,20 @@ class FinanceUtils:
                 
                 print(f"Transactions saved to '{filename}'.")
                 self.logger.info(f"Saved {len(self.transactions)} transactions to '{filename}'")
+
+            # Taken after the CSV is closed so the cube of the next report and the snapshot record its final size and mtime
+            with open(filename, 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+                self._track_rollups(filename, self._file_checkpoint(file, None if is_compressed(filename) else size))
+            if binary:
+                snapshot = binary_path(filename)
+                try:
+                    write_binary(self.transactions, snapshot, source=filename)
+                    print(f"Binary snapshot saved to '{snapshot}'.")
+                    self.logger.info(f"Saved binary snapshot '{snapshot}'")
+                except IOError as e:
+                    self.logger.error(f"Failed to save binary snapshot: {e}")
+                    print(f"Warning: Failed to save binary snapshot to '{snapshot}': {e}")
             return True
         
         except IOError as e:
@@ -816,7 +1769,8 @@ class FinanceUtils:
             print(f"Error: Failed to save transactions to '{filename}': {e}")
             return False
         
-    def generate_report(self, filename='report.txt'):
+    def generate_report(self, filename='report.txt', workers=None, anomaly_detector='zscore', anomaly_threshold=None,
+                        top_customers=5, customer_capacity=None, source=None):
         """
         Generate a financial report with yearly and quarterly breakdowns, top customers,
         year-over-year growth, and anomaly detection, saving it to a text file.
@@ -826,17 +1780,61 @@ class FinanceUtils:
         - Financial summary (credits, debits, transfers, net balance)
         - Breakdown by type (count and percentage)
         - Yearly and quarterly breakdowns (credits, debits, transfers, net balance, counts)
-        - Top 5 customers by transaction volume
+        - Top 5 customers by transaction volume and by count
         - Year-over-year growth for credits, debits, and net balance
-        - Anomalous transactions (amounts > 3 standard deviations from mean)
+        - Anomalous transactions (by default, amounts > 3 standard deviations from mean)
+
+        The anomaly detector's statistics are merged batch by batch and shard by
+        shard (see anomalies.py), so they take constant memory; flagging rows is
+        one more pass, as the statistics are only final after the last row.
+
+        A serial report reads its totals, counts and customer rankings off the
+        store's rollup cube (see rollup.py), kept up to date by every change and
+        reused from, or saved to, the '.cube' file next to the CSV the rows were
+        loaded from or saved to; only the anomaly detector reads the rows.
+        Totals are summed in cents, so they are exact.
+
+        With `workers` greater than 1, the rows are split into shards whose
+        statistics are gathered in a process pool and merged in row order. The
+        report is the same as a serial one.
+
+        With `source`, the report covers that CSV instead of the loaded
+        transactions, without loading it. Its rows are validated as
+        load_transactions does and folded into the statistics batch by batch as
+        they stream past (see _stream_file()); a later pass flags the anomalies
+        (two for the 'mad' detector). Memory depends on the number of years and
+        customers, not rows; with `customer_capacity` as well, it is bounded
+        whatever the file's size. `workers` is not used.
 
         Args:
             filename (str): Path to the report file.
+            workers (int): Number of worker processes; None or 1 for a serial pass.
+            anomaly_detector (str): 'zscore' (all rows), 'type' or 'customer'
+                (z-score within the row's type or customer) or 'mad' (median/MAD).
+            anomaly_threshold (float): Score above which a row is anomalous, or None
+                for the detector's default.
+            top_customers (int): Number of customers in each ranking.
+            customer_capacity (int): None to rank customers exactly, or a number of
+                counters for approximate rankings in bounded memory (Space-Saving),
+                each value shown with how much it may be overstated.
+            source (str): Path of a CSV (optionally compressed) to stream instead
+                of the loaded transactions, or None.
             
         Returns:
             bool: True if report generation succeeds, False otherwise.
         """
-        if not self.transactions:
+        try:
+            detector = make_detector(anomaly_detector, anomaly_threshold)
+            ranking = make_ranking(customer_capacity)
+            if top_customers < 1:
+                raise ValueError(f"Number of top customers must be positive, got {top_customers}")
+        except ValueError as e:
+            self.logger.error(f"Invalid report settings: {e}")
+            print(f"{self.color['red']}Error: {e}{self.color['reset']}")
+            return False
+        if source is None and not self._ensure_loaded():
+            return False
+        if source is None and not self.transactions:
             self.logger.info("Attempted to generate report with no transactions loaded")
             print(f"{self.color['red']}No transactions loaded. Please load a transaction file first.{self.color['reset']}")
             return False
@@ -853,24 +1851,40 @@ class FinanceUtils:
             stages = 8  # Date range, totals, type breakdown, yearly, quarterly, top customers, YoY, anomalies
             current_stage = 0
 
+            # Every section's statistics come from a single pass over the rows
+            if source is None:
+                stats = self._report_stats(workers, detector, ranking)
+                anomalies = self._report_anomalies(stats)
+            else:
+                stats = ReportStats(detector, ranking)
+                scan = self._stream_file(source, lambda ids, dates, customer_ids, cents, types:
+                                         stats.add(dates, types, cents, customer_ids))
+                if scan is None:
+                    return False
+                if not stats.count:
+                    self.logger.error(f"No valid transactions in '{source}'")
+                    print(f"Error: No valid transactions in CSV")
+                    return False
+                anomalies = self._report_anomalies(stats, source, scan)
+            credit_code, debit_code, transfer_code = TYPE_CODES['credit'], TYPE_CODES['debit'], TYPE_CODES['transfer']
+
             with open(filename, 'w', encoding='utf-8') as file:
                 file.write("Financial Report\n")
                 file.write("=================\n\n")
 
                 # Date range and total transactions
-                dates = [t['date'] for t in self.transactions]
-                min_date = min(dates).strftime('%Y-%m-%d')
-                max_date = max(dates).strftime('%Y-%m-%d')
+                min_date = date.fromordinal(stats.first_date).strftime('%Y-%m-%d')
+                max_date = date.fromordinal(stats.last_date).strftime('%Y-%m-%d')
                 file.write(f"Date Range: {min_date} to {max_date}\n")
-                file.write(f"Total Transactions: {len(self.transactions):,}\n")
+                file.write(f"Total Transactions: {stats.count:,}\n")
                 file.write("\n")
                 current_stage += 1
                 self._display_progress_bar(current_stage, stages, "Generating Report")
 
                 # Financial summary
-                total_credit = sum(t['amount'] for t in self.transactions if t['type'] == 'credit')
-                total_debit = sum(abs(t['amount']) for t in self.transactions if t['type'] == 'debit')
-                total_transfer = sum(abs(t['amount']) for t in self.transactions if t['type'] == 'transfer')
+                total_credit = stats.type_totals[credit_code]
+                total_debit = stats.type_totals[debit_code]
+                total_transfer = stats.type_totals[transfer_code]
                 net_balance = total_credit - total_debit
                 file.write("Financial Summary:\n")
                 file.write(f"  Total Credits: ${total_credit:,.2f}\n")
@@ -882,10 +1896,10 @@ class FinanceUtils:
                 self._display_progress_bar(current_stage, stages, "Generating Report")
 
                 # Breakdown by type
-                total_transactions = len(self.transactions)
-                credit_count = sum(1 for t in self.transactions if t['type'] == 'credit')
-                debit_count = sum(1 for t in self.transactions if t['type'] == 'debit')
-                transfer_count = sum(1 for t in self.transactions if t['type'] == 'transfer')
+                total_transactions = stats.count
+                credit_count = stats.type_counts[credit_code]
+                debit_count = stats.type_counts[debit_code]
+                transfer_count = stats.type_counts[transfer_code]
                 file.write("Breakdown by Type:\n")
                 if total_transactions > 0:
                     credit_percentage = (credit_count / total_transactions) * 100
@@ -901,29 +1915,7 @@ class FinanceUtils:
                 self._display_progress_bar(current_stage, stages, "Generating Report")
 
                 # Yearly and quarterly breakdown
-                yearly_data = {}
-                for t in self.transactions:
-                    year = t['date'].year
-                    quarter = (t['date'].month - 1) // 3 + 1  # Q1: Jan-Mar, Q2: Apr-Jun, etc.
-                    if year not in yearly_data:
-                        yearly_data[year] = {
-                            'credits': 0.0, 'debits': 0.0, 'transfers': 0.0, 'count': 0,
-                            'quarters': {1: {'credits': 0.0, 'debits': 0.0, 'transfers': 0.0, 'count': 0},
-                                        2: {'credits': 0.0, 'debits': 0.0, 'transfers': 0.0, 'count': 0},
-                                        3: {'credits': 0.0, 'debits': 0.0, 'transfers': 0.0, 'count': 0},
-                                        4: {'credits': 0.0, 'debits': 0.0, 'transfers': 0.0, 'count': 0}}
-                        }
-                    if t['type'] == 'credit':
-                        yearly_data[year]['credits'] += t['amount']
-                        yearly_data[year]['quarters'][quarter]['credits'] += t['amount']
-                    elif t['type'] == 'debit':
-                        yearly_data[year]['debits'] += abs(t['amount'])
-                        yearly_data[year]['quarters'][quarter]['debits'] += abs(t['amount'])
-                    elif t['type'] == 'transfer':
-                        yearly_data[year]['transfers'] += abs(t['amount'])
-                        yearly_data[year]['quarters'][quarter]['transfers'] += abs(t['amount'])
-                    yearly_data[year]['count'] += 1
-                    yearly_data[year]['quarters'][quarter]['count'] += 1
+                yearly_data = stats.years
                 file.write("Breakdown by Year and Quarter:\n")
                 for year in sorted(yearly_data.keys()):
                     data = yearly_data[year]
@@ -951,16 +1943,18 @@ class FinanceUtils:
                 current_stage += 1
                 self._display_progress_bar(current_stage, stages, "Generating Report")
 
-                # Top 5 customers by transaction volume
-                customer_totals = {}
-                for t in self.transactions:
-                    cid = t['customer_id']
-                    amount = abs(t['amount'])
-                    customer_totals[cid] = customer_totals.get(cid, 0.0) + amount
-                top_customers = sorted(customer_totals.items(), key=lambda x: x[1], reverse=True)[:5]
-                file.write("Top 5 Customers by Transaction Volume:\n")
-                for cid, total in top_customers:
-                    file.write(f"  Customer ID {cid}: ${total:,.2f}\n")
+                # Top customers by transaction volume and count
+                file.write(f"Top {top_customers} Customers by Transaction Volume:\n")
+                if ranking.approximate:
+                    file.write(f"  (Approximate: customers not listed have at most ${ranking.bound('volume') / 100:,.2f})\n")
+                for cid, cents, error in stats.top_customers(top_customers, 'volume'):  # Volumes are in cents
+                    file.write(f"  Customer ID {cid}: ${cents / 100:,.2f}" + (f" (overstated by at most ${error / 100:,.2f})" if error else "") + "\n")
+                file.write("\n")
+                file.write(f"Top {top_customers} Customers by Transaction Count:\n")
+                if ranking.approximate:
+                    file.write(f"  (Approximate: customers not listed have at most {ranking.bound('count'):,} transactions)\n")
+                for cid, count, error in stats.top_customers(top_customers, 'count'):
+                    file.write(f"  Customer ID {cid}: {count:,} transactions" + (f" (overstated by at most {error:,})" if error else "") + "\n")
                 file.write("\n")
                 current_stage += 1
                 self._display_progress_bar(current_stage, stages, "Generating Report")
@@ -986,19 +1980,12 @@ class FinanceUtils:
                 current_stage += 1
                 self._display_progress_bar(current_stage, stages, "Generating Report")
 
-                # Anomaly detection (transactions > 3 std deviations from mean)
-                amounts = [abs(t['amount']) for t in self.transactions]
-                if amounts:
-                    mean = sum(amounts) / len(amounts)
-                    variance = sum((x - mean) ** 2 for x in amounts) / len(amounts)
-                    std_dev = variance ** 0.5
-                    threshold = mean + 3 * std_dev
-                    anomalies = [(t['transaction_id'], t['amount'], t['date'].strftime('%Y-%m-%d'), t['customer_id'])
-                                for t in self.transactions if abs(t['amount']) > threshold]
-                    file.write("Anomalous Transactions (> 3 std dev from mean amount):\n")
+                # Anomaly detection (by default, transactions > 3 std deviations from mean)
+                if stats.count:
+                    file.write(f"Anomalous Transactions ({detector.describe()}):\n")
                     if anomalies:
-                        for tid, amount, date, cid in anomalies:
-                            file.write(f"  ID {tid}: ${amount:,.2f} on {date} (Customer {cid})\n")
+                        for tid, amount, date_str, cid in anomalies:
+                            file.write(f"  ID {tid}: ${amount:,.2f} on {date_str} (Customer {cid})\n")
                     else:
                         file.write("  No anomalies detected.\n")
                 else:
@@ -1017,4 +2004,131 @@ class FinanceUtils:
         except IOError as e:
             self.logger.error(f"Failed to generate report: {e}")
             print(f"{self.color['red']}Error: Failed to generate report '{filename}': {self.color['reset']}{e}")
-            return False
\ No newline at end of file
+            return False
+
+    # Helper method to gather the report statistics, serially or in worker processes.
+    def _report_stats(self, workers, detector, ranking):
+        store = self.transactions
+        columns = (store.dates, store.types, store.cents, store.customer_ids)
+        stats = ReportStats(detector, ranking)
+        if not workers or workers < 2 or len(store) < workers:
+            # Totals come from the rollup cube, kept up to date by every change; only the detector reads the rows
+            stats.add_cube(self._report_rollups(), store.customer_ids)
+            detector.fit(store.types, store.cents, store.customer_ids)
+            return stats
+        shards = workers * 4
+        bounds = [len(store) * i // shards for i in range(shards + 1)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(partial_report, *(column[start:end] for column in columns), detector, ranking)
+                       for start, end in zip(bounds, bounds[1:]) if end > start]
+            partials = [future.result() for future in futures]
+        # Merged only once every shard is back: until then `detector` and `ranking` may still be pickled for a worker
+        for partial in partials:
+            stats.merge(partial)
+        return stats
+
+    # Helper method to list the anomalous transactions, from the store or from one more pass over a streamed CSV.
+    def _report_anomalies(self, stats, source=None, scan=None):
+        """
+        Flag the anomalous rows with the detector fitted in `stats`.
+
+        Args:
+            stats (ReportStats): Statistics of every row.
+            source (str): The CSV the statistics were streamed from, or None for the loaded transactions.
+            scan (tuple): What _stream_file() returned for `source`.
+
+        Returns:
+            list: (transaction_id, amount in dollars, 'YYYY-MM-DD', customer_id) per anomalous row, in row order.
+        """
+        if not stats.count:
+            return []
+        if source is None:
+            store = self.transactions
+            batches = [(store.transaction_ids, store.dates, store.customer_ids, store.cents, store.types)]
+        else:
+            if stats.detector.deviation_pass:
+                for ids, dates, customer_ids, cents, types in self._stream_batches(source, *scan, prefix="Measuring deviations"):
+                    stats.detector.fit_deviations(types, cents, customer_ids)
+            batches = self._stream_batches(source, *scan, prefix="Finding anomalies")
+        anomalies = []
+        for ids, dates, customer_ids, cents, types in batches:
+            anomalies.extend((ids[slot], cents[slot] / 100, date.fromordinal(dates[slot]).strftime('%Y-%m-%d'), customer_ids[slot])
+                             for slot in stats.anomalies(types, cents, customer_ids))
+        return anomalies
+
+    # Helper method to analyze a CSV without loading it.
+    def _stream_file(self, filename, add, error_examples=MAX_ERROR_EXAMPLES, quarantine=None):
+        """
+        Validate a CSV as load_transactions does and hand its valid rows to `add`, batch by batch.
+
+        Nothing but the current batch is kept, so a file larger than memory can
+        be analyzed. Duplicate IDs are still rejected without remembering every
+        ID: a first pass reads only the IDs, through a Bloom filter of at most
+        1 GiB, to find the few that may repeat (see streaming.py); the second
+        validates the rows and remembers only those. Rejected rows are logged
+        (and quarantined) as on load. The file must not change between passes.
+
+        Args:
+            filename (str): Path to the CSV file (optionally compressed).
+            add (function): add(transaction_ids, dates, customer_ids, cents, types), called per batch of valid rows.
+            error_examples (int): Rejected rows logged per reason; None logs all of them.
+            quarantine (str): Path of a CSV to receive the rejected rows, or None.
+
+        Returns:
+            tuple: (positions, suspects), for more passes with _stream_batches(),
+            or None if the file could not be read (already reported).
+        """
+        report = None
+        try:
+            records = self._stream_records(filename, "Checking IDs")
+            header = next(records, None)
+            positions = self._check_header(header, filename)
+            if positions is None:
+                return None
+            suspects = find_suspects(records, positions[0], bloom_bits(os.path.getsize(filename), is_compressed(filename)))
+            self.logger.info(f"{len(suspects)} possibly repeated transaction IDs in '{filename}'")
+            report = self._open_report(header, error_examples, quarantine)
+            for batch in self._stream_batches(filename, positions, suspects, report.reject):
+                add(*batch)
+            self._close_report(report)
+            return positions, suspects
+
+        except FileNotFoundError:
+            self.logger.error(f"File '{filename}' not found.")
+            print(f"File '{filename}' not found.")
+            return None
+
+        except csv.Error:
+            self.logger.error(f"Malformed CSV file '{filename}'.")
+            print(f"Error reading CSV file '{filename}'.")
+            return None
+
+        except UnicodeDecodeError as e:
+            self.logger.error(f"Encoding error in CSV file '{filename}': {e}")
+            print(f"Error: Invalid encoding in CSV file")
+            return None
+
+        except IOError as e:
+            self.logger.error(f"IO error reading {filename}: {e}")
+            print(f"Error: IO error reading file: {e}")
+            return None
+
+        finally:
+            if report:
+                report.close()
+
+    # Helper method to stream the valid rows of a CSV, after the first pass of _stream_file().
+    def _stream_batches(self, filename, positions, suspects, reject=None, prefix="Analyzing"):
+        """Return an iterator of (transaction_ids, dates, customer_ids, cents, types) batches of the valid rows."""
+        records = self._stream_records(filename, prefix)
+        next(records, None)  # The header, checked by the first pass
+        return stream_batches(records, compile_validator(positions), suspects, reject)
+
+    # Helper method to read the records of a CSV one at a time.
+    def _stream_records(self, filename, prefix):
+        """Yield each record of `filename`, the header first, with progress from the bytes read."""
+        with open_input(filename) as file:
+            total_bytes = os.fstat(file.fileno()).st_size
+            yield from csv.reader(self._read_lines(file, total_bytes, prefix=prefix))
+            self._display_progress_bar(total_bytes, total_bytes, prefix)
+            print()  # Newline after progress bar